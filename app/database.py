@@ -1,9 +1,29 @@
+import threading
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-from config import DATABASE_URL
+from config import (
+    DATABASE_URL, ASYNC_DATABASE_URL, DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT_SECONDS,
+    DB_POOL_RECYCLE_SECONDS, DB_POOL_PRE_PING, DB_STATEMENT_TIMEOUT_MS
+)
+from app.utils.pool_metrics import InstrumentedQueuePool, InstrumentedAsyncQueuePool
 
-engine = create_engine(DATABASE_URL)
+connect_args = {}
+if DB_STATEMENT_TIMEOUT_MS and make_url(DATABASE_URL).get_backend_name() == "postgresql":
+    connect_args["options"] = f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}"
+
+engine = create_engine(
+    DATABASE_URL,
+    poolclass=InstrumentedQueuePool,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_timeout=DB_POOL_TIMEOUT_SECONDS,
+    pool_recycle=DB_POOL_RECYCLE_SECONDS,
+    pool_pre_ping=DB_POOL_PRE_PING,
+    connect_args=connect_args
+)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
@@ -12,4 +32,60 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+# -------------------------------
+# ASYNC ENGINE (async routes)
+# -------------------------------
+
+# Async drivers for the sync URLs we support (aiosqlite is a dev requirement,
+# for the SQLite database the tests and benchmarks run on)
+_ASYNC_DRIVERS = {"postgresql": "asyncpg", "sqlite": "aiosqlite"}
+
+_async_engine = None
+_async_engine_lock = threading.Lock()
+AsyncSessionLocal = async_sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False)
+
+def async_database_url() -> str:
+    if ASYNC_DATABASE_URL:
+        return ASYNC_DATABASE_URL
+    url = make_url(DATABASE_URL)
+    backend = url.get_backend_name()
+    return url.set(drivername=f"{backend}+{_ASYNC_DRIVERS.get(backend, url.get_driver_name())}") \
+        .render_as_string(hide_password=False)
+
+def get_async_engine() -> AsyncEngine:
+    """
+    The async engine, created on first use so processes that never serve an
+    async route (scripts, workers) do not need the async driver
+    """
+    global _async_engine
+    if _async_engine is None:
+        with _async_engine_lock:
+            if _async_engine is None:
+                url = async_database_url()
+                async_connect_args = {}
+                if DB_STATEMENT_TIMEOUT_MS and make_url(url).get_backend_name() == "postgresql":
+                    async_connect_args["server_settings"] = {"statement_timeout": str(DB_STATEMENT_TIMEOUT_MS)}
+                _async_engine = create_async_engine(
+                    url,
+                    poolclass=InstrumentedAsyncQueuePool,
+                    pool_size=DB_POOL_SIZE,
+                    max_overflow=DB_MAX_OVERFLOW,
+                    pool_timeout=DB_POOL_TIMEOUT_SECONDS,
+                    pool_recycle=DB_POOL_RECYCLE_SECONDS,
+                    pool_pre_ping=DB_POOL_PRE_PING,
+                    connect_args=async_connect_args
+                )
+                AsyncSessionLocal.configure(bind=_async_engine)
+    return _async_engine
+
+async def get_async_db():
+    get_async_engine()
+    async with AsyncSessionLocal() as db:
+        yield db
+
+async def dispose_async_engine():
+    if _async_engine is not None:
+        await _async_engine.dispose()
@@ -1,11 +1,22 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.database import engine
+from app.database import engine, SessionLocal, dispose_async_engine
 from app.models import models
-from app.routes import auth, products, cart, users, admin_products, admin_categories,admin_inventory,admin_prescriptions, admin_orders, admin_backup,admin_notifications, admin_reports,customer_orders, customer_prescriptions, customer_payments,refund,notification
+from app.utils.schema import upgrade_schema
+from app.services.product_search import backfill_search_vectors
+from app.services.suggestion_index import suggestion_index
+from app.services.stock_projection import stock_projection_refresher
+from app.services.sales_rollups import ensure_sales_rollups
+from app.services.report_jobs import resume_report_jobs
+from app.services.analytics_snapshot import analytics_snapshot_scheduler
+from app.services.stock_reservations import reservation_sweeper
+from app.services.blob_store import blob_garbage_collector
+from app.services.prescription_previews import shutdown_preview_pool
+from app.routes import auth, products, cart, users, admin_products, admin_categories,admin_inventory,admin_prescriptions, admin_orders, admin_backup,admin_notifications, admin_reports, admin_dashboard, admin_metrics,customer_orders, customer_prescriptions, customer_payments,refund,notification
 
-# Create all tables
+# Create all tables, then add columns/indexes introduced since they were created
 models.Base.metadata.create_all(bind=engine)
+upgrade_schema(engine, models.Base.metadata)
 
 app = FastAPI(
     title="E-Pharmacy Management System",
@@ -42,6 +53,35 @@ app.include_router(admin_orders.router)
 app.include_router(admin_backup.router)
 app.include_router(admin_notifications.router)
 app.include_router(admin_reports.router)
+app.include_router(admin_dashboard.router)
+app.include_router(admin_metrics.router)
+
+@app.on_event("startup")
+def start_background_jobs():
+    db = SessionLocal()
+    try:
+        backfill_search_vectors(db)
+        suggestion_index.build(db)
+        ensure_sales_rollups(db)
+        resume_report_jobs(db)
+    finally:
+        db.close()
+    reservation_sweeper.start()
+    stock_projection_refresher.start()
+    analytics_snapshot_scheduler.start()
+    blob_garbage_collector.start()
+
+@app.on_event("shutdown")
+def stop_background_jobs():
+    reservation_sweeper.stop()
+    stock_projection_refresher.stop()
+    analytics_snapshot_scheduler.stop()
+    blob_garbage_collector.stop()
+    shutdown_preview_pool()
+
+@app.on_event("shutdown")
+async def close_async_engine():
+    await dispose_async_engine()
 
 # @app.get("/")
 # def root():
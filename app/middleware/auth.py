@@ -49,24 +49,60 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jose import JWTError, jwt
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.database import get_db
+from app.database import get_db, get_async_db
 from app.models.models import Customer, UserRole
-from config import SECRET_KEY, ALGORITHM
+from app.utils.principal_cache import principal_cache, snapshot_customer
+from app.utils.loaders import entity_loader
+from config import SECRET_KEY, ALGORITHM, AUTH_TRUST_ROLE_CLAIM
 from app.schemas.auth import TokenData
 
 security = HTTPBearer()
 
-async def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
-):
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
-    
+credentials_exception = HTTPException(
+    status_code=status.HTTP_401_UNAUTHORIZED,
+    detail="Could not validate credentials",
+    headers={"WWW-Authenticate": "Bearer"},
+)
+
+class AuthenticatedUser:
+    """
+    The customer behind the current request.
+
+    customer_id and role are always set. The remaining Customer columns are
+    served from the principal cache and only loaded from the database the
+    first time a handler reads one of them.
+    """
+
+    def __init__(self, customer_id: int, role: UserRole, db: Session, snapshot: dict = None):
+        self.customer_id = customer_id
+        self.role = role
+        self._db = db
+        self._snapshot = snapshot
+
+    def __getattr__(self, name):
+        # Only called for attributes not set in __init__
+        if name.startswith("_"):
+            raise AttributeError(name)
+        snapshot = self._load_snapshot()
+        if name not in snapshot:
+            raise AttributeError(name)
+        return snapshot[name]
+
+    def _load_snapshot(self) -> dict:
+        if self._snapshot is None:
+            snapshot = principal_cache.get(self.customer_id)
+            if snapshot is None:
+                customer = entity_loader(self._db, Customer).get(self.customer_id)
+                if customer is None:
+                    raise credentials_exception
+                snapshot = snapshot_customer(customer)
+                principal_cache.set(self.customer_id, snapshot)
+            self._snapshot = snapshot
+        return self._snapshot
+
+def _decode_token(credentials: HTTPAuthorizationCredentials) -> TokenData:
     try:
         payload = jwt.decode(credentials.credentials, SECRET_KEY, algorithms=[ALGORITHM])
         user_id: int = payload.get("user_id")
@@ -75,17 +111,46 @@ async def get_current_user(
         if user_id is None or role is None:
             raise credentials_exception
             
-        token_data = TokenData(user_id=user_id, role=role)
-    except JWTError:
+        return TokenData(user_id=user_id, role=role)
+    except (JWTError, ValueError):
         raise credentials_exception
+
+def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db)
+):
+    """
+    A plain def so FastAPI runs it in the threadpool: a principal cache miss
+    blocks on the sync session (and on a pool checkout) off the event loop
+    """
+    token_data = _decode_token(credentials)
+    user_id = token_data.user_id
+
+    # Trust the signed role claim and defer loading the customer row
+    if AUTH_TRUST_ROLE_CLAIM:
+        return AuthenticatedUser(user_id, UserRole(token_data.role.value), db)
     
-    user = db.query(Customer).filter(Customer.customer_id == user_id).first()
+    snapshot = principal_cache.get(user_id)
+    if snapshot is None:
+        user = entity_loader(db, Customer).get(user_id)
+        if user is None:
+            raise credentials_exception
+        snapshot = snapshot_customer(user)
+        principal_cache.set(user_id, snapshot)
+        
+    return AuthenticatedUser(snapshot["customer_id"], snapshot["role"], db, snapshot)
+
+def get_current_user_record(
+    current_user: AuthenticatedUser = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Load the full Customer row for handlers that modify it or need the password hash"""
+    user = entity_loader(db, Customer).get(current_user.customer_id)
     if user is None:
         raise credentials_exception
-        
     return user
 
-async def get_current_admin(current_user: Customer = Depends(get_current_user)):
+def _require_admin(current_user):
     # Fix: Compare with Enum value or convert to string
     if current_user.role != UserRole.admin:
         raise HTTPException(
@@ -94,12 +159,51 @@ async def get_current_admin(current_user: Customer = Depends(get_current_user)):
         )
     return current_user
 
-# ADD THIS FUNCTION - Customer-specific authentication
-async def get_current_customer(current_user: Customer = Depends(get_current_user)):
-    """Ensure the current user is a customer, not an admin"""
+def _require_customer(current_user):
     if current_user.role != UserRole.customer:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="This feature is only available for customers. Admin access not allowed."
         )
-    return current_user
\ No newline at end of file
+    return current_user
+
+async def get_current_admin(current_user: Customer = Depends(get_current_user)):
+    return _require_admin(current_user)
+
+# ADD THIS FUNCTION - Customer-specific authentication
+async def get_current_customer(current_user: Customer = Depends(get_current_user)):
+    """Ensure the current user is a customer, not an admin"""
+    return _require_customer(current_user)
+
+# -------------------------------
+# ASYNC ROUTES
+# -------------------------------
+
+async def get_current_user_async(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    get_current_user for async routes: a principal cache miss is loaded on
+    the async session, so the event loop never blocks on the database
+    """
+    token_data = _decode_token(credentials)
+    user_id = token_data.user_id
+    
+    snapshot = principal_cache.get(user_id)
+    if snapshot is None:
+        user = await db.get(Customer, user_id)
+        if user is None:
+            raise credentials_exception
+        snapshot = snapshot_customer(user)
+        principal_cache.set(user_id, snapshot)
+    
+    # Snapshot already loaded: the async path never lazy-loads through a sync session
+    return AuthenticatedUser(snapshot["customer_id"], snapshot["role"], None, snapshot)
+
+async def get_current_admin_async(current_user: Customer = Depends(get_current_user_async)):
+    return _require_admin(current_user)
+
+async def get_current_customer_async(current_user: Customer = Depends(get_current_user_async)):
+    """Ensure the current user is a customer, not an admin"""
+    return _require_customer(current_user)
\ No newline at end of file
@@ -1,7 +1,9 @@
 from app.models.models import (
     Customer, CustomerAddress, Category, Product, 
-    PharmacyInventory, Prescription, PrescriptionItem,
+    PharmacyInventory, StockReservation, ProductStockProjection, Prescription, PrescriptionItem,
     Order, OrderItem, OrderItemBatch, OrderTaxDetail,
     Payment, Refund, Invoice, CartItem, Notification,
+    DailySalesRollup, DailyProductSalesRollup, DailyCategorySalesRollup,
+    ReportJob,
     Backup, Restore
 )
\ No newline at end of file
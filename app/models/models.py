@@ -1,9 +1,11 @@
 from sqlalchemy import (
     Column, Integer, String, Text, DECIMAL, Date, DateTime, Boolean,
-    Enum, ForeignKey, JSON, TIMESTAMP, CHAR, CheckConstraint
+    Enum, ForeignKey, JSON, TIMESTAMP, CHAR, CheckConstraint, Index
 )
 from sqlalchemy.sql import func
-from sqlalchemy.orm import declarative_base, relationship
+from sqlalchemy.orm import declarative_base, relationship, deferred
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy import DDL, event
 from enum import Enum as PyEnum
 from sqlalchemy import DateTime
 from datetime import datetime
@@ -11,6 +13,13 @@ from datetime import datetime
 
 Base = declarative_base()
 
+# Trigram indexes need the pg_trgm extension before the tables are created
+event.listen(
+    Base.metadata,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql")
+)
+
 # -------------------------------
 # ENUM DEFINITIONS
 # -------------------------------
@@ -59,6 +68,18 @@ class NotificationType(PyEnum):
     alert = "alert"
     success = "success"
 
+class ReservationStatus(PyEnum):
+    active = "active"
+    consumed = "consumed"
+    released = "released"
+    expired = "expired"
+
+class ReportJobStatus(PyEnum):
+    queued = "queued"
+    running = "running"
+    completed = "completed"
+    failed = "failed"
+
 
 # -------------------------------
 # TABLE DEFINITIONS
@@ -80,7 +101,7 @@ class Customer(Base):
     updated_at = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now())
 
     addresses = relationship("CustomerAddress", back_populates="customer")
-    prescriptions = relationship("Prescription", back_populates="customer")
+    prescriptions = relationship("Prescription", back_populates="customer", foreign_keys="Prescription.customer_id")
     orders = relationship("Order", back_populates="customer")
     cart_items = relationship("CartItem", back_populates="customer")
 
@@ -135,6 +156,8 @@ class Product(Base):
     is_active = Column(Boolean, default=True)
     created_at = Column(TIMESTAMP, server_default=func.now())
     updated_at = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now())
+    # Weighted full-text document (name, SKU, manufacturer, description); Postgres only
+    search_vector = deferred(Column(TSVECTOR().with_variant(Text(), "sqlite")))
 
     category = relationship("Category", back_populates="products")
     prescription_items = relationship("PrescriptionItem", back_populates="product") 
@@ -142,6 +165,16 @@ class Product(Base):
     order_items = relationship("OrderItem", back_populates="product")
     cart_items = relationship("CartItem", back_populates="product")
 
+    __table_args__ = (
+        Index("ix_products_search_vector", "search_vector", postgresql_using="gin"),
+        Index(
+            "ix_products_name_trgm", "name",
+            postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"}
+        ),
+        # Keyset pagination of the catalogue within a category
+        Index("ix_products_category_id_product_id", "category_id", "product_id"),
+    )
+
 
 
 class PharmacyInventory(Base):
@@ -162,6 +195,45 @@ class PharmacyInventory(Base):
 
     product = relationship("Product", back_populates="inventory_items")
     order_item_batches = relationship("OrderItemBatch", back_populates="inventory")
+    reservations = relationship("StockReservation", back_populates="inventory")
+
+    __table_args__ = (
+        Index("ix_pharmacy_inventory_product_id_inventory_id", "product_id", "inventory_id"),
+    )
+
+
+class StockReservation(Base):
+    __tablename__ = "stock_reservations"
+
+    reservation_id = Column(Integer, primary_key=True, autoincrement=True)
+    inventory_id = Column(Integer, ForeignKey("pharmacy_inventory.inventory_id"), nullable=False)
+    product_id = Column(Integer, ForeignKey("products.product_id"), nullable=False)
+    customer_id = Column(Integer, ForeignKey("customers.customer_id"), nullable=False)
+    quantity = Column(Integer, nullable=False)
+    status = Column(Enum(ReservationStatus), nullable=False, default=ReservationStatus.active)
+    expires_at = Column(TIMESTAMP, nullable=False)
+    order_id = Column(Integer, ForeignKey("orders.order_id"), nullable=True)  # set once the hold is consumed by an order
+    created_at = Column(TIMESTAMP, server_default=func.now())
+    released_at = Column(TIMESTAMP)
+
+    inventory = relationship("PharmacyInventory", back_populates="reservations")
+
+    __table_args__ = (
+        Index("ix_stock_reservations_inventory_status", "inventory_id", "status", "expires_at"),
+        Index("ix_stock_reservations_customer_status", "customer_id", "status"),
+    )
+
+
+class ProductStockProjection(Base):
+    """Per-product stock summary kept up to date by app.services.stock_projection"""
+    __tablename__ = "product_stock_projection"
+
+    product_id = Column(Integer, ForeignKey("products.product_id"), primary_key=True)
+    quantity = Column(Integer, nullable=False, default=0)  # sellable units across available, unexpired batches
+    nearest_expiry = Column(Date)
+    low_stock = Column(Boolean, nullable=False, default=False)
+    batch_count = Column(Integer, nullable=False, default=0)
+    refreshed_at = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now())
 
 
 
@@ -181,9 +253,24 @@ class Prescription(Base):
     is_used = Column(Boolean, default=False)  # ✅ once used in an order, mark True
     used_in_order_id = Column(Integer, ForeignKey("orders.order_id"), nullable=True)  # link to order for audit
 
-    customer = relationship("Customer", back_populates="prescriptions")
+    # Review queue: uploaded to unblock a checkout, and the reviewer's lease on it
+    blocks_checkout = Column(Boolean, default=False)
+    claimed_by = Column(Integer, ForeignKey("customers.customer_id"), nullable=True)
+    claimed_at = Column(TIMESTAMP, nullable=True)
+    claim_expires_at = Column(TIMESTAMP, nullable=True)
+
+    customer = relationship("Customer", back_populates="prescriptions", foreign_keys=[customer_id])
     prescription_items = relationship("PrescriptionItem", back_populates="prescription", cascade="all, delete-orphan") 
 
+    # Keyset pagination: newest first, overall and per status / customer
+    __table_args__ = (
+        Index("ix_prescriptions_uploaded_at_id", "uploaded_at", "prescription_id"),
+        Index("ix_prescriptions_status_uploaded_at_id", "status", "uploaded_at", "prescription_id"),
+        Index("ix_prescriptions_customer_uploaded_at_id", "customer_id", "uploaded_at", "prescription_id"),
+        # Review queue: pending first by blocking, then oldest
+        Index("ix_prescriptions_review_queue", "status", "blocks_checkout", "uploaded_at", "prescription_id"),
+    )
+
 
 class PrescriptionItem(Base):
     __tablename__ = "prescription_items"
@@ -234,6 +321,13 @@ class Order(Base):
     notifications = relationship("Notification", back_populates="order", cascade="all, delete-orphan")
     prescription = relationship("Prescription", foreign_keys=[prescription_id])
 
+    # Keyset pagination: newest first, overall and per status / customer
+    __table_args__ = (
+        Index("ix_orders_order_date_id", "order_date", "order_id"),
+        Index("ix_orders_status_order_date_id", "status", "order_date", "order_id"),
+        Index("ix_orders_customer_order_date_id", "customer_id", "order_date", "order_id"),
+    )
+
 
 
 class OrderItem(Base):
@@ -373,6 +467,60 @@ class Notification(Base):
     customer = relationship("Customer")
     order = relationship("Order", back_populates="notifications")
 
+    # Keyset pagination: newest first, overall and per recipient
+    __table_args__ = (
+        Index("ix_notifications_created_at_id", "created_at", "notification_id"),
+        Index("ix_notifications_recipient_created_at_id", "recipient_customer_id", "created_at", "notification_id"),
+    )
+
+
+# Sales rollups, maintained by app.services.sales_rollups (cancelled orders excluded)
+
+class DailySalesRollup(Base):
+    __tablename__ = "daily_sales_rollups"
+
+    sales_date = Column(Date, primary_key=True)
+    order_count = Column(Integer, nullable=False, default=0)
+    items_sold = Column(Integer, nullable=False, default=0)
+    gross_sales = Column(DECIMAL(12, 2), nullable=False, default=0)  # sum of order final amounts
+    updated_at = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now())
+
+
+class DailyProductSalesRollup(Base):
+    __tablename__ = "daily_product_sales_rollups"
+
+    sales_date = Column(Date, primary_key=True)
+    product_id = Column(Integer, ForeignKey("products.product_id"), primary_key=True)
+    quantity = Column(Integer, nullable=False, default=0)
+    revenue = Column(DECIMAL(12, 2), nullable=False, default=0)  # sum of item subtotals
+
+
+class DailyCategorySalesRollup(Base):
+    __tablename__ = "daily_category_sales_rollups"
+
+    sales_date = Column(Date, primary_key=True)
+    category_id = Column(Integer, ForeignKey("categories.category_id"), primary_key=True)
+    quantity = Column(Integer, nullable=False, default=0)
+    revenue = Column(DECIMAL(12, 2), nullable=False, default=0)
+
+
+class ReportJob(Base):
+    """Background report run, executed by app.services.report_jobs"""
+    __tablename__ = "report_jobs"
+
+    job_id = Column(String(32), primary_key=True)
+    report_type = Column(String(30), nullable=False)
+    params = Column(JSON, nullable=False)
+    cache_key = Column(String(64), nullable=False, index=True)  # hash of type, params and data fingerprint
+    status = Column(Enum(ReportJobStatus), nullable=False, default=ReportJobStatus.queued)
+    progress = Column(Integer, nullable=False, default=0)  # percent
+    result_path = Column(String(255))
+    error = Column(Text)
+    requested_by = Column(Integer, ForeignKey("customers.customer_id"), nullable=True)
+    created_at = Column(TIMESTAMP, server_default=func.now())
+    started_at = Column(TIMESTAMP)
+    completed_at = Column(TIMESTAMP)
+
 
 class Backup(Base):
     __tablename__ = "backup"
@@ -5,6 +5,7 @@ from app.database import get_db
 from app.middleware.auth import get_current_admin
 from app.models.models import Category, Product, Customer
 from app.schemas.admin import CategoryCreate, CategoryUpdate, CategoryResponse
+from app.services.catalog_cache import catalog_cache, TAG_CATEGORIES
 
 router = APIRouter(prefix="/admin/categories", tags=["admin-categories"])
 
@@ -56,6 +57,7 @@ def create_category_admin(
     db.add(new_category)
     db.commit()
     db.refresh(new_category)
+    catalog_cache.invalidate(TAG_CATEGORIES)
     return new_category
 
 @router.put("/{category_id}", response_model=CategoryResponse)
@@ -89,6 +91,7 @@ def update_category_admin(
     
     db.commit()
     db.refresh(category)
+    catalog_cache.invalidate(TAG_CATEGORIES)
     return category
 
 @router.delete("/{category_id}")
@@ -117,6 +120,7 @@ def delete_category_admin(
     # Soft delete by setting is_active to False
     category.is_active = False
     db.commit()
+    catalog_cache.invalidate(TAG_CATEGORIES)
     return {"message": "Category deleted successfully"}
 
 @router.patch("/{category_id}/restore")
@@ -132,6 +136,7 @@ def restore_category_admin(
     
     category.is_active = True
     db.commit()
+    catalog_cache.invalidate(TAG_CATEGORIES)
     return {"message": "Category restored successfully"}
 
 @router.get("/{category_id}/products/count")
@@ -0,0 +1,13 @@
+from fastapi import APIRouter, Depends
+from app.middleware.auth import get_current_admin
+from app.models.models import Customer
+from app.services.admin_stats import dashboard_summary
+
+router = APIRouter(prefix="/admin/dashboard", tags=["admin-dashboard"])
+
+@router.get("/")
+def get_admin_dashboard(
+    current_admin: Customer = Depends(get_current_admin)
+):
+    """Get every admin statistics summary in one call (cached for a few seconds)"""
+    return dashboard_summary()
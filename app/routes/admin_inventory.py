@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from sqlalchemy.orm import Session
 from sqlalchemy import func  # Import func from sqlalchemy
 from typing import List, Optional
@@ -7,13 +7,19 @@ from app.database import get_db
 from app.middleware.auth import get_current_admin
 from app.models.models import PharmacyInventory, Product, Customer
 from app.schemas.admin import InventoryCreate, InventoryUpdate, InventoryResponse
+from app.services.catalog_cache import catalog_cache, product_tag
+from app.services.stock_projection import refresh_stock_projection
+from app.services.admin_stats import inventory_summary
+from app.utils.pagination import keyset_paginate
 
 router = APIRouter(prefix="/admin/inventory", tags=["admin-inventory"])
 
 @router.get("/", response_model=List[InventoryResponse])
 def get_inventory_admin(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
+    cursor: Optional[str] = Query(None),
     product_id: Optional[int] = Query(None),
     low_stock: Optional[bool] = Query(None),
     is_available: Optional[bool] = Query(None),
@@ -33,8 +39,9 @@ def get_inventory_admin(
     if is_available is not None:
         query = query.filter(PharmacyInventory.is_available == is_available)
     
-    inventory = query.offset(skip).limit(limit).all()
-    return inventory
+    return keyset_paginate(
+        query, response, PharmacyInventory.inventory_id, cursor=cursor, skip=skip, limit=limit
+    )
 
 @router.post("/", response_model=InventoryResponse, status_code=status.HTTP_201_CREATED)
 def add_inventory_batch(
@@ -65,8 +72,10 @@ def add_inventory_batch(
     
     new_inventory = PharmacyInventory(**inventory.dict())
     db.add(new_inventory)
+    refresh_stock_projection(db, [new_inventory.product_id])
     db.commit()
     db.refresh(new_inventory)
+    catalog_cache.invalidate(product_tag(new_inventory.product_id))
     return new_inventory
 
 @router.put("/{inventory_id}", response_model=InventoryResponse)
@@ -84,12 +93,15 @@ def update_inventory_batch(
         raise HTTPException(status_code=404, detail="Inventory batch not found")
     
     update_data = inventory_update.dict(exclude_unset=True)
+    previous_product_id = inventory.product_id
     
     for field, value in update_data.items():
         setattr(inventory, field, value)
     
+    refresh_stock_projection(db, [previous_product_id, inventory.product_id])
     db.commit()
     db.refresh(inventory)
+    catalog_cache.invalidate(product_tag(previous_product_id), product_tag(inventory.product_id))
     return inventory
 
 @router.get("/low-stock", response_model=List[InventoryResponse])
@@ -126,29 +138,4 @@ def get_inventory_summary(
     db: Session = Depends(get_db)
 ):
     """Get inventory statistics summary"""
-    total_items = db.query(PharmacyInventory).count()
-    available_items = db.query(PharmacyInventory).filter(
-        PharmacyInventory.is_available == True
-    ).count()
-    
-    low_stock_count = db.query(PharmacyInventory).filter(
-        PharmacyInventory.quantity_in_stock <= PharmacyInventory.low_stock_threshold,
-        PharmacyInventory.is_available == True
-    ).count()
-    
-    expired_items = db.query(PharmacyInventory).filter(
-        PharmacyInventory.expiry_date < datetime.now().date()
-    ).count()
-    
-    # FIXED: Use func from sqlalchemy, not db.func
-    total_stock_value = db.query(
-        func.sum(PharmacyInventory.quantity_in_stock * PharmacyInventory.cost_price)
-    ).scalar() or 0
-    
-    return {
-        "total_inventory_items": total_items,
-        "available_items": available_items,
-        "low_stock_items": low_stock_count,
-        "expired_items": expired_items,
-        "total_stock_value": float(total_stock_value)
-    }
\ No newline at end of file
+    return inventory_summary(db)
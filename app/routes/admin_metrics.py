@@ -0,0 +1,17 @@
+from fastapi import APIRouter, Depends
+from app.database import engine, get_async_engine
+from app.middleware.auth import get_current_admin
+from app.models.models import Customer
+from app.utils.pool_metrics import pool_status
+
+router = APIRouter(prefix="/admin/metrics", tags=["admin-metrics"])
+
+@router.get("/db-pool")
+def get_db_pool_metrics(
+    current_admin: Customer = Depends(get_current_admin)
+):
+    """Connection pool gauges and checkout wait histogram of this worker process"""
+    return {
+        "sync": pool_status(engine),
+        "async": pool_status(get_async_engine().sync_engine)
+    }
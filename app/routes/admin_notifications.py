@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 from typing import List, Optional
@@ -7,13 +7,17 @@ from app.database import get_db
 from app.middleware.auth import get_current_admin
 from app.models.models import Notification, Customer, Order
 from app.schemas.admin import NotificationCreate, NotificationResponse
+from app.services.admin_stats import notifications_summary
+from app.utils.pagination import keyset_paginate
 
 router = APIRouter(prefix="/admin/notifications", tags=["admin-notifications"])
 
 @router.get("/", response_model=List[NotificationResponse])
 def get_notifications_admin(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
+    cursor: Optional[str] = Query(None),
     notification_type: Optional[str] = Query(None),
     is_read: Optional[bool] = Query(None),
     recipient_customer_id: Optional[int] = Query(None),
@@ -30,8 +34,10 @@ def get_notifications_admin(
     if recipient_customer_id:
         query = query.filter(Notification.recipient_customer_id == recipient_customer_id)
     
-    notifications = query.order_by(Notification.created_at.desc()).offset(skip).limit(limit).all()
-    return notifications
+    return keyset_paginate(
+        query, response, Notification.notification_id, Notification.created_at, descending=True,
+        cursor=cursor, skip=skip, limit=limit
+    )
 
 @router.post("/", response_model=NotificationResponse, status_code=status.HTTP_201_CREATED)
 def create_notification_admin(
@@ -137,29 +143,4 @@ def get_notifications_summary(
     db: Session = Depends(get_db)
 ):
     """Get notifications statistics summary"""
-    total_notifications = db.query(Notification).count()
-    unread_notifications = db.query(Notification).filter(Notification.is_read == False).count()
-    read_notifications = total_notifications - unread_notifications
-    
-    # Notifications by type
-    type_counts = db.query(
-        Notification.type,
-        func.count(Notification.notification_id).label('count')
-    ).group_by(Notification.type).all()
-    
-    # Recent notifications (last 7 days)
-    week_ago = datetime.now() - timedelta(days=7)
-    recent_notifications = db.query(Notification).filter(
-        Notification.created_at >= week_ago
-    ).count()
-    
-    return {
-        "total_notifications": total_notifications,
-        "unread_notifications": unread_notifications,
-        "read_notifications": read_notifications,
-        "recent_notifications_7_days": recent_notifications,
-        "type_distribution": [
-            {"type": notif_type, "count": count}
-            for notif_type, count in type_counts
-        ]
-    }
\ No newline at end of file
+    return notifications_summary(db)
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 from typing import List, Optional
@@ -9,13 +9,19 @@ from app.models.models import Order, OrderItem, Customer, Product, Prescription
 from app.schemas.admin import (
     OrderResponse, OrderUpdate, OrderWithCustomer, OrderItemResponse
 )
+from app.services.admin_stats import orders_summary
+from app.services.sales_rollups import counts_in_sales, add_order_to_rollups, remove_order_from_rollups
+from app.utils.loaders import entity_loader
+from app.utils.pagination import keyset_paginate
 
 router = APIRouter(prefix="/admin/orders", tags=["admin-orders"])
 
 @router.get("/", response_model=List[OrderWithCustomer])
 def get_orders_admin(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
+    cursor: Optional[str] = Query(None),
     status: Optional[str] = Query(None),
     customer_id: Optional[int] = Query(None),
     order_type: Optional[str] = Query(None),
@@ -32,12 +38,16 @@ def get_orders_admin(
     if order_type:
         query = query.filter(Order.order_type == order_type)
     
-    orders = query.order_by(Order.order_date.desc()).offset(skip).limit(limit).all()
+    orders = keyset_paginate(
+        query, response, Order.order_id, Order.order_date, descending=True,
+        cursor=cursor, skip=skip, limit=limit
+    )
     
-    # Add customer information to response
+    # Add customer information to response (one query for the whole page)
+    customers = entity_loader(db, Customer).get_many([order.customer_id for order in orders])
     result = []
     for order in orders:
-        customer = db.query(Customer).filter(Customer.customer_id == order.customer_id).first()
+        customer = customers.get(order.customer_id)
         
         order_data = OrderWithCustomer(
             order_id=order.order_id,
@@ -72,7 +82,7 @@ def get_order_admin(
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
     
-    customer = db.query(Customer).filter(Customer.customer_id == order.customer_id).first()
+    customer = entity_loader(db, Customer).get(order.customer_id)
     
     return OrderWithCustomer(
         order_id=order.order_id,
@@ -107,9 +117,10 @@ def get_order_items(
     items = db.query(OrderItem).filter(OrderItem.order_id == order_id).all()
     
     # Add product information to response
+    products = entity_loader(db, Product).get_many([item.product_id for item in items])
     result = []
     for item in items:
-        product = db.query(Product).filter(Product.product_id == item.product_id).first()
+        product = products.get(item.product_id)
         
         item_data = OrderItemResponse(
             order_item_id=item.order_item_id,
@@ -136,7 +147,8 @@ def update_order_status(
     db: Session = Depends(get_db)
 ):
     """Update order status"""
-    order = db.query(Order).filter(Order.order_id == order_id).first()
+    # Locked so a concurrent cancel cannot move the order out of the rollups twice
+    order = db.query(Order).filter(Order.order_id == order_id).with_for_update().populate_existing().first()
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
     
@@ -153,9 +165,16 @@ def update_order_status(
     elif order_update.status == "cancelled":
         order.cancelled_at = datetime.now()
     
+    was_counted = counts_in_sales(order.status)
     order.status = order_update.status
     order.updated_at = datetime.now()
     
+    # Cancelling (or un-cancelling) an order moves it out of (or back into) the sales rollups
+    if was_counted and not counts_in_sales(order.status):
+        remove_order_from_rollups(db, order)
+    elif not was_counted and counts_in_sales(order.status):
+        add_order_to_rollups(db, order)
+    
     db.commit()
     
     return {
@@ -170,32 +189,4 @@ def get_orders_summary(
     db: Session = Depends(get_db)
 ):
     """Get orders statistics summary"""
-    total_orders = db.query(Order).count()
-    
-    # Orders by status
-    status_counts = db.query(
-        Order.status,
-        func.count(Order.order_id).label('count')
-    ).group_by(Order.status).all()
-    
-    # Recent orders (last 7 days)
-    week_ago = datetime.now() - timedelta(days=7)
-    recent_orders = db.query(Order).filter(Order.order_date >= week_ago).count()
-    
-    # Total revenue
-    total_revenue = db.query(func.sum(Order.final_amount)).scalar() or 0
-    
-    # Today's orders
-    today_start = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
-    today_orders = db.query(Order).filter(Order.order_date >= today_start).count()
-    
-    return {
-        "total_orders": total_orders,
-        "recent_orders_7_days": recent_orders,
-        "today_orders": today_orders,
-        "total_revenue": float(total_revenue),
-        "status_distribution": [
-            {"status": status, "count": count}
-            for status, count in status_counts
-        ]
-    }
\ No newline at end of file
+    return orders_summary(db)
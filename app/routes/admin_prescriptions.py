@@ -1,22 +1,45 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Path, Query, Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import func, select
+import os
 from typing import List, Optional
 from datetime import datetime, timedelta  # Add timedelta import
-from app.database import get_db
-from app.middleware.auth import get_current_admin
+from app.database import get_db, get_async_db
+from app.middleware.auth import get_current_admin, get_current_admin_async
 from app.models.models import Prescription, PrescriptionItem, Customer, Product
 from app.schemas.admin import (
     PrescriptionResponse, PrescriptionUpdate, PrescriptionWithCustomer,
     PrescriptionItemResponse
 )
+from app.services.admin_stats import prescriptions_summary
+from app.services.blob_store import blob_key, blob_store_stats, collect_garbage
+from app.services.review_queue import (
+    claim_next, renew_claim, release_claim, end_claim, pending_queue, queue_entries, queue_metrics, is_claimed_by_other
+)
+from app.services.prescription_previews import source_path, ensure_derivative
+from app.utils.file_response import file_response
+from app.utils.image_derivatives import DERIVATIVE_MEDIA_TYPE, sniff_media_type
+from app.utils.loaders import entity_loader
+from app.utils.pagination import keyset_paginate
+from config import BLOB_GC_GRACE_SECONDS, REVIEW_MAX_CLAIM
 
 router = APIRouter(prefix="/admin/prescriptions", tags=["admin-prescriptions"])
 
+def _file_urls(prescription_id: int) -> dict:
+    base = f"{router.prefix}/{prescription_id}/file"
+    return {
+        "file_url": f"{base}/original",
+        "thumbnail_url": f"{base}/thumbnail",
+        "preview_url": f"{base}/preview"
+    }
+
 @router.get("/", response_model=List[PrescriptionWithCustomer])
 def get_prescriptions_admin(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
+    cursor: Optional[str] = Query(None),
     status: Optional[str] = Query(None),
     customer_id: Optional[int] = Query(None),
     current_admin: Customer = Depends(get_current_admin),
@@ -30,12 +53,16 @@ def get_prescriptions_admin(
     if customer_id:
         query = query.filter(Prescription.customer_id == customer_id)
     
-    prescriptions = query.order_by(Prescription.uploaded_at.desc()).offset(skip).limit(limit).all()
+    prescriptions = keyset_paginate(
+        query, response, Prescription.prescription_id, Prescription.uploaded_at, descending=True,
+        cursor=cursor, skip=skip, limit=limit
+    )
     
-    # Add customer information to response
+    # Add customer information to response (one query for the whole page)
+    customers = entity_loader(db, Customer).get_many([prescription.customer_id for prescription in prescriptions])
     result = []
     for prescription in prescriptions:
-        customer = db.query(Customer).filter(Customer.customer_id == prescription.customer_id).first()
+        customer = customers.get(prescription.customer_id)
         
         prescription_data = PrescriptionWithCustomer(
             prescription_id=prescription.prescription_id,
@@ -47,12 +74,65 @@ def get_prescriptions_admin(
             uploaded_at=prescription.uploaded_at,
             verified_at=prescription.verified_at,
             customer_name=f"{customer.first_name} {customer.last_name}" if customer else "Unknown",
-            customer_email=customer.email if customer else "Unknown"
+            customer_email=customer.email if customer else "Unknown",
+            **_file_urls(prescription.prescription_id)
         )
         result.append(prescription_data)
     
     return result
 
+# Review queue routes are declared before /{prescription_id} so "queue" is not taken for an id
+
+@router.get("/queue")
+def get_review_queue(
+    limit: int = Query(50, ge=1, le=200),
+    current_admin: Customer = Depends(get_current_admin),
+    db: Session = Depends(get_db)
+):
+    """Pending prescriptions in review order: blocking a checkout first, then oldest"""
+    return queue_entries(db, pending_queue(db, limit))
+
+@router.post("/queue/claim")
+def claim_prescriptions(
+    count: int = Query(1, ge=1, le=REVIEW_MAX_CLAIM),
+    current_admin: Customer = Depends(get_current_admin),
+    db: Session = Depends(get_db)
+):
+    """
+    Claim the next prescriptions to review (plus any you already hold).
+    Each claim is a lease: renew it while working, or it returns to the queue.
+    """
+    return queue_entries(db, claim_next(db, current_admin.customer_id, count))
+
+@router.get("/queue/metrics")
+def get_review_queue_metrics(
+    hours: int = Query(24, ge=1, le=24 * 30),
+    current_admin: Customer = Depends(get_current_admin),
+    db: Session = Depends(get_db)
+):
+    """Queue depth, time to verify and per-reviewer throughput"""
+    return queue_metrics(db, hours)
+
+@router.post("/{prescription_id}/claim/renew")
+def renew_prescription_claim(
+    prescription_id: int,
+    current_admin: Customer = Depends(get_current_admin),
+    db: Session = Depends(get_db)
+):
+    """Extend your lease on a claimed prescription"""
+    prescription = renew_claim(db, prescription_id, current_admin.customer_id)
+    return {"prescription_id": prescription_id, "claim_expires_at": prescription.claim_expires_at}
+
+@router.delete("/{prescription_id}/claim")
+def release_prescription_claim(
+    prescription_id: int,
+    current_admin: Customer = Depends(get_current_admin),
+    db: Session = Depends(get_db)
+):
+    """Return a claimed prescription to the queue without verifying it"""
+    release_claim(db, prescription_id, current_admin.customer_id)
+    return {"message": "Claim released", "prescription_id": prescription_id}
+
 @router.get("/{prescription_id}", response_model=PrescriptionWithCustomer)
 def get_prescription_admin(
     prescription_id: int,
@@ -64,7 +144,7 @@ def get_prescription_admin(
     if not prescription:
         raise HTTPException(status_code=404, detail="Prescription not found")
     
-    customer = db.query(Customer).filter(Customer.customer_id == prescription.customer_id).first()
+    customer = entity_loader(db, Customer).get(prescription.customer_id)
     
     return PrescriptionWithCustomer(
         prescription_id=prescription.prescription_id,
@@ -76,9 +156,41 @@ def get_prescription_admin(
         uploaded_at=prescription.uploaded_at,
         verified_at=prescription.verified_at,
         customer_name=f"{customer.first_name} {customer.last_name}" if customer else "Unknown",
-        customer_email=customer.email if customer else "Unknown"
+        customer_email=customer.email if customer else "Unknown",
+        **_file_urls(prescription.prescription_id)
     )
 
+@router.get("/{prescription_id}/file/{variant}")
+async def get_prescription_file(
+    request: Request,
+    prescription_id: int,
+    variant: str = Path(..., pattern="^(original|thumbnail|preview)$"),
+    current_admin: Customer = Depends(get_current_admin_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    The uploaded file, a small thumbnail or a first-page preview (JPEG).
+    Supports range requests and may be cached by the browser indefinitely.
+    """
+    image_url = await db.scalar(
+        select(Prescription.image_url).where(Prescription.prescription_id == prescription_id)
+    )
+    if not image_url:
+        raise HTTPException(status_code=404, detail="Prescription not found")
+
+    source = source_path(image_url)
+    if not source or not os.path.exists(source):
+        raise HTTPException(status_code=404, detail="Prescription file not found")
+
+    if variant == "original":
+        path, media_type = source, sniff_media_type(source) or "application/octet-stream"
+    else:
+        path, media_type = await ensure_derivative(source, variant), DERIVATIVE_MEDIA_TYPE
+
+    # Blob contents never change, so their key makes a strong ETag
+    key = blob_key(image_url)
+    return file_response(request, path, media_type, etag=f'"{key}-{variant}"' if key else None)
+
 @router.get("/{prescription_id}/items", response_model=List[PrescriptionItemResponse])
 def get_prescription_items(
     prescription_id: int,
@@ -95,9 +207,10 @@ def get_prescription_items(
     ).all()
     
     # Add product information to response
+    products = entity_loader(db, Product).get_many([item.product_id for item in items])
     result = []
     for item in items:
-        product = db.query(Product).filter(Product.product_id == item.product_id).first()
+        product = products.get(item.product_id)
         
         item_data = PrescriptionItemResponse(
             prescription_item_id=item.prescription_item_id,
@@ -120,10 +233,18 @@ def verify_prescription(
     db: Session = Depends(get_db)
 ):
     """Verify/approve/reject a prescription"""
-    prescription = db.query(Prescription).filter(Prescription.prescription_id == prescription_id).first()
+    prescription = db.query(Prescription).filter(
+        Prescription.prescription_id == prescription_id
+    ).with_for_update().first()
     if not prescription:
         raise HTTPException(status_code=404, detail="Prescription not found")
     
+    if is_claimed_by_other(prescription, current_admin.customer_id):
+        raise HTTPException(
+            status_code=409,
+            detail=f"Prescription is being reviewed by another admin (claimed until {prescription.claim_expires_at})"
+        )
+    
     # if prescription.status != "pending":
     #     raise HTTPException(
     #         status_code=400, 
@@ -135,6 +256,8 @@ def verify_prescription(
     prescription.verified_by = current_admin.customer_id
     prescription.verification_notes = prescription_update.verification_notes
     prescription.verified_at = datetime.now()
+    # Done with it: end the claim (the verifier's own claim is kept for handling-time metrics)
+    end_claim(prescription, current_admin.customer_id)
     
     db.commit()
     
@@ -150,22 +273,21 @@ def get_prescriptions_summary(
     db: Session = Depends(get_db)
 ):
     """Get prescriptions statistics summary"""
-    total_prescriptions = db.query(Prescription).count()
-    pending_prescriptions = db.query(Prescription).filter(Prescription.status == "pending").count()
-    approved_prescriptions = db.query(Prescription).filter(Prescription.status == "approved").count()
-    rejected_prescriptions = db.query(Prescription).filter(Prescription.status == "rejected").count()
-    
-    # Recent prescriptions (last 7 days)
-    week_ago = datetime.now() - timedelta(days=7)
-    recent_prescriptions = db.query(Prescription).filter(
-        Prescription.uploaded_at >= week_ago
-    ).count()
-    
-    return {
-        "total_prescriptions": total_prescriptions,
-        "pending_prescriptions": pending_prescriptions,
-        "approved_prescriptions": approved_prescriptions,
-        "rejected_prescriptions": rejected_prescriptions,
-        "recent_prescriptions_7_days": recent_prescriptions,
-        "approval_rate": round((approved_prescriptions / total_prescriptions * 100), 2) if total_prescriptions > 0 else 0
-    }
\ No newline at end of file
+    return prescriptions_summary(db)
+
+@router.get("/blobs/stats")
+def get_blob_store_stats(
+    current_admin: Customer = Depends(get_current_admin),
+    db: Session = Depends(get_db)
+):
+    """Size, reference counts and deduplication savings of the prescription blob store"""
+    return blob_store_stats(db)
+
+@router.post("/blobs/gc")
+def run_blob_gc(
+    grace_seconds: int = Query(BLOB_GC_GRACE_SECONDS, ge=0),
+    current_admin: Customer = Depends(get_current_admin),
+    db: Session = Depends(get_db)
+):
+    """Delete blobs no prescription references (older than the grace period)"""
+    return collect_garbage(db, grace_seconds=grace_seconds)
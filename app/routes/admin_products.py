@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from sqlalchemy.orm import Session
 from sqlalchemy import func  # Import func from sqlalchemy
 from typing import List, Optional
@@ -6,13 +6,21 @@ from app.database import get_db
 from app.middleware.auth import get_current_admin
 from app.models.models import Product, Category, Customer
 from app.schemas.admin import ProductCreate, ProductUpdate, ProductResponse, ProductWithCategory
+from app.services.catalog_cache import catalog_cache, product_tag, TAG_PRODUCTS
+from app.services.product_search import apply_search, index_product
+from app.services.suggestion_index import suggestion_index
+from app.services.admin_stats import products_summary
+from app.utils.loaders import entity_loader
+from app.utils.pagination import keyset_paginate, offset_paginate
 
 router = APIRouter(prefix="/admin/products", tags=["admin-products"])
 
 @router.get("/", response_model=List[ProductWithCategory])
 def get_products_admin(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
+    cursor: Optional[str] = Query(None),
     category_id: Optional[int] = Query(None),
     search: Optional[str] = Query(None),
     is_active: Optional[bool] = Query(None),
@@ -26,18 +34,23 @@ def get_products_admin(
     if category_id:
         query = query.filter(Product.category_id == category_id)
     if search:
-        query = query.filter(Product.name.ilike(f"%{search}%"))
+        query = apply_search(db, query, search)
     if is_active is not None:
         query = query.filter(Product.is_active == is_active)
     if requires_prescription is not None:
         query = query.filter(Product.requires_prescription == requires_prescription)
     
-    products = query.offset(skip).limit(limit).all()
+    if search:
+        # Relevance order has no column to continue from; the cursor carries an offset
+        products = offset_paginate(query, response, cursor, skip, limit)
+    else:
+        products = keyset_paginate(query, response, Product.product_id, cursor=cursor, skip=skip, limit=limit)
     
-    # Build response with category name
+    # Build response with category name (one query for the whole page)
+    categories = entity_loader(db, Category).get_many([product.category_id for product in products])
     result = []
     for product in products:
-        category = db.query(Category).filter(Category.category_id == product.category_id).first()
+        category = categories.get(product.category_id)
         
         # Create ProductWithCategory manually instead of using from_orm
         product_data = ProductWithCategory(
@@ -73,7 +86,7 @@ def get_product_admin(
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
     
-    category = db.query(Category).filter(Category.category_id == product.category_id).first()
+    category = entity_loader(db, Category).get(product.category_id)
     
     # Create ProductWithCategory manually
     product_data = ProductWithCategory(
@@ -119,8 +132,12 @@ def create_product_admin(
     
     new_product = Product(**product.dict())
     db.add(new_product)
+    db.flush()
+    index_product(db, new_product)
     db.commit()
     db.refresh(new_product)
+    suggestion_index.upsert(new_product)
+    catalog_cache.invalidate(TAG_PRODUCTS, product_tag(new_product.product_id))
     return new_product
 
 @router.put("/{product_id}", response_model=ProductResponse)
@@ -158,8 +175,11 @@ def update_product_admin(
     for field, value in update_data.items():
         setattr(product, field, value)
     
+    index_product(db, product)
     db.commit()
     db.refresh(product)
+    suggestion_index.upsert(product)
+    catalog_cache.invalidate(TAG_PRODUCTS, product_tag(product.product_id))
     return product
 
 @router.delete("/{product_id}")
@@ -176,6 +196,8 @@ def delete_product_admin(
     # Soft delete by setting is_active to False
     product.is_active = False
     db.commit()
+    suggestion_index.upsert(product)
+    catalog_cache.invalidate(TAG_PRODUCTS, product_tag(product.product_id))
     return {"message": "Product deleted successfully"}
 
 @router.patch("/{product_id}/restore")
@@ -191,6 +213,8 @@ def restore_product_admin(
     
     product.is_active = True
     db.commit()
+    suggestion_index.upsert(product)
+    catalog_cache.invalidate(TAG_PRODUCTS, product_tag(product.product_id))
     return {"message": "Product restored successfully"}
 
 @router.get("/stats/summary")
@@ -199,31 +223,4 @@ def get_products_summary(
     db: Session = Depends(get_db)
 ):
     """Get products statistics summary"""
-    total_products = db.query(Product).count()
-    active_products = db.query(Product).filter(Product.is_active == True).count()
-    prescription_products = db.query(Product).filter(Product.requires_prescription == True).count()
-    inactive_products = total_products - active_products
-    
-    # Products by category - FIXED: Use func from sqlalchemy, not db.func
-    categories_stats = db.query(
-        Category.name,
-        Category.category_id,
-        func.count(Product.product_id).label('product_count')  # Use func directly
-    ).join(Product, Category.category_id == Product.category_id)\
-     .group_by(Category.category_id, Category.name)\
-     .all()
-    
-    return {
-        "total_products": total_products,
-        "active_products": active_products,
-        "inactive_products": inactive_products,
-        "prescription_required_products": prescription_products,
-        "categories_distribution": [
-            {
-                "category_id": cat.category_id,
-                "category_name": cat.name,
-                "product_count": cat.product_count
-            }
-            for cat in categories_stats
-        ]
-    }
\ No newline at end of file
+    return products_summary(db)
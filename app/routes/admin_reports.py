@@ -1,85 +1,63 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import FileResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import func, extract
-from typing import Dict, Any, List
-from datetime import datetime, timedelta
+import os
 from app.database import get_db
 from app.middleware.auth import get_current_admin
-from app.models.models import (
-    Order, OrderItem, Product, Category, Customer, 
-    Prescription, PharmacyInventory
+from app.models.models import Customer, ReportJob, ReportJobStatus
+from app.schemas.admin import ReportRequest, SalesReport, ReportJobResponse
+from app.services.sales_rollups import product_sales_rows, PRODUCT_SALES_FIELDS
+from app.services.reports import (
+    sales_report, inventory_report, customer_report, prescription_report,
+    inventory_rows, customer_rows, prescription_rows,
+    INVENTORY_FIELDS, CUSTOMER_FIELDS, PRESCRIPTION_FIELDS
 )
-from app.schemas.admin import ReportRequest, SalesReport
+from app.services.report_jobs import enqueue_report
+from app.services.analytics_snapshot import (
+    analytics_sales_report, analytics_inventory_report, analytics_customer_report,
+    analytics_prescription_report, analytics_snapshot_scheduler, current_manifest, analytics_available
+)
+from app.utils.export import stream_export, EXPORT_FORMAT_PATTERN
 
 router = APIRouter(prefix="/admin/reports", tags=["admin-reports"])
 
+# live: query the database; analytics: answer from the latest Parquet snapshot
+REPORT_MODE_PATTERN = "^(live|analytics)$"
+
+def _check_analytics_format(mode: str, export_format: str) -> bool:
+    if mode != "analytics":
+        return False
+    if export_format != "json":
+        raise HTTPException(status_code=400, detail="Analytics mode only supports the json format")
+    return True
+
 @router.post("/sales", response_model=SalesReport)
 def generate_sales_report(
     report_request: ReportRequest,
+    export_format: str = Query("json", alias="format", pattern=EXPORT_FORMAT_PATTERN),
+    mode: str = Query("live", pattern=REPORT_MODE_PATTERN),
     current_admin: Customer = Depends(get_current_admin),
     db: Session = Depends(get_db)
 ):
-    """Generate sales report with various metrics"""
+    """Generate sales report with various metrics (read from the daily sales rollups)"""
     try:
-        # Base query for orders
-        query = db.query(Order)
+        start_date = report_request.start_date.date() if report_request.start_date else None
+        end_date = report_request.end_date.date() if report_request.end_date else None
         
-        # Apply date filters if provided
-        if report_request.start_date:
-            query = query.filter(Order.order_date >= report_request.start_date)
-        if report_request.end_date:
-            query = query.filter(Order.order_date <= report_request.end_date)
+        if _check_analytics_format(mode, export_format):
+            return SalesReport(**analytics_sales_report(start_date, end_date))
         
-        # Total sales metrics
-        total_sales = db.query(func.sum(Order.final_amount)).scalar() or 0
-        total_orders = query.count()
-        average_order_value = total_sales / total_orders if total_orders > 0 else 0
-        
-        # Top selling products
-        top_products = db.query(
-            Product.name,
-            func.sum(OrderItem.quantity).label('total_quantity'),
-            func.sum(OrderItem.subtotal).label('total_revenue')
-        ).join(OrderItem, Product.product_id == OrderItem.product_id)\
-         .join(Order, OrderItem.order_id == Order.order_id)\
-         .group_by(Product.product_id, Product.name)\
-         .order_by(func.sum(OrderItem.subtotal).desc())\
-         .limit(10)\
-         .all()
-        
-        # Sales by date (last 30 days)
-        thirty_days_ago = datetime.now() - timedelta(days=30)
-        sales_by_date = db.query(
-            func.date(Order.order_date).label('date'),
-            func.count(Order.order_id).label('order_count'),
-            func.sum(Order.final_amount).label('daily_sales')
-        ).filter(Order.order_date >= thirty_days_ago)\
-         .group_by(func.date(Order.order_date))\
-         .order_by(func.date(Order.order_date))\
-         .all()
+        # CSV / NDJSON: stream sales per product per day
+        if export_format != "json":
+            return stream_export(
+                lambda session: product_sales_rows(session, start_date, end_date),
+                PRODUCT_SALES_FIELDS, export_format, "sales_report"
+            )
         
-        return SalesReport(
-            total_sales=float(total_sales),
-            total_orders=total_orders,
-            average_order_value=float(average_order_value),
-            top_products=[
-                {
-                    "product_name": product.name,
-                    "total_quantity": product.total_quantity,
-                    "total_revenue": float(product.total_revenue)
-                }
-                for product in top_products
-            ],
-            sales_by_date=[
-                {
-                    "date": sale_date.date.isoformat(),
-                    "order_count": sale_date.order_count,
-                    "daily_sales": float(sale_date.daily_sales or 0)
-                }
-                for sale_date in sales_by_date
-            ]
-        )
+        return SalesReport(**sales_report(db, start_date, end_date))
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -91,65 +69,27 @@ def generate_inventory_report(
     low_stock_only: bool = Query(False),
     expiring_soon: bool = Query(False),
     days: int = Query(30, ge=1, le=365),
+    export_format: str = Query("json", alias="format", pattern=EXPORT_FORMAT_PATTERN),
+    mode: str = Query("live", pattern=REPORT_MODE_PATTERN),
     current_admin: Customer = Depends(get_current_admin),
     db: Session = Depends(get_db)
 ):
     """Generate inventory report"""
     try:
-        # Base inventory query
-        query = db.query(PharmacyInventory)
-        
-        if low_stock_only:
-            query = query.filter(
-                PharmacyInventory.quantity_in_stock <= PharmacyInventory.low_stock_threshold
-            )
-        
-        if expiring_soon:
-            threshold_date = datetime.now().date() + timedelta(days=days)
-            query = query.filter(
-                PharmacyInventory.expiry_date <= threshold_date,
-                PharmacyInventory.expiry_date >= datetime.now().date()
+        if _check_analytics_format(mode, export_format):
+            return analytics_inventory_report(low_stock_only, expiring_soon, days)
+        
+        # CSV / NDJSON: stream the batches without loading them all
+        if export_format != "json":
+            return stream_export(
+                lambda session: inventory_rows(session, low_stock_only, expiring_soon, days),
+                INVENTORY_FIELDS, export_format, "inventory_report"
             )
         
-        inventory_items = query.all()
-        
-        # Calculate inventory value
-        total_inventory_value = db.query(
-            func.sum(PharmacyInventory.quantity_in_stock * PharmacyInventory.cost_price)
-        ).scalar() or 0
-        
-        # Low stock count
-        low_stock_count = db.query(PharmacyInventory).filter(
-            PharmacyInventory.quantity_in_stock <= PharmacyInventory.low_stock_threshold
-        ).count()
-        
-        # Expired items count
-        expired_count = db.query(PharmacyInventory).filter(
-            PharmacyInventory.expiry_date < datetime.now().date()
-        ).count()
-        
-        return {
-            "total_inventory_items": len(inventory_items),
-            "total_inventory_value": float(total_inventory_value),
-            "low_stock_items": low_stock_count,
-            "expired_items": expired_count,
-            "inventory_details": [
-                {
-                    "inventory_id": item.inventory_id,
-                    "product_id": item.product_id,
-                    "batch_number": item.batch_number,
-                    "quantity_in_stock": item.quantity_in_stock,
-                    "low_stock_threshold": item.low_stock_threshold,
-                    "expiry_date": item.expiry_date.isoformat(),
-                    "cost_price": float(item.cost_price),
-                    "selling_price": float(item.selling_price),
-                    "is_available": item.is_available,
-                    "days_until_expiry": (item.expiry_date - datetime.now().date()).days
-                }
-                for item in inventory_items
-            ]
-        }
+        return inventory_report(db, low_stock_only, expiring_soon, days)
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -158,55 +98,24 @@ def generate_inventory_report(
 
 @router.get("/customers")
 def generate_customer_report(
+    export_format: str = Query("json", alias="format", pattern=EXPORT_FORMAT_PATTERN),
+    mode: str = Query("live", pattern=REPORT_MODE_PATTERN),
     current_admin: Customer = Depends(get_current_admin),
     db: Session = Depends(get_db)
 ):
     """Generate customer analytics report"""
     try:
-        # Customer statistics
-        total_customers = db.query(Customer).filter(Customer.role == "customer").count()
-        
-        # New customers (last 30 days)
-        thirty_days_ago = datetime.now() - timedelta(days=30)
-        new_customers = db.query(Customer).filter(
-            Customer.role == "customer",
-            Customer.created_at >= thirty_days_ago
-        ).count()
+        if _check_analytics_format(mode, export_format):
+            return analytics_customer_report()
         
-        # Customers with orders
-        customers_with_orders = db.query(func.count(func.distinct(Order.customer_id))).scalar()
+        # CSV / NDJSON: stream every customer with their order totals
+        if export_format != "json":
+            return stream_export(customer_rows, CUSTOMER_FIELDS, export_format, "customer_report")
         
-        # Top customers by spending
-        top_customers = db.query(
-            Customer.customer_id,
-            Customer.first_name,
-            Customer.last_name,
-            Customer.email,
-            func.count(Order.order_id).label('order_count'),
-            func.sum(Order.final_amount).label('total_spent')
-        ).join(Order, Customer.customer_id == Order.customer_id)\
-         .group_by(Customer.customer_id, Customer.first_name, Customer.last_name, Customer.email)\
-         .order_by(func.sum(Order.final_amount).desc())\
-         .limit(10)\
-         .all()
-        
-        return {
-            "total_customers": total_customers,
-            "new_customers_30_days": new_customers,
-            "customers_with_orders": customers_with_orders,
-            "customer_engagement_rate": round((customers_with_orders / total_customers * 100), 2) if total_customers > 0 else 0,
-            "top_customers": [
-                {
-                    "customer_id": customer.customer_id,
-                    "name": f"{customer.first_name} {customer.last_name}",
-                    "email": customer.email,
-                    "order_count": customer.order_count,
-                    "total_spent": float(customer.total_spent or 0)
-                }
-                for customer in top_customers
-            ]
-        }
+        return customer_report(db)
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -215,63 +124,132 @@ def generate_customer_report(
 
 @router.get("/prescriptions")
 def generate_prescription_report(
+    export_format: str = Query("json", alias="format", pattern=EXPORT_FORMAT_PATTERN),
+    mode: str = Query("live", pattern=REPORT_MODE_PATTERN),
     current_admin: Customer = Depends(get_current_admin),
     db: Session = Depends(get_db)
 ):
     """Generate prescription analytics report"""
     try:
-        # Prescription statistics
-        total_prescriptions = db.query(Prescription).count()
-        
-        # Status distribution
-        status_counts = db.query(
-            Prescription.status,
-            func.count(Prescription.prescription_id).label('count')
-        ).group_by(Prescription.status).all()
+        if _check_analytics_format(mode, export_format):
+            return analytics_prescription_report()
         
-        # Approval rate
-        approved_count = db.query(Prescription).filter(Prescription.status == "approved").count()
-        approval_rate = round((approved_count / total_prescriptions * 100), 2) if total_prescriptions > 0 else 0
+        # CSV / NDJSON: stream every prescription with its processing time
+        if export_format != "json":
+            return stream_export(prescription_rows, PRESCRIPTION_FIELDS, export_format, "prescription_report")
         
-        # Average processing time (for approved prescriptions)
-        processing_times = db.query(
-            func.avg(
-                func.extract('epoch', Prescription.verified_at - Prescription.uploaded_at) / 3600
-            )
-        ).filter(
-            Prescription.status == "approved",
-            Prescription.verified_at.isnot(None)
-        ).scalar() or 0
-        
-        # Monthly trend (last 6 months)
-        six_months_ago = datetime.now() - timedelta(days=180)
-        monthly_trend = db.query(
-            func.date_trunc('month', Prescription.uploaded_at).label('month'),
-            func.count(Prescription.prescription_id).label('count')
-        ).filter(Prescription.uploaded_at >= six_months_ago)\
-         .group_by(func.date_trunc('month', Prescription.uploaded_at))\
-         .order_by(func.date_trunc('month', Prescription.uploaded_at))\
-         .all()
-        
-        return {
-            "total_prescriptions": total_prescriptions,
-            "approval_rate": approval_rate,
-            "average_processing_hours": round(float(processing_times), 2),
-            "status_distribution": [
-                {"status": status, "count": count}
-                for status, count in status_counts
-            ],
-            "monthly_trend": [
-                {
-                    "month": trend.month.strftime('%Y-%m'),
-                    "prescription_count": trend.count
-                }
-                for trend in monthly_trend
-            ]
-        }
+        return prescription_report(db)
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail=f"Prescription report generation failed: {str(e)}"
-        )
\ No newline at end of file
+        )
+
+
+
+# -------------------------------
+# ANALYTICS SNAPSHOT
+# -------------------------------
+
+@router.get("/analytics/snapshot")
+def get_analytics_snapshot(
+    current_admin: Customer = Depends(get_current_admin)
+):
+    """The Parquet snapshot analytics mode reads from (taken nightly)"""
+    manifest = current_manifest()
+    return {
+        "available": analytics_available(),
+        "snapshot": manifest
+    }
+
+@router.post("/analytics/snapshot", status_code=202)
+def refresh_analytics_snapshot(
+    current_admin: Customer = Depends(get_current_admin)
+):
+    """Take a new snapshot now, in the background"""
+    if not analytics_available():
+        raise HTTPException(status_code=503, detail="Analytics mode requires pyarrow to be installed")
+    
+    analytics_snapshot_scheduler.trigger()
+    return {"message": "Analytics snapshot started", "current": current_manifest()}
+
+# -------------------------------
+# BACKGROUND REPORT JOBS
+# -------------------------------
+
+def _job_response(job: ReportJob) -> ReportJobResponse:
+    return ReportJobResponse(
+        job_id=job.job_id,
+        report_type=job.report_type,
+        params=job.params,
+        status=job.status.value,
+        progress=job.progress,
+        error=job.error,
+        created_at=job.created_at,
+        started_at=job.started_at,
+        completed_at=job.completed_at
+    )
+
+@router.post("/jobs", response_model=ReportJobResponse, status_code=202)
+def create_report_job(
+    report_request: ReportRequest,
+    current_admin: Customer = Depends(get_current_admin),
+    db: Session = Depends(get_db)
+):
+    """
+    Queue a report (sales, inventory, customers or prescriptions) to be
+    computed in the background. Returns the job to poll; an identical
+    request returns the cached or in-flight job while the data is unchanged.
+    """
+    params = dict(report_request.filters or {})
+    params["start_date"] = report_request.start_date
+    params["end_date"] = report_request.end_date
+    
+    try:
+        job = enqueue_report(db, report_request.report_type, params, current_admin.customer_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return _job_response(job)
+
+@router.get("/jobs/{job_id}", response_model=ReportJobResponse)
+def get_report_job(
+    job_id: str,
+    current_admin: Customer = Depends(get_current_admin),
+    db: Session = Depends(get_db)
+):
+    """Status and progress of a report job"""
+    job = db.query(ReportJob).filter(ReportJob.job_id == job_id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Report job not found")
+    
+    return _job_response(job)
+
+@router.get("/jobs/{job_id}/result")
+def get_report_job_result(
+    job_id: str,
+    current_admin: Customer = Depends(get_current_admin),
+    db: Session = Depends(get_db)
+):
+    """Result of a completed report job (JSON)"""
+    job = db.query(ReportJob).filter(ReportJob.job_id == job_id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Report job not found")
+    
+    if job.status != ReportJobStatus.completed:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Report job is {job.status.value}" + (f": {job.error}" if job.error else "")
+        )
+    
+    if not job.result_path or not os.path.exists(job.result_path):
+        raise HTTPException(status_code=410, detail="Report result has been removed; queue the report again")
+    
+    return FileResponse(
+        job.result_path,
+        media_type="application/json",
+        filename=f"{job.report_type}_report_{job.job_id}.json"
+    )
@@ -3,7 +3,7 @@ from sqlalchemy.orm import Session
 from app.database import get_db
 from app.models.models import Customer
 from app.schemas.auth import CustomerCreate, CustomerLogin, Token, UserRole
-from app.utils.security import get_password_hash, verify_password, create_access_token
+from app.utils.security import get_password_hash, verify_and_update_password, create_access_token
 from datetime import timedelta
 
 router = APIRouter(prefix="/auth", tags=["authentication"])
@@ -51,12 +51,24 @@ def register(customer_data: CustomerCreate, db: Session = Depends(get_db)):
 @router.post("/login", response_model=Token)
 def login(login_data: CustomerLogin, db: Session = Depends(get_db)):
     customer = db.query(Customer).filter(Customer.email == login_data.email).first()
-    if not customer or not verify_password(login_data.password, customer.password_hash):
+    if not customer:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password"
         )
     
+    verified, new_hash = verify_and_update_password(login_data.password, customer.password_hash)
+    if not verified:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Incorrect email or password"
+        )
+    
+    # Rehash transparently when the configured bcrypt cost factor has changed
+    if new_hash:
+        customer.password_hash = new_hash
+        db.commit()
+    
     access_token = create_access_token(
         data={"user_id": customer.customer_id, "role": customer.role},
         expires_delta=timedelta(days=7)
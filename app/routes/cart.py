@@ -1,35 +1,36 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import delete, func, select
 from typing import List
-from app.database import get_db
-from app.middleware.auth import get_current_customer as get_current_user
-from app.models.models import CartItem, Product, Customer, PharmacyInventory
+from app.database import get_async_db
+from app.middleware.auth import get_current_customer_async as get_current_user
+from app.models.models import CartItem, Product, Customer
 from app.schemas.cart import CartItemCreate, CartItemUpdate, CartItemResponse, CartItemWithProduct
+from app.services.stock_reservations import available_to_promise, available_to_promise_subquery
 
 router = APIRouter(prefix="/cart", tags=["cart"])
 
 @router.get("/", response_model=List[CartItemWithProduct])
-def get_cart_items(
+async def get_cart_items(
     current_user: Customer = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get cart items for the CURRENT USER ONLY"""
-    cart_items = db.query(CartItem).filter(CartItem.customer_id == current_user.customer_id).all()
-    
-    result = []
-    for item in cart_items:
-        product = db.query(Product).filter(Product.product_id == item.product_id).first()
-        if not product:
-            continue
-            
-        inventory = db.query(PharmacyInventory).filter(
-            PharmacyInventory.product_id == item.product_id,
-            PharmacyInventory.is_available == True
-        ).first()
-        
-        stock_quantity = inventory.quantity_in_stock if inventory else 0
-        
-        result.append(CartItemWithProduct(
+    # Cart items, products and stock summed across batches in a single query
+    stock = available_to_promise_subquery(exclude_customer_id=current_user.customer_id)
+    rows = (await db.execute(
+        select(
+            CartItem,
+            Product,
+            func.coalesce(stock.c.quantity, 0).label('stock_quantity')
+        ).join(Product, Product.product_id == CartItem.product_id)
+         .outerjoin(stock, stock.c.product_id == CartItem.product_id)
+         .where(CartItem.customer_id == current_user.customer_id)
+         .order_by(CartItem.cart_item_id)
+    )).all()
+    
+    return [
+        CartItemWithProduct(
             cart_item_id=item.cart_item_id,
             customer_id=item.customer_id,
             product_id=item.product_id,
@@ -40,81 +41,77 @@ def get_cart_items(
             product_price=float(product.price),
             requires_prescription=product.requires_prescription,
             image_url=product.image_url,
-            stock_quantity=stock_quantity
-        ))
-    
-    return result
+            stock_quantity=int(stock_quantity)
+        )
+        for item, product, stock_quantity in rows
+    ]
 
 @router.get("/summary")
-def get_cart_summary(
+async def get_cart_summary(
     current_user: Customer = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get cart summary for the CURRENT USER ONLY"""
-    cart_items = db.query(CartItem).filter(CartItem.customer_id == current_user.customer_id).all()
-    
-    total_items = 0
-    total_price = 0.0
-    
-    for item in cart_items:
-        product = db.query(Product).filter(Product.product_id == item.product_id).first()
-        if product:
-            total_items += item.quantity
-            total_price += float(product.price) * item.quantity
+    item_count, total_items, total_price = (await db.execute(
+        select(
+            func.count(CartItem.cart_item_id),
+            func.coalesce(func.sum(CartItem.quantity), 0),
+            func.coalesce(func.sum(Product.price * CartItem.quantity), 0)
+        ).join(Product, Product.product_id == CartItem.product_id)
+         .where(CartItem.customer_id == current_user.customer_id)
+    )).one()
     
     return {
-        "total_items": total_items,
-        "total_price": round(total_price, 2),
-        "item_count": len(cart_items)
+        "total_items": int(total_items),
+        "total_price": round(float(total_price), 2),
+        "item_count": item_count
     }
 
 @router.post("/", response_model=CartItemResponse)
-def add_to_cart(
+async def add_to_cart(
     cart_item: CartItemCreate,
     current_user: Customer = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Add item to cart for the CURRENT USER ONLY"""
     # Check if product exists and is active
-    product = db.query(Product).filter(
+    product = await db.scalar(select(Product).where(
         Product.product_id == cart_item.product_id,
         Product.is_active == True
-    ).first()
+    ))
     
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
     
-    # Check inventory stock
-    inventory = db.query(PharmacyInventory).filter(
-        PharmacyInventory.product_id == cart_item.product_id,
-        PharmacyInventory.is_available == True,
-        PharmacyInventory.quantity_in_stock >= cart_item.quantity
-    ).first()
+    # Check stock available to promise (stock minus other customers' holds)
+    available = (await db.run_sync(
+        available_to_promise, [cart_item.product_id], current_user.customer_id
+    ))[cart_item.product_id]
     
-    if not inventory:
+    if available < cart_item.quantity:
         raise HTTPException(
             status_code=400, 
             detail="Product is out of stock or insufficient quantity available"
         )
     
     # Check if item already in cart FOR CURRENT USER
-    existing_item = db.query(CartItem).filter(
+    existing_item = await db.scalar(select(CartItem).where(
         CartItem.customer_id == current_user.customer_id,  # Ensure user-specific
         CartItem.product_id == cart_item.product_id
-    ).first()
+    ))
     
     if existing_item:
         # Check if updated quantity exceeds stock
         new_quantity = existing_item.quantity + cart_item.quantity
-        if new_quantity > inventory.quantity_in_stock:
+        if new_quantity > available:
             raise HTTPException(
                 status_code=400,
-                detail=f"Only {inventory.quantity_in_stock} items available in stock"
+                detail=f"Only {available} items available in stock"
             )
         
         existing_item.quantity = new_quantity
-        db.commit()
-        db.refresh(existing_item)
+        await db.commit()
+        await db.refresh(existing_item)
         return existing_item
     else:
         # Create cart item FOR CURRENT USER ONLY
@@ -124,73 +121,67 @@ def add_to_cart(
             quantity=cart_item.quantity
         )
         db.add(new_item)
-        db.commit()
-        db.refresh(new_item)
+        await db.commit()
+        await db.refresh(new_item)
         return new_item
 
 @router.put("/{cart_item_id}", response_model=CartItemResponse)
-def update_cart_item(
+async def update_cart_item(
     cart_item_id: int,
     cart_item_update: CartItemUpdate,
     current_user: Customer = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update cart item for the CURRENT USER ONLY"""
-    cart_item = db.query(CartItem).filter(
+    cart_item = await db.scalar(select(CartItem).where(
         CartItem.cart_item_id == cart_item_id,
         CartItem.customer_id == current_user.customer_id  # Ensure user owns this cart item
-    ).first()
+    ))
     
     if not cart_item:
         raise HTTPException(status_code=404, detail="Cart item not found")
     
-    # Check inventory stock
-    inventory = db.query(PharmacyInventory).filter(
-        PharmacyInventory.product_id == cart_item.product_id,
-        PharmacyInventory.is_available == True,
-        PharmacyInventory.quantity_in_stock >= cart_item_update.quantity
-    ).first()
+    # Check stock available to promise (stock minus other customers' holds)
+    available = (await db.run_sync(
+        available_to_promise, [cart_item.product_id], current_user.customer_id
+    ))[cart_item.product_id]
     
-    if not inventory:
+    if available < cart_item_update.quantity:
         raise HTTPException(
             status_code=400, 
             detail="Insufficient stock available"
         )
     
     cart_item.quantity = cart_item_update.quantity
-    db.commit()
-    db.refresh(cart_item)
+    await db.commit()
+    await db.refresh(cart_item)
     return cart_item
 
 @router.delete("/{cart_item_id}")
-def remove_from_cart(
+async def remove_from_cart(
     cart_item_id: int,
     current_user: Customer = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Remove item from cart for the CURRENT USER ONLY"""
-    cart_item = db.query(CartItem).filter(
+    cart_item = await db.scalar(select(CartItem).where(
         CartItem.cart_item_id == cart_item_id,
         CartItem.customer_id == current_user.customer_id  # Ensure user owns this cart item
-    ).first()
+    ))
     
     if not cart_item:
         raise HTTPException(status_code=404, detail="Cart item not found")
     
-    db.delete(cart_item)
-    db.commit()
+    await db.delete(cart_item)
+    await db.commit()
     return {"message": "Item removed from cart successfully"}
 
 @router.delete("/")
-def clear_cart(
+async def clear_cart(
     current_user: Customer = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Clear entire cart for the CURRENT USER ONLY"""
-    cart_items = db.query(CartItem).filter(CartItem.customer_id == current_user.customer_id).all()
-    
-    for item in cart_items:
-        db.delete(item)
-    
-    db.commit()
+    await db.execute(delete(CartItem).where(CartItem.customer_id == current_user.customer_id))
+    await db.commit()
     return {"message": "Cart cleared successfully"}
\ No newline at end of file
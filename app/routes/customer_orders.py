@@ -1,30 +1,47 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List, Optional
-from datetime import datetime
-from app.database import get_db
-from app.middleware.auth import get_current_customer
-from app.models.models import Order, OrderItem, Customer, Product, CustomerAddress, CartItem, Prescription, PharmacyInventory
+from datetime import date, datetime
+from app.database import get_db, get_async_db
+from app.middleware.auth import get_current_customer, get_current_customer_async
+from app.models.models import Order, OrderItem, OrderItemBatch, Customer, Product, CustomerAddress, CartItem, Prescription, PharmacyInventory, ReservationStatus
 from app.schemas.orders import OrderResponse, OrderItemResponse, OrderCreate, OrderWithDetails
+from app.services.catalog_cache import catalog_cache, product_tag
+from app.services.checkout_service import load_cart_lines, build_order_lines
+from app.services.sales_rollups import add_order_to_rollups, remove_order_from_rollups
+from app.services.stock_allocator import decrement_stock, restore_stock
+from app.services.stock_projection import refresh_stock_projection
+from app.services.stock_reservations import reserve_cart, release_customer_holds
+from app.utils.loaders import entity_loader
+from app.utils.pagination import keyset_paginate
 
 router = APIRouter(prefix="/customer/orders", tags=["customer-orders"])
 
 @router.get("/", response_model=List[OrderResponse])
-def get_my_orders(
+async def get_my_orders(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
+    cursor: Optional[str] = Query(None),
     status: Optional[str] = Query(None),
-    current_user: Customer = Depends(get_current_customer),
-    db: Session = Depends(get_db)
+    current_user: Customer = Depends(get_current_customer_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get orders for the current customer - CUSTOMER ONLY"""
-    query = db.query(Order).filter(Order.customer_id == current_user.customer_id)
-    
-    if status:
-        query = query.filter(Order.status == status)
+    def load_page(session: Session):
+        query = session.query(Order).filter(Order.customer_id == current_user.customer_id)
+        
+        if status:
+            query = query.filter(Order.status == status)
+        
+        return keyset_paginate(
+            query, response, Order.order_id, Order.order_date, descending=True,
+            cursor=cursor, skip=skip, limit=limit
+        )
     
-    orders = query.order_by(Order.order_date.desc()).offset(skip).limit(limit).all()
-    return orders
+    # Shared keyset pagination helper, run on the async connection
+    return await db.run_sync(load_page)
 
 @router.get("/{order_id}", response_model=OrderWithDetails)
 def get_my_order(
@@ -44,9 +61,10 @@ def get_my_order(
     # Get order items with product details
     order_items = db.query(OrderItem).filter(OrderItem.order_id == order_id).all()
     
+    products = entity_loader(db, Product).get_many([item.product_id for item in order_items])
     items_with_details = []
     for item in order_items:
-        product = db.query(Product).filter(Product.product_id == item.product_id).first()
+        product = products.get(item.product_id)
         items_with_details.append(OrderItemResponse(
             order_item_id=item.order_item_id,
             order_id=item.order_id,
@@ -62,11 +80,7 @@ def get_my_order(
         ))
     
     # Get shipping address if available
-    shipping_address = None
-    if order.shipping_address_id:
-        shipping_address = db.query(CustomerAddress).filter(
-            CustomerAddress.address_id == order.shipping_address_id
-        ).first()
+    shipping_address = entity_loader(db, CustomerAddress).get(order.shipping_address_id)
     
     return OrderWithDetails(
         order_id=order.order_id,
@@ -99,83 +113,20 @@ def create_order(
         
         # Validate shipping address
         if order_data.shipping_address_id:
-            address = db.query(CustomerAddress).filter(
-                CustomerAddress.address_id == order_data.shipping_address_id,
-                CustomerAddress.customer_id == current_user.customer_id
-            ).first()
-            if not address:
+            address = entity_loader(db, CustomerAddress).get(order_data.shipping_address_id)
+            if not address or address.customer_id != current_user.customer_id:
                 raise HTTPException(status_code=400, detail="Invalid shipping address")
             print(f"🔍 DEBUG: Shipping address validated: {address.address_id}")
 
-        # Get cart items for the current user
-        cart_items = db.query(CartItem).filter(CartItem.customer_id == current_user.customer_id).all()
-        print(f"🔍 DEBUG: Found {len(cart_items)} cart items")
+        # Load cart lines with their products in one query
+        cart_lines = load_cart_lines(db, current_user.customer_id)
 
-        if not cart_items:
+        if not cart_lines:
             raise HTTPException(status_code=400, detail="Cart is empty")
 
-        # Check prescription requirements
-        prescription_required_items = []
-        for cart_item in cart_items:
-            product = db.query(Product).filter(Product.product_id == cart_item.product_id).first()
-            if product and product.requires_prescription:
-                print(f"🔍 DEBUG: Product {product.name} requires prescription")
-                # Check if prescription is approved for this customer
-                approved_prescription = db.query(Prescription).filter(
-                    Prescription.customer_id == current_user.customer_id,
-                    Prescription.status == "approved"
-                ).first()
-                
-                if not approved_prescription:
-                    prescription_required_items.append(product.name)
-                    print(f"🔍 DEBUG: No approved prescription found for {product.name}")
-
-        if prescription_required_items:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Prescription required for: {', '.join(prescription_required_items)}. Please upload and get approval first."
-            )
-
-        # Check inventory and calculate totals
-        total_amount = 0.0
-        order_items_data = []
-        
-        for cart_item in cart_items:
-            product = db.query(Product).filter(Product.product_id == cart_item.product_id).first()
-            if not product:
-                raise HTTPException(status_code=400, detail=f"Product not found for cart item {cart_item.cart_item_id}")
-            
-            print(f"🔍 DEBUG: Processing product {product.name}, quantity {cart_item.quantity}")
-            
-            inventory = db.query(PharmacyInventory).filter(
-                PharmacyInventory.product_id == cart_item.product_id,
-                PharmacyInventory.is_available == True
-            ).first()
-            
-            if not inventory:
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"Product {product.name} is out of stock"
-                )
-            
-            if inventory.quantity_in_stock < cart_item.quantity:
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"Only {inventory.quantity_in_stock} items available for {product.name}, but {cart_item.quantity} requested"
-                )
-            
-            item_total = float(product.price) * cart_item.quantity
-            total_amount += item_total
-            
-            order_items_data.append({
-                'product_id': product.product_id,
-                'quantity': cart_item.quantity,
-                'unit_price': float(product.price),
-                'subtotal': item_total,
-                'requires_prescription': product.requires_prescription
-            })
-            
-            print(f"🔍 DEBUG: Added item {product.name} to order data")
+        # Check prescriptions and inventory, and calculate totals
+        order_items_data, allocations = build_order_lines(db, current_user.customer_id, cart_lines)
+        total_amount = sum(item['subtotal'] for item in order_items_data)
 
         # Calculate final amount
         shipping_charges = 50.0  # Fixed shipping for now
@@ -207,39 +158,51 @@ def create_order(
         db.flush()  # Get the order ID without committing
         print(f"🔍 DEBUG: Created order with ID: {new_order.order_id}")
 
-        # Create order items
-        for item_data in order_items_data:
-            order_item = OrderItem(
+        # Create order items along with the batches they were allocated from
+        db.add_all([
+            OrderItem(
                 order_id=new_order.order_id,
                 product_id=item_data['product_id'],
                 quantity=item_data['quantity'],
                 unit_price=item_data['unit_price'],
                 subtotal=item_data['subtotal'],
                 requires_prescription=item_data['requires_prescription'],
-                prescription_verified=not item_data['requires_prescription']  # Auto-verify if no prescription needed
+                prescription_verified=not item_data['requires_prescription'],  # Auto-verify if no prescription needed
+                order_item_batches=[
+                    OrderItemBatch(
+                        inventory_id=batch['inventory_id'],
+                        quantity=batch['quantity'],
+                        unit_price=item_data['unit_price'],
+                        subtotal=item_data['unit_price'] * batch['quantity'],
+                        expiry_date=batch['expiry_date'],
+                        batch_number=batch['batch_number']
+                    )
+                    for batch in item_data['batches']
+                ]
             )
-            db.add(order_item)
-            print(f"🔍 DEBUG: Created order item for product {item_data['product_id']}")
-            
-            # Update inventory
-            inventory = db.query(PharmacyInventory).filter(
-                PharmacyInventory.product_id == item_data['product_id'],
-                PharmacyInventory.is_available == True
-            ).first()
-            if inventory:
-                inventory.quantity_in_stock -= item_data['quantity']
-                print(f"🔍 DEBUG: Updated inventory for product {item_data['product_id']}, new quantity: {inventory.quantity_in_stock}")
-                if inventory.quantity_in_stock <= 0:
-                    inventory.is_available = False
-                    print(f"🔍 DEBUG: Marked product {item_data['product_id']} as out of stock")
+            for item_data in order_items_data
+        ])
+
+        # Update inventory with a single conditional UPDATE
+        decrement_stock(db, allocations)
+        refresh_stock_projection(db, [item_data['product_id'] for item_data in order_items_data])
+
+        # The customer's checkout holds are now fulfilled by this order
+        release_customer_holds(db, current_user.customer_id, ReservationStatus.consumed, order_id=new_order.order_id)
 
         # Clear the cart
         cart_delete_count = db.query(CartItem).filter(CartItem.customer_id == current_user.customer_id).delete()
         print(f"🔍 DEBUG: Cleared {cart_delete_count} cart items")
+
+        # Last before commit, to keep the lock on today's rollup row short
+        add_order_to_rollups(db, new_order)
         
         db.commit()
         print("🔍 DEBUG: Order creation completed successfully")
 
+        # Stock shown on the product pages changed
+        catalog_cache.invalidate(*[product_tag(item_data['product_id']) for item_data in order_items_data])
+
         return {
             "message": "Order created successfully",
             "order_id": new_order.order_id,
@@ -260,6 +223,46 @@ def create_order(
         print(f"❌ ERROR traceback: {traceback.format_exc()}")
         raise HTTPException(status_code=500, detail=f"Order creation failed: {str(e)}")
 
+@router.post("/checkout/reserve")
+def reserve_checkout_stock(
+    current_user: Customer = Depends(get_current_customer),
+    db: Session = Depends(get_db)
+):
+    """Hold stock for the current cart while the customer checks out - CUSTOMER ONLY"""
+    try:
+        holds = reserve_cart(db, current_user.customer_id)
+        db.commit()
+    except HTTPException:
+        db.rollback()
+        raise
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"Stock reservation failed: {str(e)}")
+
+    return {
+        "message": "Stock reserved for checkout",
+        "expires_at": holds[0].expires_at if holds else None,
+        "reservations": [
+            {
+                "reservation_id": hold.reservation_id,
+                "product_id": hold.product_id,
+                "inventory_id": hold.inventory_id,
+                "quantity": hold.quantity
+            }
+            for hold in holds
+        ]
+    }
+
+@router.delete("/checkout/reserve")
+def release_checkout_stock(
+    current_user: Customer = Depends(get_current_customer),
+    db: Session = Depends(get_db)
+):
+    """Release the stock held for the current checkout - CUSTOMER ONLY"""
+    released = release_customer_holds(db, current_user.customer_id)
+    db.commit()
+    return {"message": "Reservation released", "released": released}
+
 @router.post("/{order_id}/cancel")
 def cancel_my_order(
     order_id: int,
@@ -284,24 +287,55 @@ def cancel_my_order(
             detail=f"Cannot cancel order with status: {order.status}"
         )
     
-    # Update order status and restore inventory
-    order.status = "cancelled"
-    order.cancellation_reason = reason
-    order.cancelled_at = datetime.now()
-    order.updated_at = datetime.now()
+    # Cancel with a conditional UPDATE: of two concurrent cancels only one
+    # matches, so stock is restored and the rollups adjusted exactly once
+    now = datetime.now()
+    cancelled = db.query(Order).filter(
+        Order.order_id == order_id,
+        Order.status.in_(cancellable_statuses)
+    ).update({
+        Order.status: "cancelled",
+        Order.cancellation_reason: reason,
+        Order.cancelled_at: now,
+        Order.updated_at: now
+    })
+    if cancelled != 1:
+        db.rollback()
+        raise HTTPException(
+            status_code=409,
+            detail="Order status changed while cancelling. Please refresh and try again."
+        )
     
-    # Restore inventory
-    order_items = db.query(OrderItem).filter(OrderItem.order_id == order_id).all()
-    for item in order_items:
-        inventory = db.query(PharmacyInventory).filter(
-            PharmacyInventory.product_id == item.product_id
-        ).first()
-        if inventory:
-            inventory.quantity_in_stock += item.quantity
-            if not inventory.is_available:
-                inventory.is_available = True
+    # Restore inventory to the batches the order was allocated from
+    allocated_batches = db.query(OrderItemBatch).join(OrderItem).filter(
+        OrderItem.order_id == order_id,
+        OrderItemBatch.inventory_id.isnot(None)
+    ).all()
+
+    if allocated_batches:
+        restored = {}
+        for batch in allocated_batches:
+            restored[batch.inventory_id] = restored.get(batch.inventory_id, 0) + batch.quantity
+        restore_stock(db, restored)
+    else:
+        # Orders placed before batch allocation was recorded
+        order_items = db.query(OrderItem).filter(OrderItem.order_id == order_id).all()
+        for item in order_items:
+            inventory = db.query(PharmacyInventory).filter(
+                PharmacyInventory.product_id == item.product_id
+            ).first()
+            if inventory:
+                inventory.quantity_in_stock += item.quantity
+                if not inventory.is_available and inventory.expiry_date >= date.today():
+                    inventory.is_available = True
     
+    product_ids = {product_id for (product_id,) in db.query(OrderItem.product_id).filter(OrderItem.order_id == order_id)}
+    refresh_stock_projection(db, product_ids)
+    remove_order_from_rollups(db, order)
     db.commit()
+
+    # Stock shown on the product pages changed
+    catalog_cache.invalidate(*[product_tag(product_id) for product_id in product_ids])
     
     return {"message": "Order cancelled successfully"}
 
@@ -324,9 +358,10 @@ def get_my_order_items(
     items = db.query(OrderItem).filter(OrderItem.order_id == order_id).all()
     
     # Add product information to response
+    products = entity_loader(db, Product).get_many([item.product_id for item in items])
     result = []
     for item in items:
-        product = db.query(Product).filter(Product.product_id == item.product_id).first()
+        product = products.get(item.product_id)
         
         item_data = OrderItemResponse(
             order_item_id=item.order_item_id,
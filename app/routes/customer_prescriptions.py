@@ -1,21 +1,124 @@
 # app/routes/customer_prescription.py
 from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form
 from sqlalchemy.orm import Session, joinedload
+from starlette.concurrency import run_in_threadpool
 from typing import List
-import uuid
-import os
 import json
 from datetime import datetime
 from app.database import get_db
 from app.middleware.auth import get_current_customer
 from app.models.models import Prescription, PrescriptionItem, Customer, Product
 from app.schemas.prescriptions import PrescriptionResponse, PrescriptionCreate
+from app.services.blob_store import blob_store, blob_url
+from app.services.prescription_previews import schedule_derivatives
 
 router = APIRouter(prefix="/customer/prescriptions", tags=["customer-prescriptions"])
 
-# Create uploads directory if it doesn't exist
-UPLOAD_DIR = "uploads/prescriptions"
-os.makedirs(UPLOAD_DIR, exist_ok=True)
+# The upload routes are async so files stream to disk, but their queries
+# block: they run on the threadpool, and the read transaction ends before the
+# file is written, so no pooled connection is held across an upload (a pool
+# checkout blocking the event loop would stall every request).
+
+def _parse_product_ids(product_ids: str) -> List[int]:
+    try:
+        return list({int(pid.strip()) for pid in product_ids.split(',')})
+    except ValueError:
+        raise HTTPException(
+            status_code=400,
+            detail="Invalid product IDs format. Use comma-separated numbers: 1,2,3"
+        )
+
+def _release_products(db: Session, products: List[Product]) -> List[Product]:
+    """Detach the validated products and end the read transaction"""
+    db.expunge_all()
+    db.rollback()
+    return products
+
+def _validate_upload_products(db: Session, product_ids_list: List[int]) -> List[Product]:
+    validated_products = []
+    for product_id in product_ids_list:
+        product = db.query(Product).filter(
+            Product.product_id == product_id,
+            Product.is_active == True
+        ).first()
+        
+        if not product:
+            raise HTTPException(
+                status_code=404,
+                detail=f"Product with ID {product_id} not found"
+            )
+        
+        if not product.requires_prescription:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Product '{product.name}' does not require a prescription"
+            )
+        
+        validated_products.append(product)
+    
+    if not validated_products:
+        raise HTTPException(
+            status_code=400,
+            detail="At least one valid product ID is required"
+        )
+    return _release_products(db, validated_products)
+
+def _validate_order_products(db: Session, product_ids_list: List[int]) -> List[Product]:
+    validated_products = []
+    for product_id in product_ids_list:
+        product = db.query(Product).filter(
+            Product.product_id == product_id,
+            Product.is_active == True,
+            Product.requires_prescription == True  # Only prescription-required products
+        ).first()
+        
+        if not product:
+            raise HTTPException(
+                status_code=404,
+                detail=f"Prescription-required product with ID {product_id} not found"
+            )
+        
+        validated_products.append(product)
+    
+    if not validated_products:
+        raise HTTPException(
+            status_code=400,
+            detail="No valid prescription-required products found"
+        )
+    return _release_products(db, validated_products)
+
+def _create_prescription(
+    db: Session, customer_id: int, image_url: str, products: List[Product], blocks_checkout: bool = False
+) -> int:
+    """Create a pending prescription with one item (quantity 1) per product; returns its id"""
+    prescription = Prescription(
+        customer_id=customer_id,
+        image_url=image_url,
+        status="pending",
+        blocks_checkout=blocks_checkout
+    )
+    db.add(prescription)
+    db.flush()
+    prescription_id = prescription.prescription_id
+    
+    for product in products:
+        db.add(PrescriptionItem(
+            prescription_id=prescription_id,
+            product_id=product.product_id,
+            quantity=1
+        ))
+    
+    db.commit()
+    return prescription_id
+
+def _load_prescription(db: Session, prescription_id: int) -> Prescription:
+    return db.query(Prescription).\
+        options(
+            joinedload(Prescription.prescription_items).
+            joinedload(PrescriptionItem.product)
+        ).\
+        filter(Prescription.prescription_id == prescription_id).\
+        first()
 
 @router.get("/", response_model=List[PrescriptionResponse])
 def get_my_prescriptions(
@@ -74,86 +177,18 @@ async def upload_prescription_simple(
         )
     
     try:
-        # Parse comma-separated product IDs
-        try:
-            product_ids_list = [int(pid.strip()) for pid in product_ids.split(',')]
-        except ValueError:
-            raise HTTPException(
-                status_code=400,
-                detail="Invalid product IDs format. Use comma-separated numbers: 1,2,3"
-            )
-        
-        # Remove duplicates
-        product_ids_list = list(set(product_ids_list))
-        
-        # Validate product IDs
-        validated_products = []
-        for product_id in product_ids_list:
-            product = db.query(Product).filter(
-                Product.product_id == product_id,
-                Product.is_active == True
-            ).first()
-            
-            if not product:
-                raise HTTPException(
-                    status_code=404,
-                    detail=f"Product with ID {product_id} not found"
-                )
-            
-            if not product.requires_prescription:
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"Product '{product.name}' does not require a prescription"
-                )
-            
-            validated_products.append(product)
-        
-        if not validated_products:
-            raise HTTPException(
-                status_code=400,
-                detail="At least one valid product ID is required"
-            )
-        
-        # Generate unique filename and save file
-        file_extension = os.path.splitext(image.filename)[1]
-        unique_filename = f"{current_user.customer_id}_{uuid.uuid4()}{file_extension}"
-        file_path = os.path.join(UPLOAD_DIR, unique_filename)
-        
-        with open(file_path, "wb") as buffer:
-            content = await image.read()
-            buffer.write(content)
-        
-        # Create prescription record
-        prescription = Prescription(
-            customer_id=current_user.customer_id,
-            image_url=file_path,
-            status="pending"
+        validated_products = await run_in_threadpool(
+            _validate_upload_products, db, _parse_product_ids(product_ids)
         )
         
-        db.add(prescription)
-        db.flush()
-        
-        # Create prescription items (default quantity: 1)
-        for product in validated_products:
-            prescription_item = PrescriptionItem(
-                prescription_id=prescription.prescription_id,
-                product_id=product.product_id,
-                quantity=1
-            )
-            db.add(prescription_item)
-        
-        db.commit()
+        # Store the file once per distinct content and render its previews in the background
+        stored = await blob_store.put(image)
+        schedule_derivatives(blob_store.local_path(stored.key))
         
-        # Load prescription with relationships
-        prescription_with_items = db.query(Prescription).\
-            options(
-                joinedload(Prescription.prescription_items).
-                joinedload(PrescriptionItem.product)
-            ).\
-            filter(Prescription.prescription_id == prescription.prescription_id).\
-            first()
-        
-        return prescription_with_items
+        prescription_id = await run_in_threadpool(
+            _create_prescription, db, current_user.customer_id, blob_url(stored.key), validated_products
+        )
+        return await run_in_threadpool(_load_prescription, db, prescription_id)
         
     except HTTPException:
         raise
@@ -247,74 +282,25 @@ async def upload_prescription_for_order(
                 detail="Invalid file type. Only JPEG, PNG, and PDF files are allowed."
             )
         
-        # Parse product IDs from cart
-        try:
-            product_ids_list = [int(pid.strip()) for pid in product_ids.split(',')]
-        except ValueError:
-            raise HTTPException(
-                status_code=400,
-                detail="Invalid product IDs format. Use comma-separated numbers: 1,2,3"
-            )
-        
-        # Remove duplicates and validate products
-        product_ids_list = list(set(product_ids_list))
-        validated_products = []
-        
-        for product_id in product_ids_list:
-            product = db.query(Product).filter(
-                Product.product_id == product_id,
-                Product.is_active == True,
-                Product.requires_prescription == True  # Only prescription-required products
-            ).first()
-            
-            if not product:
-                raise HTTPException(
-                    status_code=404,
-                    detail=f"Prescription-required product with ID {product_id} not found"
-                )
-            
-            validated_products.append(product)
-        
-        if not validated_products:
-            raise HTTPException(
-                status_code=400,
-                detail="No valid prescription-required products found"
-            )
-        
-        # Generate unique filename and save file
-        file_extension = os.path.splitext(image.filename)[1]
-        unique_filename = f"{current_user.customer_id}_{uuid.uuid4()}{file_extension}"
-        file_path = os.path.join(UPLOAD_DIR, unique_filename)
-        
-        with open(file_path, "wb") as buffer:
-            content = await image.read()
-            buffer.write(content)
-        
-        # Create prescription record
-        prescription = Prescription(
-            customer_id=current_user.customer_id,
-            image_url=file_path,
-            status="pending"  # Will be verified by admin
+        # Validate the product IDs from the cart
+        validated_products = await run_in_threadpool(
+            _validate_order_products, db, _parse_product_ids(product_ids)
         )
         
-        db.add(prescription)
-        db.flush()
-        
-        # Create prescription items for each product
-        for product in validated_products:
-            prescription_item = PrescriptionItem(
-                prescription_id=prescription.prescription_id,
-                product_id=product.product_id,
-                quantity=1  # Default quantity
-            )
-            db.add(prescription_item)
+        # Store the file once per distinct content and render its previews in the background
+        stored = await blob_store.put(image)
+        schedule_derivatives(blob_store.local_path(stored.key))
         
-        db.commit()
+        # Verified by an admin, ahead of other uploads since it blocks checkout
+        prescription_id = await run_in_threadpool(
+            _create_prescription, db, current_user.customer_id, blob_url(stored.key), validated_products,
+            blocks_checkout=True
+        )
         
         return {
             "message": "Prescription uploaded successfully. Please wait for admin verification before placing order.",
-            "prescription_id": prescription.prescription_id,
-            "status": prescription.status,
+            "prescription_id": prescription_id,
+            "status": "pending",
             "products_covered": [p.name for p in validated_products]
         }
         
@@ -1,11 +1,13 @@
 # app/routes/notifications.py
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
-from app.database import get_db
+from datetime import datetime
+from app.database import get_async_db
 from app.models.models import Customer, Notification
 from app.schemas.notification import NotificationResponse, NotificationPreferences
-from app.middleware.auth import get_current_customer
+from app.middleware.auth import get_current_customer_async as get_current_customer
 
 router = APIRouter(prefix="/notifications", tags=["Customer Notifications"])
 
@@ -15,63 +17,70 @@ async def get_my_notifications(
     limit: int = 50,
     unread_only: bool = False,
     current_customer: Customer = Depends(get_current_customer),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    query = db.query(Notification).filter(
+    query = select(Notification).where(
         Notification.recipient_customer_id == current_customer.customer_id
     )
     
     if unread_only:
-        query = query.filter(Notification.is_read == False)
+        query = query.where(Notification.is_read == False)
     
-    notifications = query.order_by(Notification.created_at.desc()).offset(skip).limit(limit).all()
+    result = await db.execute(query.order_by(Notification.created_at.desc()).offset(skip).limit(limit))
     
-    return notifications
+    return result.scalars().all()
 
 @router.put("/{notification_id}/read")
 async def mark_notification_read(
     notification_id: int,
     current_customer: Customer = Depends(get_current_customer),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    notification = db.query(Notification).filter(
-        Notification.notification_id == notification_id,
-        Notification.recipient_customer_id == current_customer.customer_id
-    ).first()
+    result = await db.execute(
+        update(Notification)
+        .where(
+            Notification.notification_id == notification_id,
+            Notification.recipient_customer_id == current_customer.customer_id
+        )
+        .values(is_read=True, read_at=datetime.now())
+    )
     
-    if not notification:
+    if result.rowcount == 0:
         raise HTTPException(status_code=404, detail="Notification not found")
     
-    notification.is_read = True
-    notification.read_at = datetime.now()
-    
-    db.commit()
+    await db.commit()
     
     return {"message": "Notification marked as read"}
 
 @router.put("/read-all")
 async def mark_all_notifications_read(
     current_customer: Customer = Depends(get_current_customer),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    db.query(Notification).filter(
-        Notification.recipient_customer_id == current_customer.customer_id,
-        Notification.is_read == False
-    ).update({"is_read": True, "read_at": datetime.now()})
+    await db.execute(
+        update(Notification)
+        .where(
+            Notification.recipient_customer_id == current_customer.customer_id,
+            Notification.is_read == False
+        )
+        .values(is_read=True, read_at=datetime.now())
+    )
     
-    db.commit()
+    await db.commit()
     
     return {"message": "All notifications marked as read"}
 
 @router.get("/unread-count")
 async def get_unread_count(
     current_customer: Customer = Depends(get_current_customer),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    count = db.query(Notification).filter(
-        Notification.recipient_customer_id == current_customer.customer_id,
-        Notification.is_read == False
-    ).count()
+    count = await db.scalar(
+        select(func.count(Notification.notification_id)).where(
+            Notification.recipient_customer_id == current_customer.customer_id,
+            Notification.is_read == False
+        )
+    )
     
     return {"unread_count": count}
 
@@ -79,17 +88,18 @@ async def get_unread_count(
 async def delete_notification(
     notification_id: int,
     current_customer: Customer = Depends(get_current_customer),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    notification = db.query(Notification).filter(
-        Notification.notification_id == notification_id,
-        Notification.recipient_customer_id == current_customer.customer_id
-    ).first()
+    result = await db.execute(
+        delete(Notification).where(
+            Notification.notification_id == notification_id,
+            Notification.recipient_customer_id == current_customer.customer_id
+        )
+    )
     
-    if not notification:
+    if result.rowcount == 0:
         raise HTTPException(status_code=404, detail="Notification not found")
     
-    db.delete(notification)
-    db.commit()
+    await db.commit()
     
     return {"message": "Notification deleted successfully"}
\ No newline at end of file
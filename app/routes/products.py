@@ -1,24 +1,41 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List, Optional
-from app.database import get_db
-from app.models.models import Product, Category, PharmacyInventory
+from app.database import get_async_db
+from app.models.models import Product, Category
 from app.schemas.products import ProductResponse, CategoryResponse, ProductDetailResponse
+from app.services.catalog_cache import catalog_cache, product_tag, TAG_CATEGORIES, TAG_PRODUCTS
+from app.services.product_details import load_product_details
+from app.services.product_search import apply_search, suggest_products
+from app.services.suggestion_index import suggestion_index
+from app.utils.pagination import keyset_paginate, offset_paginate
 
 router = APIRouter(prefix="/products", tags=["products"])
 
+# The catalog is served from async handlers. Page builders are plain sync
+# code (shared pagination/search helpers) run on the async connection with
+# AsyncSession.run_sync, so a cache miss never blocks the event loop.
+
+MAX_BATCH_PRODUCTS = 100
+
 @router.get("/categories", response_model=List[CategoryResponse])
-def get_categories(db: Session = Depends(get_db)):
+async def get_categories(request: Request, db: AsyncSession = Depends(get_async_db)):
     """Get all active categories"""
-    return db.query(Category).filter(Category.is_active == True).all()
+    async def build(response: Response):
+        categories = (await db.scalars(select(Category).where(Category.is_active == True))).all()
+        return [CategoryResponse.model_validate(category) for category in categories]
+
+    return await catalog_cache.respond_async(request, "categories", {}, [TAG_CATEGORIES], build)
 
 @router.get("/categories/{category_id}", response_model=CategoryResponse)
-def get_category(category_id: int, db: Session = Depends(get_db)):
+async def get_category(category_id: int, db: AsyncSession = Depends(get_async_db)):
     """Get specific category"""
-    category = db.query(Category).filter(
+    category = await db.scalar(select(Category).where(
         Category.category_id == category_id,
         Category.is_active == True
-    ).first()
+    ))
     
     if not category:
         raise HTTPException(status_code=404, detail="Category not found")
@@ -26,7 +43,8 @@ def get_category(category_id: int, db: Session = Depends(get_db)):
     return category
 
 @router.get("/", response_model=List[ProductResponse])
-def get_products(
+async def get_products(
+    request: Request,
     category_id: Optional[int] = Query(None),
     search: Optional[str] = Query(None),
     requires_prescription: Optional[bool] = Query(None),
@@ -34,96 +52,110 @@ def get_products(
     max_price: Optional[float] = Query(None, ge=0),
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = Query(None),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get products with advanced filtering (next page cursor in X-Next-Cursor)"""
+    params = {
+        "category_id": category_id, "search": search, "requires_prescription": requires_prescription,
+        "min_price": min_price, "max_price": max_price, "skip": skip, "limit": limit, "cursor": cursor
+    }
+
+    def build_page(session: Session, response: Response):
+        query = session.query(Product).filter(Product.is_active == True)
+        
+        if category_id:
+            query = query.filter(Product.category_id == category_id)
+        if search:
+            # Ranked full-text / trigram search, best matches first
+            query = apply_search(session, query, search)
+        if requires_prescription is not None:
+            query = query.filter(Product.requires_prescription == requires_prescription)
+        if min_price is not None:
+            query = query.filter(Product.price >= min_price)
+        if max_price is not None:
+            query = query.filter(Product.price <= max_price)
+        
+        if search:
+            # Relevance order has no column to continue from; the cursor carries an offset
+            products = offset_paginate(query, response, cursor, skip, limit)
+        else:
+            products = keyset_paginate(query, response, Product.product_id, cursor=cursor, skip=skip, limit=limit)
+        return [ProductResponse.model_validate(product) for product in products]
+
+    async def build(response: Response):
+        return await db.run_sync(build_page, response)
+
+    return await catalog_cache.respond_async(request, "products", params, [TAG_PRODUCTS], build)
+
+@router.get("/batch", response_model=List[ProductDetailResponse])
+async def get_products_batch(
+    request: Request,
+    ids: str = Query(..., description="Comma-separated product IDs"),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Get products with advanced filtering"""
-    query = db.query(Product).filter(Product.is_active == True)
+    """Get details of many products in one call (unknown or inactive IDs are skipped)"""
+    try:
+        product_ids = list(dict.fromkeys(int(product_id) for product_id in ids.split(",") if product_id.strip()))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids must be a comma-separated list of integers")
+    if len(product_ids) > MAX_BATCH_PRODUCTS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_PRODUCTS} products per request")
     
-    if category_id:
-        query = query.filter(Product.category_id == category_id)
-    if search:
-        query = query.filter(Product.name.ilike(f"%{search}%"))
-    if requires_prescription is not None:
-        query = query.filter(Product.requires_prescription == requires_prescription)
-    if min_price is not None:
-        query = query.filter(Product.price >= min_price)
-    if max_price is not None:
-        query = query.filter(Product.price <= max_price)
+    async def build(response: Response):
+        details = await db.run_sync(load_product_details, product_ids)
+        return [details[product_id] for product_id in product_ids if product_id in details]
     
-    products = query.offset(skip).limit(limit).all()
-    return products
+    tags = [product_tag(product_id) for product_id in product_ids] + [TAG_CATEGORIES]
+    return await catalog_cache.respond_async(request, "products_batch", {"ids": product_ids}, tags, build)
 
 @router.get("/{product_id}", response_model=ProductDetailResponse)
-def get_product(product_id: int, db: Session = Depends(get_db)):
-    """Get detailed product information with inventory"""
-    product = db.query(Product).filter(
-        Product.product_id == product_id,
-        Product.is_active == True
-    ).first()
-    
-    if not product:
-        raise HTTPException(status_code=404, detail="Product not found")
-    
-    # Get inventory information
-    inventory = db.query(PharmacyInventory).filter(
-        PharmacyInventory.product_id == product_id,
-        PharmacyInventory.is_available == True,
-        PharmacyInventory.quantity_in_stock > 0
-    ).first()
-    
-    # Get category name
-    category = db.query(Category).filter(Category.category_id == product.category_id).first()
+async def get_product(product_id: int, request: Request, db: AsyncSession = Depends(get_async_db)):
+    """Get detailed product information with stock across all batches"""
+    async def build(response: Response):
+        detail = (await db.run_sync(load_product_details, [product_id])).get(product_id)
+        if not detail:
+            raise HTTPException(status_code=404, detail="Product not found")
+        return detail
     
-    return ProductDetailResponse(
-        product_id=product.product_id,
-        name=product.name,
-        description=product.description,
-        sku=product.sku,
-        category_id=product.category_id,
-        category_name=category.name if category else "Unknown",
-        manufacturer=product.manufacturer,
-        requires_prescription=product.requires_prescription,
-        hsn_code=float(product.hsn_code),
-        gst_rate=float(product.gst_rate),
-        price=float(product.price),
-        cost_price=float(product.cost_price),
-        image_url=product.image_url,
-        is_active=product.is_active,
-        created_at=product.created_at,
-        updated_at=product.updated_at,
-        in_stock=inventory.quantity_in_stock if inventory else 0,
-        stock_quantity=inventory.quantity_in_stock if inventory else 0,
-        low_stock=inventory.quantity_in_stock <= inventory.low_stock_threshold if inventory else False
+    return await catalog_cache.respond_async(
+        request, "product", {"product_id": product_id}, [product_tag(product_id), TAG_CATEGORIES], build
     )
 
 @router.get("/featured/products")
-def get_featured_products(
+async def get_featured_products(
+    request: Request,
     limit: int = Query(10, ge=1, le=20),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get featured products (could be based on sales, ratings, etc.)"""
-    # For now, return recent products with stock
-    featured_products = db.query(Product).filter(
-        Product.is_active == True
-    ).order_by(Product.created_at.desc()).limit(limit).all()
-    
-    return featured_products
+    async def build(response: Response):
+        # For now, return recent products with stock
+        return (await db.scalars(
+            select(Product).where(Product.is_active == True).order_by(Product.created_at.desc()).limit(limit)
+        )).all()
+
+    return await catalog_cache.respond_async(request, "featured", {"limit": limit}, [TAG_PRODUCTS], build)
 
 @router.get("/search/suggestions")
-def get_search_suggestions(
+async def get_search_suggestions(
     q: str = Query(..., min_length=2),
     limit: int = Query(5, ge=1, le=10),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get search suggestions for autocomplete"""
     if len(q) < 2:
         return []
     
-    suggestions = db.query(Product).filter(
-        Product.is_active == True,
-        Product.name.ilike(f"%{q}%")
-    ).limit(limit).all()
+    if not suggestion_index.is_fresh():
+        await db.run_sync(suggestion_index.build)
+    
+    # Served from the in-memory prefix index without touching the database
+    suggestions = suggestion_index.lookup(q, limit)
+    if suggestions:
+        return suggestions
     
+    # No prefix match: fall back to typo-tolerant search
     return [
         {
             "product_id": product.product_id,
@@ -131,5 +163,5 @@ def get_search_suggestions(
             "image_url": product.image_url,
             "price": float(product.price)
         }
-        for product in suggestions
+        for product in await db.run_sync(suggest_products, q, limit)
     ]
\ No newline at end of file
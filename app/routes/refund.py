@@ -1,12 +1,14 @@
 # app/routes/refunds.py
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 from datetime import datetime
-from app.database import get_db
+from app.database import get_async_db
 from app.models.models import Customer, Order, Refund, Payment, RefundPolicy, RefundStatus
 from app.schemas.refund import RefundRequest, RefundResponse
-from app.middleware.auth import get_current_customer
+from app.middleware.auth import get_current_customer_async as get_current_customer
+from app.services.notification_service import NotificationService
 from app.utils.refund_calculator import calculate_refund_amount, determine_refund_policy
 
 router = APIRouter(prefix="/refunds", tags=["Customer Refunds"])
@@ -16,13 +18,13 @@ router = APIRouter(prefix="/refunds", tags=["Customer Refunds"])
 async def request_refund(
     refund_request: RefundRequest,
     current_customer: Customer = Depends(get_current_customer),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     # Verify order belongs to customer
-    order = db.query(Order).filter(
+    order = await db.scalar(select(Order).where(
         Order.order_id == refund_request.order_id,
         Order.customer_id == current_customer.customer_id
-    ).first()
+    ))
     
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
@@ -36,7 +38,7 @@ async def request_refund(
         )
     
     # Check if refund already exists
-    existing_refund = db.query(Refund).filter(Refund.order_id == refund_request.order_id).first()
+    existing_refund = await db.scalar(select(Refund).where(Refund.order_id == refund_request.order_id))
     if existing_refund:
         raise HTTPException(status_code=400, detail="Refund already requested for this order")
     
@@ -55,22 +57,26 @@ async def request_refund(
     )
     
     db.add(refund)
-    db.commit()
-    db.refresh(refund)
+    await db.flush()
     
-    await create_refund_notification(refund, db)
+    # Notify in the same transaction as the refund itself
+    db.add(NotificationService.build_refund_notification(refund, order.customer_id))
+    await db.commit()
+    await db.refresh(refund)
     
     return refund
 
 @router.get("/my-refunds", response_model=List[RefundResponse])
 async def get_my_refunds(
     current_customer: Customer = Depends(get_current_customer),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     # Get all refunds for customer's orders
-    refunds = db.query(Refund).join(Order).filter(
-        Order.customer_id == current_customer.customer_id
-    ).order_by(Refund.created_at.desc()).all()
+    refunds = (await db.scalars(
+        select(Refund).join(Order).where(
+            Order.customer_id == current_customer.customer_id
+        ).order_by(Refund.created_at.desc())
+    )).all()
     
     return refunds
 
@@ -78,12 +84,14 @@ async def get_my_refunds(
 async def get_refund_details(
     refund_id: int,
     current_customer: Customer = Depends(get_current_customer),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    refund = db.query(Refund).join(Order).filter(
-        Refund.refund_id == refund_id,
-        Order.customer_id == current_customer.customer_id
-    ).first()
+    refund = await db.scalar(
+        select(Refund).join(Order).where(
+            Refund.refund_id == refund_id,
+            Order.customer_id == current_customer.customer_id
+        )
+    )
     
     if not refund:
         raise HTTPException(status_code=404, detail="Refund not found")
@@ -2,10 +2,11 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from typing import List
 from app.database import get_db
-from app.middleware.auth import get_current_user
+from app.middleware.auth import get_current_user, get_current_user_record
 from app.models.models import Customer, CustomerAddress
 from app.schemas.users import CustomerResponse, CustomerProfileUpdate, AddressResponse, AddressCreate, AddressUpdate
 from app.utils.security import get_password_hash, verify_password
+from app.utils.principal_cache import principal_cache
 
 router = APIRouter(prefix="/users", tags=["users"])
 
@@ -17,7 +18,7 @@ def get_profile(current_user: Customer = Depends(get_current_user)):
 @router.put("/profile", response_model=CustomerResponse)
 def update_profile(
     profile_update: CustomerProfileUpdate,
-    current_user: Customer = Depends(get_current_user),
+    current_user: Customer = Depends(get_current_user_record),
     db: Session = Depends(get_db)
 ):
     update_data = profile_update.dict(exclude_unset=True)
@@ -26,6 +27,7 @@ def update_profile(
         setattr(current_user, field, value)
     
     db.commit()
+    principal_cache.invalidate(current_user.customer_id)
     db.refresh(current_user)
     return current_user
 
@@ -33,7 +35,7 @@ def update_profile(
 def change_password(
     current_password: str,
     new_password: str,
-    current_user: Customer = Depends(get_current_user),
+    current_user: Customer = Depends(get_current_user_record),
     db: Session = Depends(get_db)
 ):
     """Change user password"""
@@ -47,6 +49,7 @@ def change_password(
     # Update to new password
     current_user.password_hash = get_password_hash(new_password)
     db.commit()
+    principal_cache.invalidate(current_user.customer_id)
     
     return {"message": "Password updated successfully"}
 
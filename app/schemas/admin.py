@@ -128,6 +128,10 @@ class PrescriptionResponse(PrescriptionBase):
 class PrescriptionWithCustomer(PrescriptionResponse):
     customer_name: str
     customer_email: str
+    # Served by GET /admin/prescriptions/{id}/file/{variant}
+    file_url: Optional[str] = None
+    thumbnail_url: Optional[str] = None
+    preview_url: Optional[str] = None
     
     model_config = ConfigDict(from_attributes=True)
 
@@ -248,4 +252,18 @@ class SalesReport(BaseModel):
     total_orders: int
     average_order_value: float
     top_products: List[Dict[str, Any]]
-    sales_by_date: List[Dict[str, Any]]
\ No newline at end of file
+    sales_by_date: List[Dict[str, Any]]
+    sales_by_category: List[Dict[str, Any]] = []
+
+class ReportJobResponse(BaseModel):
+    job_id: str
+    report_type: str
+    params: Dict[str, Any]
+    status: str
+    progress: int
+    error: Optional[str] = None
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
+
+    model_config = ConfigDict(from_attributes=True)
@@ -1,6 +1,6 @@
 from pydantic import BaseModel
 from typing import Optional, List
-from datetime import datetime
+from datetime import date, datetime
 
 class CategoryBase(BaseModel):
     name: str
@@ -48,6 +48,7 @@ class ProductDetailResponse(ProductResponse):
     in_stock: int
     stock_quantity: int
     low_stock: bool
+    nearest_expiry: Optional[date] = None
 
     class Config:
         from_attributes = True
\ No newline at end of file
@@ -0,0 +1,176 @@
+# app/services/admin_stats.py
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from app.database import SessionLocal
+from app.models.models import Order, PharmacyInventory, Product, Category, Prescription, Notification
+from config import ADMIN_DASHBOARD_CACHE_SECONDS
+
+# Each summary below reads its table in a single scan, using conditional
+# aggregates (COUNT(*) FILTER (WHERE ...)) instead of one COUNT per figure.
+
+
+def _count_where(condition):
+    return func.count().filter(condition)
+
+
+def _week_ago() -> datetime:
+    return datetime.now() - timedelta(days=7)
+
+
+def orders_summary(db: Session) -> Dict[str, Any]:
+    today_start = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    rows = db.query(
+        Order.status,
+        func.count().label('count'),
+        _count_where(Order.order_date >= _week_ago()).label('recent'),
+        _count_where(Order.order_date >= today_start).label('today'),
+        func.sum(Order.final_amount).label('revenue')
+    ).group_by(Order.status).all()
+
+    return {
+        "total_orders": sum(row.count for row in rows),
+        "recent_orders_7_days": sum(row.recent for row in rows),
+        "today_orders": sum(row.today for row in rows),
+        "total_revenue": float(sum(row.revenue or 0 for row in rows)),
+        "status_distribution": [
+            {"status": row.status, "count": row.count}
+            for row in rows
+        ]
+    }
+
+
+def inventory_summary(db: Session) -> Dict[str, Any]:
+    row = db.query(
+        func.count().label('total'),
+        _count_where(PharmacyInventory.is_available == True).label('available'),
+        _count_where(
+            (PharmacyInventory.quantity_in_stock <= PharmacyInventory.low_stock_threshold) &
+            (PharmacyInventory.is_available == True)
+        ).label('low_stock'),
+        _count_where(PharmacyInventory.expiry_date < datetime.now().date()).label('expired'),
+        func.sum(PharmacyInventory.quantity_in_stock * PharmacyInventory.cost_price).label('stock_value')
+    ).one()
+
+    return {
+        "total_inventory_items": row.total,
+        "available_items": row.available,
+        "low_stock_items": row.low_stock,
+        "expired_items": row.expired,
+        "total_stock_value": float(row.stock_value or 0)
+    }
+
+
+def products_summary(db: Session) -> Dict[str, Any]:
+    rows = db.query(
+        Product.category_id,
+        Category.name,
+        func.count().label('count'),
+        _count_where(Product.is_active == True).label('active'),
+        _count_where(Product.requires_prescription == True).label('prescription')
+    ).outerjoin(Category, Category.category_id == Product.category_id)\
+     .group_by(Product.category_id, Category.name)\
+     .all()
+
+    total_products = sum(row.count for row in rows)
+    active_products = sum(row.active for row in rows)
+    return {
+        "total_products": total_products,
+        "active_products": active_products,
+        "inactive_products": total_products - active_products,
+        "prescription_required_products": sum(row.prescription for row in rows),
+        "categories_distribution": [
+            {
+                "category_id": row.category_id,
+                "category_name": row.name,
+                "product_count": row.count
+            }
+            for row in rows if row.name is not None
+        ]
+    }
+
+
+def prescriptions_summary(db: Session) -> Dict[str, Any]:
+    row = db.query(
+        func.count().label('total'),
+        _count_where(Prescription.status == "pending").label('pending'),
+        _count_where(Prescription.status == "approved").label('approved'),
+        _count_where(Prescription.status == "rejected").label('rejected'),
+        _count_where(Prescription.uploaded_at >= _week_ago()).label('recent')
+    ).select_from(Prescription).one()
+
+    return {
+        "total_prescriptions": row.total,
+        "pending_prescriptions": row.pending,
+        "approved_prescriptions": row.approved,
+        "rejected_prescriptions": row.rejected,
+        "recent_prescriptions_7_days": row.recent,
+        "approval_rate": round((row.approved / row.total * 100), 2) if row.total > 0 else 0
+    }
+
+
+def notifications_summary(db: Session) -> Dict[str, Any]:
+    rows = db.query(
+        Notification.type,
+        func.count().label('count'),
+        _count_where(Notification.is_read == False).label('unread'),
+        _count_where(Notification.created_at >= _week_ago()).label('recent')
+    ).group_by(Notification.type).all()
+
+    total_notifications = sum(row.count for row in rows)
+    unread_notifications = sum(row.unread for row in rows)
+    return {
+        "total_notifications": total_notifications,
+        "unread_notifications": unread_notifications,
+        "read_notifications": total_notifications - unread_notifications,
+        "recent_notifications_7_days": sum(row.recent for row in rows),
+        "type_distribution": [
+            {"type": row.type, "count": row.count}
+            for row in rows
+        ]
+    }
+
+
+DASHBOARD_SECTIONS = {
+    "orders": orders_summary,
+    "inventory": inventory_summary,
+    "products": products_summary,
+    "prescriptions": prescriptions_summary,
+    "notifications": notifications_summary,
+}
+
+_executor = ThreadPoolExecutor(max_workers=len(DASHBOARD_SECTIONS), thread_name_prefix="admin-dashboard")
+_cache_lock = threading.Lock()
+_cached: Optional[tuple] = None  # (expires_at, dashboard)
+
+
+def _run_in_own_session(summary) -> Dict[str, Any]:
+    db = SessionLocal()
+    try:
+        return summary(db)
+    finally:
+        db.close()
+
+
+def dashboard_summary() -> Dict[str, Any]:
+    """
+    Every summary at once. Sections run concurrently, each on its own
+    connection, and the result is reused for ADMIN_DASHBOARD_CACHE_SECONDS.
+    """
+    global _cached
+    with _cache_lock:
+        if _cached and _cached[0] > time.monotonic():
+            return _cached[1]
+
+        futures = {
+            name: _executor.submit(_run_in_own_session, summary)
+            for name, summary in DASHBOARD_SECTIONS.items()
+        }
+        dashboard = {name: future.result() for name, future in futures.items()}
+        dashboard["generated_at"] = datetime.now()
+        _cached = (time.monotonic() + ADMIN_DASHBOARD_CACHE_SECONDS, dashboard)
+        return dashboard
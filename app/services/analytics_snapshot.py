@@ -0,0 +1,520 @@
+# app/services/analytics_snapshot.py
+import json
+import os
+import shutil
+import threading
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from enum import Enum
+from typing import Any, Dict, List, Optional
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+from app.database import SessionLocal
+from app.models.models import Order, OrderItem, Product, Category, Customer, Prescription, PharmacyInventory
+from app.utils.export import iter_query
+from config import (
+    ANALYTICS_SNAPSHOT_DIR, ANALYTICS_SNAPSHOT_HOUR, ANALYTICS_SNAPSHOT_KEEP, ANALYTICS_SNAPSHOT_BATCH_ROWS
+)
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:  # analytics mode is optional
+    pa = None
+
+# Columnar copy of the reporting tables, so analytics reports do not run
+# against the live database. Each extraction writes a new run directory:
+#
+#   ANALYTICS_SNAPSHOT_DIR/<run_id>/orders/date=YYYY-MM-DD/part-0.parquet
+#   ANALYTICS_SNAPSHOT_DIR/<run_id>/order_items/date=.../   (by order date)
+#   ANALYTICS_SNAPSHOT_DIR/<run_id>/prescriptions/date=.../ (by upload date)
+#   ANALYTICS_SNAPSHOT_DIR/<run_id>/pharmacy_inventory/part-0.parquet
+#   ANALYTICS_SNAPSHOT_DIR/<run_id>/customers/part-0.parquet
+#
+# and then points ANALYTICS_SNAPSHOT_DIR/CURRENT at it, so readers never see
+# a half-written snapshot.
+
+CURRENT_FILE = "CURRENT"
+MANIFEST_FILE = "_manifest.json"
+CANCELLED = "cancelled"
+
+
+def analytics_available() -> bool:
+    return pa is not None
+
+
+def _require_pyarrow() -> None:
+    if pa is None:
+        raise HTTPException(status_code=503, detail="Analytics mode requires pyarrow to be installed")
+
+
+# -------------------------------
+# EXTRACTION
+# -------------------------------
+
+def _tables() -> Dict[str, dict]:
+    """Extracted tables: query, arrow schema and the column they are partitioned by"""
+    return {
+        "orders": {
+            "query": lambda db: db.query(
+                Order.order_id, Order.customer_id, Order.order_date, Order.status, Order.final_amount
+            ).order_by(Order.order_date, Order.order_id),
+            "schema": pa.schema([
+                ("order_id", pa.int64()), ("customer_id", pa.int64()), ("order_date", pa.timestamp("us")),
+                ("status", pa.string()), ("final_amount", pa.float64())
+            ]),
+            "partition": lambda row: row.order_date,
+        },
+        "order_items": {
+            "query": lambda db: db.query(
+                OrderItem.order_item_id, OrderItem.order_id, Order.customer_id, Order.order_date,
+                Order.status.label("order_status"), OrderItem.product_id, Product.name.label("product_name"),
+                Product.category_id, Category.name.label("category_name"), OrderItem.quantity, OrderItem.subtotal
+            ).join(Order, Order.order_id == OrderItem.order_id)
+             .join(Product, Product.product_id == OrderItem.product_id)
+             .outerjoin(Category, Category.category_id == Product.category_id)
+             .order_by(Order.order_date, OrderItem.order_item_id),
+            "schema": pa.schema([
+                ("order_item_id", pa.int64()), ("order_id", pa.int64()), ("customer_id", pa.int64()),
+                ("order_date", pa.timestamp("us")), ("order_status", pa.string()), ("product_id", pa.int64()),
+                ("product_name", pa.string()), ("category_id", pa.int64()), ("category_name", pa.string()),
+                ("quantity", pa.int64()), ("subtotal", pa.float64())
+            ]),
+            "partition": lambda row: row.order_date,
+        },
+        "prescriptions": {
+            "query": lambda db: db.query(
+                Prescription.prescription_id, Prescription.customer_id, Prescription.status,
+                Prescription.uploaded_at, Prescription.verified_at
+            ).order_by(Prescription.uploaded_at, Prescription.prescription_id),
+            "schema": pa.schema([
+                ("prescription_id", pa.int64()), ("customer_id", pa.int64()), ("status", pa.string()),
+                ("uploaded_at", pa.timestamp("us")), ("verified_at", pa.timestamp("us"))
+            ]),
+            "partition": lambda row: row.uploaded_at,
+        },
+        "pharmacy_inventory": {
+            "query": lambda db: db.query(
+                PharmacyInventory.inventory_id, PharmacyInventory.product_id, PharmacyInventory.batch_number,
+                PharmacyInventory.quantity_in_stock, PharmacyInventory.low_stock_threshold,
+                PharmacyInventory.expiry_date, PharmacyInventory.cost_price, PharmacyInventory.selling_price,
+                PharmacyInventory.is_available
+            ).order_by(PharmacyInventory.inventory_id),
+            "schema": pa.schema([
+                ("inventory_id", pa.int64()), ("product_id", pa.int64()), ("batch_number", pa.string()),
+                ("quantity_in_stock", pa.int64()), ("low_stock_threshold", pa.int64()),
+                ("expiry_date", pa.date32()), ("cost_price", pa.float64()), ("selling_price", pa.float64()),
+                ("is_available", pa.bool_())
+            ]),
+            "partition": None,
+        },
+        "customers": {
+            "query": lambda db: db.query(
+                Customer.customer_id, Customer.first_name, Customer.last_name, Customer.email,
+                Customer.role, Customer.created_at
+            ).order_by(Customer.customer_id),
+            "schema": pa.schema([
+                ("customer_id", pa.int64()), ("first_name", pa.string()), ("last_name", pa.string()),
+                ("email", pa.string()), ("role", pa.string()), ("created_at", pa.timestamp("us"))
+            ]),
+            "partition": None,
+        },
+    }
+
+
+def _row_values(row, schema) -> Dict[str, Any]:
+    values = {}
+    for field in schema:
+        value = getattr(row, field.name)
+        if isinstance(value, Enum):
+            value = value.value
+        elif isinstance(value, Decimal):
+            value = float(value)
+        values[field.name] = value
+    return values
+
+
+def _extract_table(db: Session, table_dir: str, spec: dict) -> int:
+    """
+    Stream one table into Parquet, one file per date partition. Rows arrive
+    ordered by the partition column, so only one writer is open at a time
+    and at most ANALYTICS_SNAPSHOT_BATCH_ROWS rows are held in memory.
+    """
+    schema, partition_of = spec["schema"], spec["partition"]
+    writer, current, buffer, count = None, None, [], 0
+
+    def flush():
+        if buffer:
+            writer.write_batch(pa.RecordBatch.from_pylist(buffer, schema=schema))
+            buffer.clear()
+
+    try:
+        for row in iter_query(spec["query"](db), ANALYTICS_SNAPSHOT_BATCH_ROWS):
+            partition = None
+            if partition_of:
+                partition = (partition_of(row) or datetime.min).date().isoformat()
+            if writer is None or partition != current:
+                if writer is not None:
+                    flush()
+                    writer.close()
+                directory = os.path.join(table_dir, f"date={partition}") if partition_of else table_dir
+                os.makedirs(directory, exist_ok=True)
+                writer = pq.ParquetWriter(os.path.join(directory, "part-0.parquet"), schema)
+                current = partition
+
+            buffer.append(_row_values(row, schema))
+            count += 1
+            if len(buffer) >= ANALYTICS_SNAPSHOT_BATCH_ROWS:
+                flush()
+        if writer is not None:
+            flush()
+    finally:
+        if writer is not None:
+            writer.close()
+    return count
+
+
+_extract_lock = threading.Lock()
+
+
+def extract_snapshot(db: Session) -> Optional[Dict[str, Any]]:
+    """
+    Write a new snapshot of the reporting tables and make it current.
+    Returns its manifest, or None when another extraction is running.
+    """
+    _require_pyarrow()
+    if not _extract_lock.acquire(blocking=False):
+        return None
+    try:
+        started_at = datetime.now()
+        run_id = started_at.strftime("%Y%m%dT%H%M%S%f")
+        run_dir = os.path.join(ANALYTICS_SNAPSHOT_DIR, run_id)
+
+        os.makedirs(run_dir, exist_ok=True)
+        try:
+            row_counts = {
+                name: _extract_table(db, os.path.join(run_dir, name), spec)
+                for name, spec in _tables().items()
+            }
+        except Exception:
+            shutil.rmtree(run_dir, ignore_errors=True)
+            raise
+        finally:
+            db.rollback()
+
+        manifest = {
+            "run_id": run_id,
+            "started_at": started_at.isoformat(),
+            "completed_at": datetime.now().isoformat(),
+            "row_counts": row_counts
+        }
+        with open(os.path.join(run_dir, MANIFEST_FILE), "w") as f:
+            json.dump(manifest, f)
+
+        # Switch readers over atomically, then drop the oldest runs
+        pointer = os.path.join(ANALYTICS_SNAPSHOT_DIR, CURRENT_FILE)
+        with open(f"{pointer}.tmp", "w") as f:
+            f.write(run_id)
+        os.replace(f"{pointer}.tmp", pointer)
+        _prune_runs(run_id)
+
+        print(f"✅ Analytics snapshot {run_id} written: {row_counts}")
+        return manifest
+    finally:
+        _extract_lock.release()
+
+
+def _prune_runs(current_run: str) -> None:
+    runs = sorted(
+        entry for entry in os.listdir(ANALYTICS_SNAPSHOT_DIR)
+        if os.path.isfile(os.path.join(ANALYTICS_SNAPSHOT_DIR, entry, MANIFEST_FILE))
+    )
+    for run_id in runs[:-ANALYTICS_SNAPSHOT_KEEP]:
+        if run_id != current_run:
+            shutil.rmtree(os.path.join(ANALYTICS_SNAPSHOT_DIR, run_id), ignore_errors=True)
+
+
+def current_manifest() -> Optional[Dict[str, Any]]:
+    """Manifest of the snapshot reports read from, or None if there is none yet"""
+    try:
+        with open(os.path.join(ANALYTICS_SNAPSHOT_DIR, CURRENT_FILE)) as f:
+            run_id = f.read().strip()
+        with open(os.path.join(ANALYTICS_SNAPSHOT_DIR, run_id, MANIFEST_FILE)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+class AnalyticsSnapshotScheduler:
+    """Background thread that extracts a snapshot every night at ANALYTICS_SNAPSHOT_HOUR"""
+
+    def __init__(self, hour: int = ANALYTICS_SNAPSHOT_HOUR):
+        self.hour = hour
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if pa is None or (self._thread and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="analytics-snapshot", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def extract_once(self) -> Optional[Dict[str, Any]]:
+        db = SessionLocal()
+        try:
+            return extract_snapshot(db)
+        except Exception as e:
+            print(f"❌ ERROR extracting analytics snapshot: {str(e)}")
+            return None
+        finally:
+            db.close()
+
+    def trigger(self) -> None:
+        """Extract a snapshot now, off the calling thread"""
+        threading.Thread(target=self.extract_once, name="analytics-snapshot-now", daemon=True).start()
+
+    def _seconds_until_next_run(self) -> float:
+        now = datetime.now()
+        next_run = datetime.combine(now.date(), time(hour=self.hour))
+        if next_run <= now:
+            next_run += timedelta(days=1)
+        return (next_run - now).total_seconds()
+
+    def _run(self):
+        # Take a first snapshot right away if there is none yet
+        if current_manifest() is None:
+            self.extract_once()
+        while not self._stop.wait(self._seconds_until_next_run()):
+            self.extract_once()
+
+
+analytics_snapshot_scheduler = AnalyticsSnapshotScheduler()
+
+
+# -------------------------------
+# READING
+# -------------------------------
+
+def _load(name: str, filter=None, columns: Optional[List[str]] = None) -> "pa.Table":
+    _require_pyarrow()
+    manifest = current_manifest()
+    if manifest is None:
+        raise HTTPException(status_code=503, detail="No analytics snapshot has been taken yet")
+
+    spec = _tables()[name]
+    path = os.path.join(ANALYTICS_SNAPSHOT_DIR, manifest["run_id"], name)
+    schema = spec["schema"]
+    if spec["partition"]:
+        schema = schema.append(pa.field("date", pa.string()))
+    if not os.path.isdir(path):
+        # Nothing was extracted for this table
+        return schema.empty_table().select(columns) if columns else schema.empty_table()
+
+    partitioning = ds.partitioning(pa.schema([("date", pa.string())]), flavor="hive") if spec["partition"] else None
+    dataset = ds.dataset(path, schema=schema, format="parquet", partitioning=partitioning)
+    return dataset.to_table(columns=columns, filter=filter)
+
+
+def _date_filter(start_date: Optional[date], end_date: Optional[date]):
+    # Partition values are ISO dates, so string comparison orders them correctly
+    condition = None
+    if start_date:
+        condition = ds.field("date") >= start_date.isoformat()
+    if end_date:
+        upper = ds.field("date") <= end_date.isoformat()
+        condition = upper if condition is None else condition & upper
+    return condition
+
+
+def _and(*conditions):
+    result = None
+    for condition in conditions:
+        if condition is not None:
+            result = condition if result is None else result & condition
+    return result
+
+
+def _money(value) -> float:
+    # Amounts are summed as float64; round away the binary noise like the DECIMAL columns would
+    return round(float(value or 0), 2)
+
+
+def _sum(array) -> float:
+    return _money(pc.sum(array).as_py())
+
+
+def _top(table: "pa.Table", sort_column: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    indices = pc.sort_indices(table, sort_keys=[(sort_column, "descending")])
+    if limit is not None:
+        indices = indices[:limit]
+    return table.take(indices).to_pylist()
+
+
+def analytics_sales_report(start_date: Optional[date], end_date: Optional[date]) -> Dict[str, Any]:
+    """Same figures as app.services.reports.sales_report, from the snapshot"""
+    not_cancelled = ds.field("status") != CANCELLED
+    orders = _load("orders", _and(_date_filter(start_date, end_date), not_cancelled), ["final_amount"])
+    total_orders = orders.num_rows
+    total_sales = _sum(orders["final_amount"])
+
+    items = _load(
+        "order_items",
+        _and(_date_filter(start_date, end_date), ds.field("order_status") != CANCELLED),
+        ["product_id", "product_name", "category_id", "category_name", "quantity", "subtotal"]
+    )
+    by_product = items.group_by(["product_id", "product_name"]).aggregate([("quantity", "sum"), ("subtotal", "sum")])
+    top_products = [
+        {
+            "product_name": row["product_name"],
+            "total_quantity": int(row["quantity_sum"]),
+            "total_revenue": _money(row["subtotal_sum"])
+        }
+        for row in _top(by_product, "subtotal_sum", 10) if row["quantity_sum"] > 0
+    ]
+
+    by_category = items.filter(pc.is_valid(items["category_name"]))\
+        .group_by(["category_id", "category_name"]).aggregate([("quantity", "sum"), ("subtotal", "sum")])
+    sales_by_category = [
+        {
+            "category_id": row["category_id"],
+            "category_name": row["category_name"],
+            "total_quantity": int(row["quantity_sum"]),
+            "total_revenue": _money(row["subtotal_sum"])
+        }
+        for row in _top(by_category, "subtotal_sum") if row["quantity_sum"] > 0
+    ]
+
+    # Daily breakdown: the requested range, or the last 30 days
+    daily_start = start_date
+    if start_date is None and end_date is None:
+        daily_start = (datetime.now() - timedelta(days=30)).date()
+    daily = _load("orders", _and(_date_filter(daily_start, end_date), not_cancelled), ["date", "order_id", "final_amount"])
+    daily = daily.group_by("date").aggregate([("order_id", "count"), ("final_amount", "sum")])
+    daily = daily.take(pc.sort_indices(daily, sort_keys=[("date", "ascending")]))
+
+    return {
+        "total_sales": total_sales,
+        "total_orders": total_orders,
+        "average_order_value": total_sales / total_orders if total_orders > 0 else 0.0,
+        "top_products": top_products,
+        "sales_by_date": [
+            {"date": row["date"], "order_count": row["order_id_count"], "daily_sales": _money(row["final_amount_sum"])}
+            for row in daily.to_pylist()
+        ],
+        "sales_by_category": sales_by_category
+    }
+
+
+def analytics_inventory_report(low_stock_only: bool = False, expiring_soon: bool = False, days: int = 30) -> Dict[str, Any]:
+    """Same figures as app.services.reports.inventory_report, from the snapshot"""
+    inventory = _load("pharmacy_inventory")
+    today = datetime.now().date()
+    low_stock = pc.less_equal(inventory["quantity_in_stock"], inventory["low_stock_threshold"])
+    expired = pc.less(inventory["expiry_date"], pa.scalar(today, pa.date32()))
+
+    selected = inventory
+    if low_stock_only:
+        selected = selected.filter(pc.less_equal(selected["quantity_in_stock"], selected["low_stock_threshold"]))
+    if expiring_soon:
+        threshold_date = pa.scalar(today + timedelta(days=days), pa.date32())
+        selected = selected.filter(pc.and_(
+            pc.less_equal(selected["expiry_date"], threshold_date),
+            pc.greater_equal(selected["expiry_date"], pa.scalar(today, pa.date32()))
+        ))
+
+    return {
+        "total_inventory_items": selected.num_rows,
+        "total_inventory_value": _sum(pc.multiply(inventory["quantity_in_stock"], inventory["cost_price"])),
+        "low_stock_items": pc.sum(low_stock).as_py() or 0,
+        "expired_items": pc.sum(expired).as_py() or 0,
+        "inventory_details": [
+            {
+                **row,
+                "expiry_date": row["expiry_date"].isoformat(),
+                "days_until_expiry": (row["expiry_date"] - today).days
+            }
+            for row in selected.to_pylist()
+        ]
+    }
+
+
+def analytics_customer_report() -> Dict[str, Any]:
+    """Same figures as app.services.reports.customer_report, from the snapshot"""
+    customers = _load("customers")
+    shoppers = customers.filter(pc.equal(customers["role"], "customer"))
+    thirty_days_ago = pa.scalar(datetime.now() - timedelta(days=30), pa.timestamp("us"))
+    new_customers = pc.sum(pc.greater_equal(shoppers["created_at"], thirty_days_ago)).as_py() or 0
+
+    orders = _load("orders", columns=["order_id", "customer_id", "final_amount"])
+    customers_with_orders = pc.count_distinct(orders["customer_id"]).as_py()
+    spending = orders.group_by("customer_id").aggregate([("order_id", "count"), ("final_amount", "sum")])
+
+    names = {row["customer_id"]: row for row in customers.to_pylist()}
+    total_customers = shoppers.num_rows
+    return {
+        "total_customers": total_customers,
+        "new_customers_30_days": new_customers,
+        "customers_with_orders": customers_with_orders,
+        "customer_engagement_rate": round((customers_with_orders / total_customers * 100), 2) if total_customers > 0 else 0,
+        "top_customers": [
+            {
+                "customer_id": row["customer_id"],
+                "name": f"{names[row['customer_id']]['first_name']} {names[row['customer_id']]['last_name']}",
+                "email": names[row["customer_id"]]["email"],
+                "order_count": row["order_id_count"],
+                "total_spent": _money(row["final_amount_sum"])
+            }
+            for row in _top(spending, "final_amount_sum", 10) if row["customer_id"] in names
+        ]
+    }
+
+
+def analytics_prescription_report() -> Dict[str, Any]:
+    """Same figures as app.services.reports.prescription_report, from the snapshot"""
+    prescriptions = _load("prescriptions", columns=["status", "uploaded_at", "verified_at"])
+    total_prescriptions = prescriptions.num_rows
+    status_counts = prescriptions.group_by("status").aggregate([("status", "count")])
+
+    approved = prescriptions.filter(pc.equal(prescriptions["status"], "approved"))
+    approval_rate = round((approved.num_rows / total_prescriptions * 100), 2) if total_prescriptions > 0 else 0
+
+    # Average processing time (for approved prescriptions), in hours
+    verified = approved.filter(pc.is_valid(approved["verified_at"]))
+    processing = pc.subtract(verified["verified_at"], verified["uploaded_at"])
+    processing_hours = pc.mean(pc.divide(pc.cast(processing, pa.int64()), 3_600_000_000.0)).as_py() or 0
+
+    # Monthly trend (last 6 months)
+    six_months_ago = pa.scalar(datetime.now() - timedelta(days=180), pa.timestamp("us"))
+    recent = prescriptions.filter(pc.greater_equal(prescriptions["uploaded_at"], six_months_ago))
+    months = pa.table({"month": pc.strftime(recent["uploaded_at"], format="%Y-%m")})
+    monthly_trend = months.group_by("month").aggregate([("month", "count")])
+    monthly_trend = monthly_trend.take(pc.sort_indices(monthly_trend, sort_keys=[("month", "ascending")]))
+
+    return {
+        "total_prescriptions": total_prescriptions,
+        "approval_rate": approval_rate,
+        "average_processing_hours": round(float(processing_hours), 2),
+        "status_distribution": [
+            {"status": row["status"], "count": row["status_count"]}
+            for row in status_counts.to_pylist()
+        ],
+        "monthly_trend": [
+            {"month": row["month"], "prescription_count": row["month_count"]}
+            for row in monthly_trend.to_pylist()
+        ]
+    }
+
+
+if __name__ == "__main__":
+    # On-demand extraction: python -m app.services.analytics_snapshot
+    manifest = analytics_snapshot_scheduler.extract_once()
+    if manifest is None:
+        raise SystemExit(1)
@@ -0,0 +1,340 @@
+# app/services/blob_store.py
+import glob
+import os
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Any, BinaryIO, Dict, Iterator, Optional
+from fastapi import UploadFile
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from app.database import SessionLocal
+from app.models.models import Prescription
+from app.services.upload_storage import save_upload
+from config import BLOB_STORE_DIR, BLOB_GC_INTERVAL_SECONDS, BLOB_GC_GRACE_SECONDS
+
+# Prescription scans are stored once per distinct content, keyed by their
+# SHA-256, so re-uploading the same file (e.g. after a failed checkout) costs
+# no extra space. A prescription references its blob through image_url
+# ("blob://<sha256>"); the number of prescriptions pointing at a blob is its
+# reference count, and blobs nobody references are garbage collected.
+# Rows created before the blob store keep their plain file paths.
+
+BLOB_URL_PREFIX = "blob://"
+_HEX_DIGITS = set("0123456789abcdef")
+
+# Linking an upload and garbage collecting a blob take the same lock, so a
+# new reference cannot land between the collector's last check and its
+# delete. Locks are striped by the top-level shard, which also keeps the
+# collector from removing a shard directory an upload is linking into.
+_KEY_LOCKS = [threading.Lock() for _ in range(64)]
+
+
+@dataclass
+class StoredBlob:
+    key: str
+    size: int
+    created: bool  # False when identical content was already stored
+
+
+@dataclass
+class BlobInfo:
+    key: str
+    size: int
+    modified_at: float
+
+
+def _is_key(key: str) -> bool:
+    return len(key) == 64 and set(key) <= _HEX_DIGITS
+
+
+def _key_lock(key: str) -> threading.Lock:
+    return _KEY_LOCKS[int(key[:2], 16) % len(_KEY_LOCKS)]
+
+
+def blob_url(key: str) -> str:
+    return f"{BLOB_URL_PREFIX}{key}"
+
+
+def blob_key(url: Optional[str]) -> Optional[str]:
+    """The blob key an image_url points at, or None for a legacy file path"""
+    if url and url.startswith(BLOB_URL_PREFIX):
+        return url[len(BLOB_URL_PREFIX):]
+    return None
+
+
+# -------------------------------
+# BACKENDS
+# -------------------------------
+
+class BlobStore(ABC):
+    """
+    Content-addressed storage. Keys are the hex SHA-256 of the content, so
+    putting the same bytes twice returns the same key.
+    """
+
+    @abstractmethod
+    async def put(self, upload: UploadFile) -> StoredBlob:
+        """Store an upload (size limits as in save_upload) and return its key"""
+
+    @abstractmethod
+    def open(self, key: str) -> BinaryIO:
+        """Open a blob for reading; raises FileNotFoundError"""
+
+    @abstractmethod
+    def exists(self, key: str) -> bool:
+        ...
+
+    @abstractmethod
+    def delete(self, key: str) -> int:
+        """Remove a blob; returns the bytes freed (0 if it was not there)"""
+
+    @abstractmethod
+    def stat(self, key: str) -> Optional[BlobInfo]:
+        """Size and modification time of a blob, or None if it is not there"""
+
+    @abstractmethod
+    def iter_blobs(self) -> Iterator[BlobInfo]:
+        ...
+
+    def purge_incomplete(self, older_than: float) -> int:
+        """Remove leftovers of interrupted puts; returns how many"""
+        return 0
+
+    def local_path(self, key: str) -> Optional[str]:
+        """Filesystem path of a blob, for backends that have one"""
+        return None
+
+
+class LocalBlobStore(BlobStore):
+    """
+    Blobs on the local filesystem under root/sha256/ab/cd/<key>; the two
+    levels of sharding keep any one directory small. Uploads are staged in
+    root/tmp and renamed into place once their hash is known.
+    """
+
+    def __init__(self, root: str = BLOB_STORE_DIR):
+        self.root = root
+        self.blob_dir = os.path.join(root, "sha256")
+        self.tmp_dir = os.path.join(root, "tmp")
+
+    def path(self, key: str) -> str:
+        if not _is_key(key):
+            raise ValueError(f"Invalid blob key '{key}'")
+        return os.path.join(self.blob_dir, key[:2], key[2:4], key)
+
+    async def put(self, upload: UploadFile) -> StoredBlob:
+        staged = await save_upload(upload, os.path.join(self.tmp_dir, uuid.uuid4().hex))
+        created = await run_in_threadpool(self._link, staged.path, staged.sha256)
+        return StoredBlob(key=staged.sha256, size=staged.size, created=created)
+
+    def _link(self, staged_path: str, key: str) -> bool:
+        path = self.path(key)
+        with _key_lock(key):
+            if os.path.exists(path):
+                # Refresh the mtime so garbage collection gives the new reference
+                # its grace period before counting it
+                os.utime(path)
+                os.remove(staged_path)
+                return False
+
+            directory = os.path.dirname(path)
+            os.makedirs(directory, exist_ok=True)
+            os.replace(staged_path, path)
+            if hasattr(os, "O_DIRECTORY"):
+                dir_fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+                try:
+                    os.fsync(dir_fd)
+                finally:
+                    os.close(dir_fd)
+            return True
+
+    def local_path(self, key: str) -> Optional[str]:
+        return self.path(key)
+
+    def open(self, key: str) -> BinaryIO:
+        return open(self.path(key), "rb")
+
+    def exists(self, key: str) -> bool:
+        return os.path.exists(self.path(key))
+
+    def delete(self, key: str) -> int:
+        path = self.path(key)
+        try:
+            size = os.path.getsize(path)
+            os.remove(path)
+        except FileNotFoundError:
+            return 0
+
+        # Files derived from the blob (thumbnails, previews) sit next to it
+        for derived in glob.glob(f"{glob.escape(path)}.*"):
+            try:
+                os.remove(derived)
+            except FileNotFoundError:
+                pass
+
+        # Drop shard directories that became empty
+        for directory in (os.path.dirname(path), os.path.dirname(os.path.dirname(path))):
+            try:
+                os.rmdir(directory)
+            except OSError:
+                break
+        return size
+
+    def stat(self, key: str) -> Optional[BlobInfo]:
+        try:
+            stat = os.stat(self.path(key))
+        except FileNotFoundError:
+            return None
+        return BlobInfo(key=key, size=stat.st_size, modified_at=stat.st_mtime)
+
+    def iter_blobs(self) -> Iterator[BlobInfo]:
+        if not os.path.isdir(self.blob_dir):
+            return
+        for _, _, filenames in os.walk(self.blob_dir):
+            for name in filenames:
+                if not _is_key(name):
+                    continue
+                blob = self.stat(name)
+                if blob:
+                    yield blob
+
+    def purge_incomplete(self, older_than: float) -> int:
+        if not os.path.isdir(self.tmp_dir):
+            return 0
+        removed = 0
+        for name in os.listdir(self.tmp_dir):
+            path = os.path.join(self.tmp_dir, name)
+            try:
+                if os.stat(path).st_mtime < older_than:
+                    os.remove(path)
+                    removed += 1
+            except FileNotFoundError:
+                continue
+        return removed
+
+
+blob_store: BlobStore = LocalBlobStore()
+
+
+# -------------------------------
+# REFERENCE COUNTS & GC
+# -------------------------------
+
+def blob_refcounts(db: Session) -> Dict[str, int]:
+    """Number of prescriptions referencing each blob"""
+    rows = db.query(
+        Prescription.image_url,
+        func.count(Prescription.prescription_id)
+    ).filter(
+        Prescription.image_url.like(f"{BLOB_URL_PREFIX}%")
+    ).group_by(Prescription.image_url).all()
+    return {blob_key(url): count for url, count in rows}
+
+
+def blob_refcount(db: Session, key: str) -> int:
+    """Number of prescriptions referencing one blob"""
+    return db.query(func.count(Prescription.prescription_id)).filter(
+        Prescription.image_url == blob_url(key)
+    ).scalar()
+
+
+def blob_store_stats(db: Session, store: Optional[BlobStore] = None) -> Dict[str, Any]:
+    store = store or blob_store
+    refcounts = blob_refcounts(db)
+    blobs = stored_bytes = referenced = saved_bytes = 0
+    for blob in store.iter_blobs():
+        blobs += 1
+        stored_bytes += blob.size
+        count = refcounts.get(blob.key, 0)
+        if count:
+            referenced += 1
+            saved_bytes += (count - 1) * blob.size
+
+    return {
+        "blobs": blobs,
+        "stored_bytes": stored_bytes,
+        "referenced_blobs": referenced,
+        "unreferenced_blobs": blobs - referenced,
+        "references": sum(refcounts.values()),
+        "missing_blobs": sum(1 for key in refcounts if not _is_key(key) or not store.exists(key)),
+        "dedup_saved_bytes": saved_bytes
+    }
+
+
+def collect_garbage(db: Session, store: Optional[BlobStore] = None, grace_seconds: int = BLOB_GC_GRACE_SECONDS) -> Dict[str, int]:
+    """
+    Delete blobs no prescription references. Blobs written within the grace
+    period are kept: their prescription row may not be committed yet.
+    The scan works from a snapshot, so each candidate is checked again
+    (modification time and reference count) under its key lock right
+    before it is deleted.
+    """
+    store = store or blob_store
+    referenced = blob_refcounts(db)
+    cutoff = time.time() - grace_seconds
+    deleted = freed = 0
+
+    for blob in store.iter_blobs():
+        if blob.key in referenced or blob.modified_at > cutoff:
+            continue
+        with _key_lock(blob.key):
+            current = store.stat(blob.key)
+            if not current or current.modified_at > cutoff or blob_refcount(db, blob.key):
+                continue
+            size = store.delete(blob.key)
+        if size:
+            deleted += 1
+            freed += size
+
+    return {
+        "deleted_blobs": deleted,
+        "bytes_freed": freed,
+        "incomplete_uploads_removed": store.purge_incomplete(cutoff)
+    }
+
+
+class BlobGarbageCollector:
+    """
+    Background thread that periodically garbage collects the blob store
+    """
+
+    def __init__(self, interval_seconds: int = BLOB_GC_INTERVAL_SECONDS):
+        self.interval_seconds = interval_seconds
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="blob-gc", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def collect_once(self) -> Dict[str, int]:
+        db = SessionLocal()
+        try:
+            result = collect_garbage(db)
+            if result["deleted_blobs"]:
+                print(f"✅ Blob GC removed {result['deleted_blobs']} blobs ({result['bytes_freed']} bytes)")
+            return result
+        except Exception as e:
+            print(f"❌ ERROR collecting blob garbage: {str(e)}")
+            return {"deleted_blobs": 0, "bytes_freed": 0, "incomplete_uploads_removed": 0}
+        finally:
+            db.close()
+
+    def _run(self):
+        while not self._stop.wait(self.interval_seconds):
+            self.collect_once()
+
+
+blob_garbage_collector = BlobGarbageCollector()
@@ -0,0 +1,209 @@
+# app/services/catalog_cache.py
+import hashlib
+import importlib
+import json
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from config import CATALOG_CACHE_BACKEND, CATALOG_CACHE_TTL_SECONDS, CATALOG_CACHE_MAX_ENTRIES
+
+# Invalidation tags
+TAG_PRODUCTS = "products"      # any product listing
+TAG_CATEGORIES = "categories"  # category listings and names shown on products
+
+
+def product_tag(product_id: int) -> str:
+    """Tag of everything showing one product, including its stock"""
+    return f"product:{product_id}"
+
+
+class CacheBackend(ABC):
+    """
+    Storage behind the catalog cache.
+
+    The default in-memory backend is per process; point
+    CATALOG_CACHE_BACKEND at a shared implementation (e.g. one backed by
+    Redis) so every worker sees the same entries and invalidations.
+    """
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[bytes]:
+        """Value stored under `key`, or None if missing or expired"""
+
+    @abstractmethod
+    def set(self, key: str, value: bytes, ttl_seconds: int) -> None:
+        ...
+
+    @abstractmethod
+    def counter(self, key: str) -> int:
+        """Current value of a counter (0 if it was never incremented)"""
+
+    @abstractmethod
+    def incr(self, key: str) -> int:
+        """Increment a counter; counters never expire"""
+
+
+class MemoryCacheBackend(CacheBackend):
+    """
+    In-process LRU with per-entry TTL
+    """
+
+    def __init__(self, max_entries: int = CATALOG_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._counters: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: bytes, ttl_seconds: int) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def counter(self, key: str) -> int:
+        with self._lock:
+            return self._counters.get(key, 0)
+
+    def incr(self, key: str) -> int:
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + 1
+            return self._counters[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._counters.clear()
+
+
+def load_backend(path: str) -> CacheBackend:
+    """
+    Instantiate the backend class at dotted `path`, or the in-memory
+    backend when no path is configured
+    """
+    if not path:
+        return MemoryCacheBackend()
+    module_name, _, class_name = path.rpartition(".")
+    backend_class = getattr(importlib.import_module(module_name), class_name)
+    return backend_class()
+
+
+# Response headers produced by the endpoint that are part of the cached entry
+_CACHED_HEADERS = ("x-next-cursor",)
+
+
+class CatalogCache:
+    """
+    Cache of serialized catalog responses.
+
+    Every entry is filed under one or more tags. Each tag has a generation
+    counter that is part of the cache key, so invalidating a tag is a
+    single increment: entries built under the old generation are never
+    read again and age out of the backend.
+    """
+
+    def __init__(self, backend: CacheBackend, ttl_seconds: int = CATALOG_CACHE_TTL_SECONDS):
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+
+    def invalidate(self, *tags: str) -> None:
+        for tag in tags:
+            self.backend.incr(f"gen:{tag}")
+
+    def respond(
+        self,
+        request: Request,
+        name: str,
+        params: Dict[str, Any],
+        tags: List[str],
+        build: Callable[[Response], Any]
+    ) -> Response:
+        """
+        Serve `name` for `params` from the cache, calling `build` on a miss.
+
+        `build` receives a Response on which it may set headers (such as the
+        pagination cursor) and returns the content, already shaped like the
+        endpoint's response model. The response carries an ETag; a request
+        whose If-None-Match matches it gets an empty 304.
+        """
+        key, entry = self._lookup(name, params, tags)
+        if entry is None:
+            scratch = Response()
+            entry = self._store(key, build(scratch), scratch)
+        return self._response(request, entry)
+
+    async def respond_async(
+        self,
+        request: Request,
+        name: str,
+        params: Dict[str, Any],
+        tags: List[str],
+        build: Callable[[Response], Awaitable[Any]]
+    ) -> Response:
+        """respond() for async routes, where `build` is a coroutine function"""
+        key, entry = self._lookup(name, params, tags)
+        if entry is None:
+            scratch = Response()
+            entry = self._store(key, await build(scratch), scratch)
+        return self._response(request, entry)
+
+    def _lookup(self, name: str, params: Dict[str, Any], tags: List[str]) -> Tuple[str, Optional[dict]]:
+        key = self._key(name, params, tags)
+        cached = self.backend.get(key)
+        return key, json.loads(cached) if cached is not None else None
+
+    def _store(self, key: str, content: Any, scratch: Response) -> dict:
+        body = json.dumps(jsonable_encoder(content), separators=(",", ":"))
+        entry = {
+            "body": body,
+            "etag": '"' + hashlib.sha256(body.encode()).hexdigest()[:32] + '"',
+            "headers": {
+                header: value for header, value in scratch.headers.items()
+                if header in _CACHED_HEADERS
+            }
+        }
+        self.backend.set(key, json.dumps(entry).encode(), self.ttl_seconds)
+        return entry
+
+    def _response(self, request: Request, entry: dict) -> Response:
+        headers = dict(entry["headers"], ETag=entry["etag"])
+        headers["Cache-Control"] = "no-cache"
+        if _etag_matches(request.headers.get("if-none-match"), entry["etag"]):
+            return Response(status_code=304, headers=headers)
+        return Response(content=entry["body"], media_type="application/json", headers=headers)
+
+    def _key(self, name: str, params: Dict[str, Any], tags: List[str]) -> str:
+        generations = [self.backend.counter(f"gen:{tag}") for tag in tags]
+        raw = json.dumps([name, params, tags, generations], sort_keys=True, default=str)
+        return "catalog:" + hashlib.sha256(raw.encode()).hexdigest()
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    return "*" in candidates or any(
+        (candidate[2:] if candidate.startswith("W/") else candidate) == etag
+        for candidate in candidates
+    )
+
+
+catalog_cache = CatalogCache(load_backend(CATALOG_CACHE_BACKEND))
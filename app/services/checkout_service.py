@@ -0,0 +1,100 @@
+# app/services/checkout_service.py
+from typing import Dict, List, Tuple
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+from app.models.models import CartItem, Product, Prescription
+from app.services.stock_allocator import allocate_fefo
+from app.utils.loaders import entity_loader
+
+
+def load_cart_lines(db: Session, customer_id: int) -> List[Tuple[CartItem, Product]]:
+    """
+    Load the customer's cart together with its products in a single query.
+    The products are primed into the request's Product loader.
+    """
+    cart_lines = db.query(CartItem, Product).\
+        outerjoin(Product, Product.product_id == CartItem.product_id).\
+        filter(CartItem.customer_id == customer_id).\
+        order_by(CartItem.cart_item_id).\
+        all()
+    entity_loader(db, Product).prime(*[product for _, product in cart_lines])
+    return cart_lines
+
+
+def has_approved_prescription(db: Session, customer_id: int) -> bool:
+    """
+    Check whether the customer has at least one approved prescription
+    """
+    return db.query(
+        db.query(Prescription).filter(
+            Prescription.customer_id == customer_id,
+            Prescription.status == "approved"
+        ).exists()
+    ).scalar()
+
+
+def build_order_lines(
+    db: Session,
+    customer_id: int,
+    cart_lines: List[Tuple[CartItem, Product]]
+) -> Tuple[List[dict], Dict[int, int]]:
+    """
+    Validate prescriptions and stock for the cart and work out order lines.
+
+    Returns the order item data and the inventory allocations
+    (inventory_id -> quantity) that have to be taken from stock.
+    """
+    # Every cart line must still point at an existing product
+    for cart_item, product in cart_lines:
+        if product is None:
+            raise HTTPException(status_code=400, detail=f"Product not found for cart item {cart_item.cart_item_id}")
+
+    # Check prescription requirements
+    prescription_products = [product.name for _, product in cart_lines if product.requires_prescription]
+    if prescription_products and not has_approved_prescription(db, customer_id):
+        raise HTTPException(
+            status_code=400,
+            detail=f"Prescription required for: {', '.join(prescription_products)}. Please upload and get approval first."
+        )
+
+    # Allocate stock across batches (first expiry first out)
+    demands: Dict[int, int] = {}
+    for cart_item, product in cart_lines:
+        demands[product.product_id] = demands.get(product.product_id, 0) + cart_item.quantity
+    batch_allocations = allocate_fefo(
+        db, demands, {product.product_id: product.name for _, product in cart_lines}, customer_id=customer_id
+    )
+
+    order_items_data = []
+    allocations: Dict[int, int] = {}
+    for cart_item, product in cart_lines:
+        # Take this line's share from the product's allocated batches
+        line_batches = []
+        needed = cart_item.quantity
+        for allocation in batch_allocations[product.product_id]:
+            if needed == 0:
+                break
+            take = min(allocation.quantity, needed)
+            if take == 0:
+                continue
+            allocation.quantity -= take
+            needed -= take
+            line_batches.append({
+                'inventory_id': allocation.inventory_id,
+                'batch_number': allocation.batch_number,
+                'expiry_date': allocation.expiry_date,
+                'quantity': take
+            })
+            allocations[allocation.inventory_id] = allocations.get(allocation.inventory_id, 0) + take
+
+        item_total = float(product.price) * cart_item.quantity
+        order_items_data.append({
+            'product_id': product.product_id,
+            'quantity': cart_item.quantity,
+            'unit_price': float(product.price),
+            'subtotal': item_total,
+            'requires_prescription': product.requires_prescription,
+            'batches': line_batches
+        })
+
+    return order_items_data, allocations
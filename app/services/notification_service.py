@@ -1,14 +1,14 @@
 # app/services/notification_service.py (Updated)
 from sqlalchemy.orm import Session
-from app.models.models import Notification, RefundPolicy, RefundStatus
+from app.models.models import Notification, NotificationType, RefundPolicy, RefundStatus
 from datetime import datetime
 
 class NotificationService:
     
     @staticmethod
-    async def create_refund_notification(refund, db: Session):
+    def build_refund_notification(refund, customer_id: int) -> Notification:
         """
-        Create notification for refund status updates using your ENUM
+        Notification for refund status updates using your ENUM (not added to a session)
         """
         title = "Refund Update"
         
@@ -33,17 +33,21 @@ class NotificationService:
             f"{status_message}. Amount: ${refund.amount:.2f}"
         )
         
-        # Create the notification
-        notification = Notification(
+        return Notification(
             title=title,
             message=message,
-            type="refund_update",
-            recipient_customer_id=refund.order.customer_id,
+            type=NotificationType.info,
+            recipient_customer_id=customer_id,
             order_id=refund.order_id,
             created_at=datetime.now()
         )
-        
-        db.add(notification)
+    
+    @staticmethod
+    async def create_refund_notification(refund, db: Session):
+        """
+        Create notification for refund status updates using your ENUM
+        """
+        db.add(NotificationService.build_refund_notification(refund, refund.order.customer_id))
         db.commit()
     
     @staticmethod
@@ -0,0 +1,117 @@
+# app/services/prescription_previews.py
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Optional
+from fastapi import HTTPException
+from app.services.blob_store import blob_store, blob_key
+from app.utils.image_derivatives import (
+    can_render, derivative_path, render_derivatives, sniff_media_type
+)
+from config import PREVIEW_WORKERS, THUMBNAIL_MAX_PX, PREVIEW_MAX_PX
+
+# Thumbnails and previews of prescription scans are rendered when the scan
+# is uploaded, on a process pool so image decoding neither blocks the event
+# loop nor competes with request threads for the GIL. They are written next
+# to the original; one that is missing (older uploads, a failed render) is
+# rendered when first requested.
+
+DERIVATIVE_SIZES = {"thumbnail": THUMBNAIL_MAX_PX, "preview": PREVIEW_MAX_PX}
+
+_executor: Optional[ProcessPoolExecutor] = None
+_pending: Dict[str, Future] = {}
+_lock = threading.Lock()
+
+
+def _pool() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        # spawn: forking a process that holds DB connections and threads is unsafe
+        _executor = ProcessPoolExecutor(
+            max_workers=PREVIEW_WORKERS,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    return _executor
+
+
+def shutdown_preview_pool() -> None:
+    global _executor
+    with _lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def source_path(image_url: str) -> Optional[str]:
+    """Local path of a prescription's original file (blob or legacy upload)"""
+    key = blob_key(image_url)
+    if key is None:
+        return image_url
+    try:
+        return blob_store.local_path(key)
+    except ValueError:
+        return None
+
+
+def _done(source: str, future: Future) -> None:
+    with _lock:
+        _pending.pop(source, None)
+    if not future.cancelled() and future.exception() is not None:
+        print(f"❌ ERROR rendering previews of {source}: {future.exception()}")
+
+
+def schedule_derivatives(source: Optional[str]) -> Optional[Future]:
+    """
+    Queue rendering of the derivatives `source` does not have yet. Returns
+    the pending render (shared with concurrent callers), or None when there
+    is nothing to do or it cannot be rendered.
+    """
+    global _executor
+    if not source or not os.path.exists(source):
+        return None
+
+    with _lock:
+        if source in _pending:
+            return _pending[source]
+        missing = {
+            kind: max_px for kind, max_px in DERIVATIVE_SIZES.items()
+            if not os.path.exists(derivative_path(source, kind))
+        }
+        if not missing or not can_render(sniff_media_type(source)):
+            return None
+        try:
+            future = _pool().submit(render_derivatives, source, missing)
+        except BrokenProcessPool as e:
+            # A worker died (e.g. killed for memory); start a fresh pool next time
+            _executor = None
+            print(f"❌ ERROR: Preview pool is broken, restarting it: {e}")
+            return None
+        _pending[source] = future
+
+    future.add_done_callback(lambda f: _done(source, f))
+    return future
+
+
+async def ensure_derivative(source: str, kind: str) -> str:
+    """Path of a derivative, rendering it first if needed; raises 404/503"""
+    path = derivative_path(source, kind)
+    if os.path.exists(path):
+        return path
+    if not os.path.exists(source):
+        raise HTTPException(status_code=404, detail="Prescription file not found")
+    if not can_render(sniff_media_type(source)):
+        raise HTTPException(status_code=503, detail=f"No {kind} is available for this file")
+
+    future = schedule_derivatives(source)
+    if future is not None:
+        try:
+            await asyncio.wrap_future(future)
+        except Exception as e:
+            raise HTTPException(status_code=503, detail=f"Failed to render {kind}: {str(e)}")
+
+    if not os.path.exists(path):
+        raise HTTPException(status_code=503, detail=f"Failed to render {kind}")
+    return path
@@ -0,0 +1,48 @@
+# app/services/product_details.py
+from typing import Dict, List
+from sqlalchemy.orm import Session
+from app.models.models import Product, Category, ProductStockProjection
+from app.schemas.products import ProductDetailResponse
+
+
+def load_product_details(db: Session, product_ids: List[int]) -> Dict[int, ProductDetailResponse]:
+    """
+    Detail view of active products (product_id -> detail) in a single query:
+    the product, its category name and its row of the stock projection.
+    Unknown or inactive products are left out.
+    """
+    if not product_ids:
+        return {}
+
+    rows = db.query(Product, Category.name, ProductStockProjection)\
+     .outerjoin(Category, Category.category_id == Product.category_id)\
+     .outerjoin(ProductStockProjection, ProductStockProjection.product_id == Product.product_id)\
+     .filter(Product.product_id.in_(product_ids), Product.is_active == True)\
+     .all()
+
+    details = {}
+    for product, category_name, stock in rows:
+        quantity = stock.quantity if stock else 0
+        details[product.product_id] = ProductDetailResponse(
+            product_id=product.product_id,
+            name=product.name,
+            description=product.description,
+            sku=product.sku,
+            category_id=product.category_id,
+            category_name=category_name or "Unknown",
+            manufacturer=product.manufacturer,
+            requires_prescription=product.requires_prescription,
+            hsn_code=float(product.hsn_code),
+            gst_rate=float(product.gst_rate),
+            price=float(product.price),
+            cost_price=float(product.cost_price),
+            image_url=product.image_url,
+            is_active=product.is_active,
+            created_at=product.created_at,
+            updated_at=product.updated_at,
+            in_stock=quantity,
+            stock_quantity=quantity,
+            low_stock=stock.low_stock if stock else False,
+            nearest_expiry=stock.nearest_expiry if stock else None
+        )
+    return details
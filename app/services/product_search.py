@@ -0,0 +1,213 @@
+# app/services/product_search.py
+import re
+import threading
+from typing import Dict, List, Optional, Set, Tuple
+from sqlalchemy import case, false, func, or_, update
+from sqlalchemy.orm import Query, Session
+from app.models.models import Product
+
+# Postgres text search configuration; 'simple' keeps brand and molecule names unstemmed
+SEARCH_CONFIG = "simple"
+TRIGRAM_THRESHOLD = 0.3
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(value: Optional[str]) -> List[str]:
+    return _TOKEN_RE.findall((value or "").lower())
+
+
+def is_postgres(db: Session) -> bool:
+    return db.get_bind().dialect.name == "postgresql"
+
+
+def search_vector_expression():
+    """
+    Weighted tsvector for a product: name and SKU rank highest, then
+    manufacturer, then description
+    """
+    def weighted(column, weight):
+        return func.setweight(func.to_tsvector(SEARCH_CONFIG, func.coalesce(column, "")), weight)
+
+    return weighted(Product.name, "A").op("||")(weighted(Product.sku, "A"))\
+        .op("||")(weighted(Product.manufacturer, "B"))\
+        .op("||")(weighted(Product.description, "C"))
+
+
+def prefix_tsquery(q: str):
+    """
+    Build a tsquery matching every word of `q` as a prefix, so partially
+    typed words still match
+    """
+    tokens = tokenize(q)
+    if not tokens:
+        return None
+    return func.to_tsquery(SEARCH_CONFIG, " & ".join(f"{token}:*" for token in tokens))
+
+
+class InMemorySearchIndex:
+    """
+    Ranked, typo-tolerant product search used when the database has no
+    full-text support (SQLite in tests and local development).
+
+    Field weights mirror the Postgres tsvector weights; query words match
+    indexed words by prefix or, failing that, by trigram similarity.
+    """
+
+    FIELD_WEIGHTS = {"name": 1.0, "sku": 1.0, "manufacturer": 0.4, "description": 0.2}
+
+    def __init__(self):
+        self._documents: Dict[int, Dict[str, Set[str]]] = {}
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def ensure_loaded(self, db: Session) -> None:
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            products = db.query(
+                Product.product_id, Product.name, Product.sku, Product.manufacturer, Product.description
+            ).all()
+            for product in products:
+                self._documents[product.product_id] = self._document(product)
+            self._loaded = True
+
+    def index(self, product) -> None:
+        with self._lock:
+            if self._loaded:
+                self._documents[product.product_id] = self._document(product)
+
+    def search(self, q: str) -> List[Tuple[int, float]]:
+        tokens = tokenize(q)
+        if not tokens:
+            return []
+
+        results = []
+        with self._lock:
+            documents = list(self._documents.items())
+        for product_id, fields in documents:
+            score = 0.0
+            for token in tokens:
+                best = max(
+                    (weight * _match_score(token, fields[field]) for field, weight in self.FIELD_WEIGHTS.items()),
+                    default=0.0
+                )
+                if best == 0.0:
+                    break
+                score += best
+            else:
+                results.append((product_id, score))
+
+        results.sort(key=lambda result: (-result[1], result[0]))
+        return results
+
+    def _document(self, product) -> Dict[str, Set[str]]:
+        return {field: set(tokenize(getattr(product, field))) for field in self.FIELD_WEIGHTS}
+
+
+def _trigrams(word: str) -> Set[str]:
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _match_score(token: str, words: Set[str]) -> float:
+    if token in words:
+        return 1.0
+    if any(word.startswith(token) for word in words):
+        return 0.8
+    token_trigrams = _trigrams(token)
+    best = 0.0
+    for word in words:
+        word_trigrams = _trigrams(word)
+        similarity = len(token_trigrams & word_trigrams) / len(token_trigrams | word_trigrams)
+        best = max(best, similarity)
+    return best * 0.6 if best >= TRIGRAM_THRESHOLD else 0.0
+
+
+memory_index = InMemorySearchIndex()
+
+
+def apply_search(db: Session, query: Query, q: str) -> Query:
+    """
+    Filter a Product query to products matching `q`, best matches first
+    """
+    if is_postgres(db):
+        tsquery = prefix_tsquery(q)
+        if tsquery is None:
+            return query.filter(false())
+        return query.filter(
+            or_(
+                Product.search_vector.op("@@")(tsquery),
+                Product.name.op("%")(q)
+            )
+        ).order_by(
+            func.ts_rank_cd(Product.search_vector, tsquery).desc(),
+            func.similarity(Product.name, q).desc(),
+            Product.product_id
+        )
+
+    # No full-text support: rank with the in-process index
+    memory_index.ensure_loaded(db)
+    ranked = memory_index.search(q)
+    if not ranked:
+        return query.filter(false())
+    ranks = {product_id: position for position, (product_id, _) in enumerate(ranked)}
+    return query.filter(Product.product_id.in_(list(ranks.keys()))).order_by(
+        case(ranks, value=Product.product_id)
+    )
+
+
+def suggest_products(db: Session, q: str, limit: int) -> List[Product]:
+    """
+    Active products for autocomplete: name prefix matches first, then
+    full-text and trigram (typo-tolerant) matches
+    """
+    query = db.query(Product).filter(Product.is_active == True)
+
+    if is_postgres(db):
+        tsquery = prefix_tsquery(q)
+        prefix = Product.name.ilike(f"{q}%")
+        conditions = [prefix, Product.name.op("%")(q)]
+        if tsquery is not None:
+            conditions.append(Product.search_vector.op("@@")(tsquery))
+        return query.filter(or_(*conditions)).order_by(
+            prefix.desc(),
+            func.similarity(Product.name, q).desc(),
+            Product.product_id
+        ).limit(limit).all()
+
+    return apply_search(db, query, q).limit(limit).all()
+
+
+def index_product(db: Session, product: Product) -> None:
+    """
+    Refresh the search document of one product after it is created or updated
+    """
+    if is_postgres(db):
+        db.flush()
+        db.execute(
+            update(Product)
+            .where(Product.product_id == product.product_id)
+            .values(search_vector=search_vector_expression(), updated_at=Product.updated_at)
+            .execution_options(synchronize_session=False)
+        )
+    else:
+        memory_index.index(product)
+
+
+def backfill_search_vectors(db: Session) -> int:
+    """
+    Build search documents for products that do not have one yet
+    """
+    if not is_postgres(db):
+        return 0
+    result = db.execute(
+        update(Product)
+        .where(Product.search_vector.is_(None))
+        .values(search_vector=search_vector_expression(), updated_at=Product.updated_at)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return result.rowcount
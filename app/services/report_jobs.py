@@ -0,0 +1,257 @@
+# app/services/report_jobs.py
+import hashlib
+import json
+import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, Optional
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from app.database import SessionLocal
+from app.models.models import (
+    ReportJob, ReportJobStatus, Order, Customer, Prescription, PharmacyInventory, DailySalesRollup
+)
+from app.services.reports import sales_report, inventory_report, customer_report, prescription_report
+from config import REPORT_RESULTS_DIR, REPORT_WORKERS, REPORT_JOB_TIMEOUT_SECONDS
+
+# Reports are computed off the request path on a small local pool. A result
+# is stored as a JSON file named after a hash of the report type, its
+# parameters and a fingerprint of the data it reads, so an identical request
+# reuses it until that data changes.
+
+
+# -------------------------------
+# REPORT TYPES
+# -------------------------------
+
+def _optional_date(value: Any) -> Optional[str]:
+    if value in (None, ""):
+        return None
+    if isinstance(value, datetime):
+        return value.date().isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    return datetime.fromisoformat(str(value)).date().isoformat()
+
+
+def _flag(params: Dict[str, Any], name: str) -> bool:
+    """A boolean filter given as a bool or as "true"/"false"/"1"/"0" (any case)"""
+    value = params.get(name, False)
+    if isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if text in ("true", "1"):
+        return True
+    if text in ("false", "0"):
+        return False
+    raise ValueError(f"{name} must be true or false")
+
+
+def _sales_params(params: Dict[str, Any]) -> Dict[str, Any]:
+    return {"start_date": _optional_date(params.get("start_date")), "end_date": _optional_date(params.get("end_date"))}
+
+
+def _inventory_params(params: Dict[str, Any]) -> Dict[str, Any]:
+    days = int(params.get("days", 30))
+    if not 1 <= days <= 365:
+        raise ValueError("days must be between 1 and 365")
+    return {
+        "low_stock_only": _flag(params, "low_stock_only"),
+        "expiring_soon": _flag(params, "expiring_soon"),
+        "days": days
+    }
+
+
+def _no_params(params: Dict[str, Any]) -> Dict[str, Any]:
+    return {}
+
+
+def _sales_fingerprint(db: Session) -> list:
+    row = db.query(
+        func.count(DailySalesRollup.sales_date),
+        func.sum(DailySalesRollup.order_count),
+        func.sum(DailySalesRollup.gross_sales)
+    ).one()
+    return list(row) + [db.query(func.max(Order.updated_at)).scalar()]
+
+
+def _inventory_fingerprint(db: Session) -> list:
+    return list(db.query(
+        func.count(PharmacyInventory.inventory_id),
+        func.sum(PharmacyInventory.quantity_in_stock),
+        func.max(PharmacyInventory.updated_at)
+    ).one())
+
+
+def _customer_fingerprint(db: Session) -> list:
+    customers = db.query(func.count(Customer.customer_id), func.max(Customer.updated_at)).one()
+    orders = db.query(func.count(Order.order_id), func.sum(Order.final_amount), func.max(Order.updated_at)).one()
+    return list(customers) + list(orders)
+
+
+def _prescription_fingerprint(db: Session) -> list:
+    return list(db.query(
+        func.count(Prescription.prescription_id),
+        func.max(Prescription.uploaded_at),
+        func.max(Prescription.verified_at)
+    ).one())
+
+
+def _run_sales(db: Session, params: Dict[str, Any], progress: Callable[[int], None]) -> Dict[str, Any]:
+    start_date = date.fromisoformat(params["start_date"]) if params["start_date"] else None
+    end_date = date.fromisoformat(params["end_date"]) if params["end_date"] else None
+    return sales_report(db, start_date, end_date, progress)
+
+
+# report type -> (normalise params, data fingerprint, build)
+REPORT_TYPES = {
+    "sales": (_sales_params, _sales_fingerprint, _run_sales),
+    "inventory": (
+        _inventory_params, _inventory_fingerprint,
+        lambda db, params, progress: inventory_report(db, progress=progress, **params)
+    ),
+    "customers": (_no_params, _customer_fingerprint, lambda db, params, progress: customer_report(db, progress)),
+    "prescriptions": (
+        _no_params, _prescription_fingerprint, lambda db, params, progress: prescription_report(db, progress)
+    ),
+}
+
+
+def normalize_params(report_type: str, params: Dict[str, Any]) -> Dict[str, Any]:
+    """Validate and canonicalise report parameters; raises ValueError"""
+    if report_type not in REPORT_TYPES:
+        raise ValueError(f"Unknown report type '{report_type}'. Available: {', '.join(REPORT_TYPES)}")
+    return REPORT_TYPES[report_type][0](params)
+
+
+def cache_key(db: Session, report_type: str, params: Dict[str, Any]) -> str:
+    """
+    Hash of the report type, its parameters and the current data
+    fingerprint. The date is part of it because reports use windows
+    relative to today (last 30 days, days until expiry, ...).
+    """
+    fingerprint = REPORT_TYPES[report_type][1](db)
+    payload = json.dumps(
+        [report_type, params, date.today().isoformat(), fingerprint],
+        sort_keys=True, default=str
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+# -------------------------------
+# QUEUE
+# -------------------------------
+
+_executor = ThreadPoolExecutor(max_workers=REPORT_WORKERS, thread_name_prefix="report-worker")
+
+
+def enqueue_report(db: Session, report_type: str, params: Dict[str, Any], requested_by: Optional[int] = None) -> ReportJob:
+    """
+    Queue a report run and return its job. A completed job with the same
+    cache key (whose result file still exists) or one already queued or
+    running is returned instead of starting another run.
+    """
+    params = normalize_params(report_type, params)
+    key = cache_key(db, report_type, params)
+
+    stale_before = datetime.now() - timedelta(seconds=REPORT_JOB_TIMEOUT_SECONDS)
+    candidates = db.query(ReportJob).filter(
+        ReportJob.cache_key == key,
+        ReportJob.status != ReportJobStatus.failed
+    ).order_by(ReportJob.created_at.desc()).all()
+    for job in candidates:
+        if job.status == ReportJobStatus.completed and job.result_path and os.path.exists(job.result_path):
+            return job
+        if job.status in (ReportJobStatus.queued, ReportJobStatus.running) and job.created_at and job.created_at >= stale_before:
+            return job
+
+    job = ReportJob(
+        job_id=uuid.uuid4().hex,
+        report_type=report_type,
+        params=params,
+        cache_key=key,
+        status=ReportJobStatus.queued,
+        progress=0,
+        requested_by=requested_by
+    )
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+
+    _executor.submit(run_report_job, job.job_id)
+    return job
+
+
+def resume_report_jobs(db: Session) -> int:
+    """Resubmit jobs still queued (e.g. after a restart); returns how many"""
+    job_ids = [job_id for (job_id,) in db.query(ReportJob.job_id).filter(
+        ReportJob.status == ReportJobStatus.queued
+    ).all()]
+    for job_id in job_ids:
+        _executor.submit(run_report_job, job_id)
+    return len(job_ids)
+
+
+def result_path(key: str) -> str:
+    return os.path.join(REPORT_RESULTS_DIR, f"{key}.json")
+
+
+def _update_job(job_id: str, **values) -> None:
+    db = SessionLocal()
+    try:
+        db.query(ReportJob).filter(ReportJob.job_id == job_id).update(values, synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+
+def run_report_job(job_id: str) -> None:
+    """Worker body: claim a queued job, build the report and store the result"""
+    db = SessionLocal()
+    try:
+        # Claim atomically so a job resumed by two processes only runs once
+        claimed = db.query(ReportJob).filter(
+            ReportJob.job_id == job_id,
+            ReportJob.status == ReportJobStatus.queued
+        ).update({"status": ReportJobStatus.running, "started_at": datetime.now()}, synchronize_session=False)
+        db.commit()
+        if not claimed:
+            return
+
+        job = db.query(ReportJob).filter(ReportJob.job_id == job_id).first()
+        report_type, params, key = job.report_type, job.params, job.cache_key
+        db.commit()
+
+        last = [0]
+
+        def progress(percent: int) -> None:
+            # The job row is updated from its own session so the report keeps one read transaction
+            if percent > last[0]:
+                last[0] = percent
+                _update_job(job_id, progress=min(percent, 99))
+
+        report = REPORT_TYPES[report_type][2](db, params, progress)
+
+        path = result_path(key)
+        os.makedirs(REPORT_RESULTS_DIR, exist_ok=True)
+        temp_path = f"{path}.{job_id}.tmp"
+        with open(temp_path, "w") as f:
+            json.dump(jsonable_encoder(report), f)
+        os.replace(temp_path, path)
+
+        _update_job(
+            job_id,
+            status=ReportJobStatus.completed,
+            progress=100,
+            result_path=path,
+            completed_at=datetime.now()
+        )
+        print(f"✅ Report job {job_id} ({report_type}) completed")
+    except Exception as e:
+        db.rollback()
+        print(f"❌ ERROR: Report job {job_id} failed: {e}")
+        _update_job(job_id, status=ReportJobStatus.failed, error=str(e), completed_at=datetime.now())
+    finally:
+        db.close()
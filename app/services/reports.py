@@ -0,0 +1,307 @@
+# app/services/reports.py
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, Iterator, Optional
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from app.models.models import Order, Customer, Prescription, PharmacyInventory
+from app.services.sales_rollups import sales_totals, top_products, sales_by_date, sales_by_category
+from app.utils.export import iter_query
+
+# Optional callback reporting how far a report is, in percent
+Progress = Optional[Callable[[int], None]]
+
+
+def _report(progress: Progress, percent: int) -> None:
+    if progress:
+        progress(percent)
+
+
+# -------------------------------
+# SALES
+# -------------------------------
+
+def sales_report(db: Session, start_date: Optional[date], end_date: Optional[date], progress: Progress = None) -> Dict[str, Any]:
+    """Sales metrics read from the daily sales rollups"""
+    totals = sales_totals(db, start_date, end_date)
+    total_orders = totals["total_orders"]
+    average_order_value = totals["total_sales"] / total_orders if total_orders > 0 else 0
+    _report(progress, 25)
+
+    # Daily breakdown: the requested range, or the last 30 days
+    if start_date is None and end_date is None:
+        daily_start = (datetime.now() - timedelta(days=30)).date()
+    else:
+        daily_start = start_date
+
+    report = {
+        "total_sales": totals["total_sales"],
+        "total_orders": total_orders,
+        "average_order_value": float(average_order_value),
+        "top_products": top_products(db, start_date, end_date)
+    }
+    _report(progress, 50)
+    report["sales_by_date"] = sales_by_date(db, daily_start, end_date)
+    _report(progress, 75)
+    report["sales_by_category"] = sales_by_category(db, start_date, end_date)
+    _report(progress, 100)
+    return report
+
+
+# -------------------------------
+# INVENTORY
+# -------------------------------
+
+INVENTORY_FIELDS = [
+    "inventory_id", "product_id", "batch_number", "quantity_in_stock", "low_stock_threshold",
+    "expiry_date", "cost_price", "selling_price", "is_available", "days_until_expiry"
+]
+
+
+def inventory_query(db: Session, low_stock_only: bool = False, expiring_soon: bool = False, days: int = 30):
+    query = db.query(PharmacyInventory)
+
+    if low_stock_only:
+        query = query.filter(
+            PharmacyInventory.quantity_in_stock <= PharmacyInventory.low_stock_threshold
+        )
+
+    if expiring_soon:
+        threshold_date = datetime.now().date() + timedelta(days=days)
+        query = query.filter(
+            PharmacyInventory.expiry_date <= threshold_date,
+            PharmacyInventory.expiry_date >= datetime.now().date()
+        )
+    return query
+
+
+def inventory_row(item: PharmacyInventory, today: date) -> Dict[str, Any]:
+    return {
+        "inventory_id": item.inventory_id,
+        "product_id": item.product_id,
+        "batch_number": item.batch_number,
+        "quantity_in_stock": item.quantity_in_stock,
+        "low_stock_threshold": item.low_stock_threshold,
+        "expiry_date": item.expiry_date.isoformat(),
+        "cost_price": float(item.cost_price),
+        "selling_price": float(item.selling_price),
+        "is_available": item.is_available,
+        "days_until_expiry": (item.expiry_date - today).days
+    }
+
+
+def inventory_rows(db: Session, low_stock_only: bool = False, expiring_soon: bool = False, days: int = 30) -> Iterator[Dict[str, Any]]:
+    """Every matching batch, streamed with a server-side cursor"""
+    today = datetime.now().date()
+    query = inventory_query(db, low_stock_only, expiring_soon, days).order_by(PharmacyInventory.inventory_id)
+    for item in iter_query(query):
+        yield inventory_row(item, today)
+
+
+def inventory_report(
+    db: Session,
+    low_stock_only: bool = False,
+    expiring_soon: bool = False,
+    days: int = 30,
+    progress: Progress = None
+) -> Dict[str, Any]:
+    inventory_items = inventory_query(db, low_stock_only, expiring_soon, days).all()
+    _report(progress, 50)
+
+    # Calculate inventory value
+    total_inventory_value = db.query(
+        func.sum(PharmacyInventory.quantity_in_stock * PharmacyInventory.cost_price)
+    ).scalar() or 0
+
+    # Low stock count
+    low_stock_count = db.query(PharmacyInventory).filter(
+        PharmacyInventory.quantity_in_stock <= PharmacyInventory.low_stock_threshold
+    ).count()
+
+    # Expired items count
+    expired_count = db.query(PharmacyInventory).filter(
+        PharmacyInventory.expiry_date < datetime.now().date()
+    ).count()
+    _report(progress, 100)
+
+    return {
+        "total_inventory_items": len(inventory_items),
+        "total_inventory_value": float(total_inventory_value),
+        "low_stock_items": low_stock_count,
+        "expired_items": expired_count,
+        "inventory_details": [
+            inventory_row(item, datetime.now().date())
+            for item in inventory_items
+        ]
+    }
+
+
+# -------------------------------
+# CUSTOMERS
+# -------------------------------
+
+CUSTOMER_FIELDS = ["customer_id", "name", "email", "created_at", "order_count", "total_spent"]
+
+
+def customer_rows(db: Session) -> Iterator[Dict[str, Any]]:
+    """Every customer with their order totals, streamed with a server-side cursor"""
+    order_totals = db.query(
+        Order.customer_id.label('customer_id'),
+        func.count(Order.order_id).label('order_count'),
+        func.sum(Order.final_amount).label('total_spent')
+    ).group_by(Order.customer_id).subquery()
+
+    query = db.query(
+        Customer.customer_id,
+        Customer.first_name,
+        Customer.last_name,
+        Customer.email,
+        Customer.created_at,
+        order_totals.c.order_count,
+        order_totals.c.total_spent
+    ).outerjoin(order_totals, order_totals.c.customer_id == Customer.customer_id)\
+     .filter(Customer.role == "customer")\
+     .order_by(Customer.customer_id)
+
+    for row in iter_query(query):
+        yield {
+            "customer_id": row.customer_id,
+            "name": f"{row.first_name} {row.last_name}",
+            "email": row.email,
+            "created_at": row.created_at,
+            "order_count": row.order_count or 0,
+            "total_spent": float(row.total_spent or 0)
+        }
+
+
+def customer_report(db: Session, progress: Progress = None) -> Dict[str, Any]:
+    # Customer statistics
+    total_customers = db.query(Customer).filter(Customer.role == "customer").count()
+
+    # New customers (last 30 days)
+    thirty_days_ago = datetime.now() - timedelta(days=30)
+    new_customers = db.query(Customer).filter(
+        Customer.role == "customer",
+        Customer.created_at >= thirty_days_ago
+    ).count()
+
+    # Customers with orders
+    customers_with_orders = db.query(func.count(func.distinct(Order.customer_id))).scalar()
+    _report(progress, 30)
+
+    # Top customers by spending
+    top_customers = db.query(
+        Customer.customer_id,
+        Customer.first_name,
+        Customer.last_name,
+        Customer.email,
+        func.count(Order.order_id).label('order_count'),
+        func.sum(Order.final_amount).label('total_spent')
+    ).join(Order, Customer.customer_id == Order.customer_id)\
+     .group_by(Customer.customer_id, Customer.first_name, Customer.last_name, Customer.email)\
+     .order_by(func.sum(Order.final_amount).desc())\
+     .limit(10)\
+     .all()
+    _report(progress, 100)
+
+    return {
+        "total_customers": total_customers,
+        "new_customers_30_days": new_customers,
+        "customers_with_orders": customers_with_orders,
+        "customer_engagement_rate": round((customers_with_orders / total_customers * 100), 2) if total_customers > 0 else 0,
+        "top_customers": [
+            {
+                "customer_id": customer.customer_id,
+                "name": f"{customer.first_name} {customer.last_name}",
+                "email": customer.email,
+                "order_count": customer.order_count,
+                "total_spent": float(customer.total_spent or 0)
+            }
+            for customer in top_customers
+        ]
+    }
+
+
+# -------------------------------
+# PRESCRIPTIONS
+# -------------------------------
+
+PRESCRIPTION_FIELDS = ["prescription_id", "customer_id", "status", "uploaded_at", "verified_at", "processing_hours"]
+
+
+def prescription_rows(db: Session) -> Iterator[Dict[str, Any]]:
+    """Every prescription with its processing time, streamed with a server-side cursor"""
+    query = db.query(
+        Prescription.prescription_id,
+        Prescription.customer_id,
+        Prescription.status,
+        Prescription.uploaded_at,
+        Prescription.verified_at
+    ).order_by(Prescription.prescription_id)
+
+    for row in iter_query(query):
+        processing_hours = None
+        if row.verified_at and row.uploaded_at:
+            processing_hours = round((row.verified_at - row.uploaded_at).total_seconds() / 3600, 2)
+        yield {
+            "prescription_id": row.prescription_id,
+            "customer_id": row.customer_id,
+            "status": row.status,
+            "uploaded_at": row.uploaded_at,
+            "verified_at": row.verified_at,
+            "processing_hours": processing_hours
+        }
+
+
+def prescription_report(db: Session, progress: Progress = None) -> Dict[str, Any]:
+    # Prescription statistics
+    total_prescriptions = db.query(Prescription).count()
+
+    # Status distribution
+    status_counts = db.query(
+        Prescription.status,
+        func.count(Prescription.prescription_id).label('count')
+    ).group_by(Prescription.status).all()
+
+    # Approval rate
+    approved_count = db.query(Prescription).filter(Prescription.status == "approved").count()
+    approval_rate = round((approved_count / total_prescriptions * 100), 2) if total_prescriptions > 0 else 0
+    _report(progress, 30)
+
+    # Average processing time (for approved prescriptions)
+    processing_times = db.query(
+        func.avg(
+            func.extract('epoch', Prescription.verified_at - Prescription.uploaded_at) / 3600
+        )
+    ).filter(
+        Prescription.status == "approved",
+        Prescription.verified_at.isnot(None)
+    ).scalar() or 0
+    _report(progress, 60)
+
+    # Monthly trend (last 6 months)
+    six_months_ago = datetime.now() - timedelta(days=180)
+    monthly_trend = db.query(
+        func.date_trunc('month', Prescription.uploaded_at).label('month'),
+        func.count(Prescription.prescription_id).label('count')
+    ).filter(Prescription.uploaded_at >= six_months_ago)\
+     .group_by(func.date_trunc('month', Prescription.uploaded_at))\
+     .order_by(func.date_trunc('month', Prescription.uploaded_at))\
+     .all()
+    _report(progress, 100)
+
+    return {
+        "total_prescriptions": total_prescriptions,
+        "approval_rate": approval_rate,
+        "average_processing_hours": round(float(processing_times), 2),
+        "status_distribution": [
+            {"status": status, "count": count}
+            for status, count in status_counts
+        ],
+        "monthly_trend": [
+            {
+                "month": trend.month.strftime('%Y-%m'),
+                "prescription_count": trend.count
+            }
+            for trend in monthly_trend
+        ]
+    }
@@ -0,0 +1,252 @@
+# app/services/review_queue.py
+from datetime import datetime, timedelta
+from statistics import median
+from typing import Any, Dict, List, Optional
+from fastapi import HTTPException
+from sqlalchemy import and_, func, or_
+from sqlalchemy.orm import Session
+from app.models.models import Prescription, PrescriptionStatus, Customer
+from app.utils.loaders import entity_loader
+from config import REVIEW_LEASE_SECONDS, REVIEW_MAX_CLAIM
+
+# Pending prescriptions are worked as a queue. Those uploaded to unblock a
+# checkout come first, then the oldest. A reviewer claims items, which gives
+# them a lease for REVIEW_LEASE_SECONDS; nobody else can claim or verify an
+# item while its lease runs, and an abandoned lease simply expires.
+
+
+def _blocking():
+    return func.coalesce(Prescription.blocks_checkout, False)
+
+
+def queue_order():
+    """Queue priority: blocking a checkout first, then oldest"""
+    return (_blocking().desc(), Prescription.uploaded_at.asc(), Prescription.prescription_id.asc())
+
+
+def _claimable(now: datetime):
+    return and_(
+        Prescription.status == PrescriptionStatus.pending,
+        or_(
+            Prescription.claimed_by.is_(None),
+            Prescription.claim_expires_at.is_(None),
+            Prescription.claim_expires_at <= now
+        )
+    )
+
+
+def _held_by(reviewer_id: int, now: datetime):
+    return and_(
+        Prescription.status == PrescriptionStatus.pending,
+        Prescription.claimed_by == reviewer_id,
+        Prescription.claim_expires_at > now
+    )
+
+
+def is_claimed_by_other(prescription: Prescription, reviewer_id: int, now: Optional[datetime] = None) -> bool:
+    now = now or datetime.now()
+    return bool(
+        prescription.claimed_by
+        and prescription.claimed_by != reviewer_id
+        and prescription.claim_expires_at
+        and prescription.claim_expires_at > now
+    )
+
+
+def claim_next(db: Session, reviewer_id: int, count: int = 1) -> List[Prescription]:
+    """
+    Lease up to `count` prescriptions to a reviewer, including the ones they
+    already hold. Rows being claimed by a concurrent reviewer are skipped
+    (FOR UPDATE SKIP LOCKED) rather than waited for, so two reviewers never
+    get the same item.
+    """
+    count = max(1, min(count, REVIEW_MAX_CLAIM))
+    now = datetime.now()
+    expires_at = now + timedelta(seconds=REVIEW_LEASE_SECONDS)
+
+    held = db.query(Prescription).filter(_held_by(reviewer_id, now))\
+        .order_by(*queue_order()).limit(count)\
+        .with_for_update(skip_locked=True).populate_existing().all()
+
+    claimed = []
+    if len(held) < count:
+        claimed = db.query(Prescription).filter(_claimable(now))\
+            .order_by(*queue_order()).limit(count - len(held))\
+            .with_for_update(skip_locked=True).populate_existing().all()
+
+    for prescription in claimed:
+        prescription.claimed_by = reviewer_id
+        prescription.claimed_at = now
+    for prescription in held + claimed:
+        prescription.claim_expires_at = expires_at
+
+    db.commit()
+    return held + claimed
+
+
+def _held_prescription(db: Session, prescription_id: int, reviewer_id: int) -> Prescription:
+    prescription = db.query(Prescription).filter(
+        Prescription.prescription_id == prescription_id
+    ).with_for_update().first()
+    if not prescription:
+        raise HTTPException(status_code=404, detail="Prescription not found")
+    held = (
+        prescription.status == PrescriptionStatus.pending
+        and prescription.claimed_by == reviewer_id
+        and prescription.claim_expires_at
+        and prescription.claim_expires_at > datetime.now()
+    )
+    if not held:
+        raise HTTPException(status_code=409, detail="You do not hold a claim on this prescription")
+    return prescription
+
+
+def renew_claim(db: Session, prescription_id: int, reviewer_id: int) -> Prescription:
+    """Extend a reviewer's lease while they are still working on it"""
+    prescription = _held_prescription(db, prescription_id, reviewer_id)
+    prescription.claim_expires_at = datetime.now() + timedelta(seconds=REVIEW_LEASE_SECONDS)
+    db.commit()
+    return prescription
+
+
+def release_claim(db: Session, prescription_id: int, reviewer_id: int) -> None:
+    """Hand a claimed prescription back to the queue unverified"""
+    prescription = _held_prescription(db, prescription_id, reviewer_id)
+    prescription.claimed_by = None
+    prescription.claimed_at = None
+    prescription.claim_expires_at = None
+    db.commit()
+
+
+def end_claim(prescription: Prescription, verifier_id: int) -> None:
+    """
+    End the claim on a prescription that has just been verified. The
+    claimant and claim time are kept only when the verifier held the claim,
+    so handling time is never measured from someone else's claim.
+    """
+    if prescription.claimed_by != verifier_id:
+        prescription.claimed_by = None
+        prescription.claimed_at = None
+    prescription.claim_expires_at = None
+
+
+def queue_entries(db: Session, prescriptions: List[Prescription], now: Optional[datetime] = None) -> List[Dict[str, Any]]:
+    """Queue view of prescriptions with their customer, loaded in one query"""
+    now = now or datetime.now()
+    customers = entity_loader(db, Customer).get_many([p.customer_id for p in prescriptions])
+
+    entries = []
+    for position, prescription in enumerate(prescriptions, start=1):
+        customer = customers.get(prescription.customer_id)
+        claimed = bool(prescription.claimed_by and prescription.claim_expires_at and prescription.claim_expires_at > now)
+        entries.append({
+            "position": position,
+            "prescription_id": prescription.prescription_id,
+            "customer_id": prescription.customer_id,
+            "customer_name": f"{customer.first_name} {customer.last_name}" if customer else "Unknown",
+            "status": prescription.status,
+            "blocks_checkout": bool(prescription.blocks_checkout),
+            "uploaded_at": prescription.uploaded_at,
+            "waiting_minutes": round((now - prescription.uploaded_at).total_seconds() / 60, 1) if prescription.uploaded_at else None,
+            "claimed_by": prescription.claimed_by if claimed else None,
+            "claim_expires_at": prescription.claim_expires_at if claimed else None
+        })
+    return entries
+
+
+def pending_queue(db: Session, limit: int = 50) -> List[Prescription]:
+    return db.query(Prescription).filter(
+        Prescription.status == PrescriptionStatus.pending
+    ).order_by(*queue_order()).limit(limit).all()
+
+
+def _minutes(start: Optional[datetime], end: Optional[datetime]) -> Optional[float]:
+    if start is None or end is None:
+        return None
+    return (end - start).total_seconds() / 60
+
+
+def _summary(values: List[float]) -> Dict[str, Optional[float]]:
+    if not values:
+        return {"median": None, "average": None}
+    return {"median": round(median(values), 1), "average": round(sum(values) / len(values), 1)}
+
+
+def queue_metrics(db: Session, hours: int = 24) -> Dict[str, Any]:
+    """Queue depth and, per reviewer, throughput and verification times over the last `hours`"""
+    now = datetime.now()
+    since = now - timedelta(hours=hours)
+
+    depth = db.query(
+        func.count(),
+        func.count().filter(_blocking() == True),
+        func.count().filter(Prescription.claim_expires_at > now),
+        func.count().filter(and_(Prescription.claimed_by.isnot(None), Prescription.claim_expires_at <= now)),
+        func.min(Prescription.uploaded_at)
+    ).filter(Prescription.status == PrescriptionStatus.pending).one()
+
+    verified = db.query(
+        Prescription.verified_by,
+        Prescription.status,
+        Prescription.blocks_checkout,
+        Prescription.uploaded_at,
+        Prescription.claimed_by,
+        Prescription.claimed_at,
+        Prescription.verified_at
+    ).filter(
+        Prescription.verified_at >= since,
+        Prescription.verified_by.isnot(None)
+    ).all()
+
+    reviewers: Dict[int, Dict[str, Any]] = {}
+    all_verify_times, blocking_verify_times = [], []
+    for row in verified:
+        stats = reviewers.setdefault(row.verified_by, {"verified": 0, "approved": 0, "rejected": 0, "verify": [], "handle": []})
+        stats["verified"] += 1
+        status = getattr(row.status, "value", row.status)
+        if status in ("approved", "rejected"):
+            stats[status] += 1
+
+        verify_minutes = _minutes(row.uploaded_at, row.verified_at)
+        if verify_minutes is not None:
+            stats["verify"].append(verify_minutes)
+            all_verify_times.append(verify_minutes)
+            if row.blocks_checkout:
+                blocking_verify_times.append(verify_minutes)
+        # Time from the reviewer's own claim to the decision
+        if row.claimed_by != row.verified_by:
+            continue
+        handle_minutes = _minutes(row.claimed_at, row.verified_at)
+        if handle_minutes is not None and handle_minutes >= 0:
+            stats["handle"].append(handle_minutes)
+
+    names = {
+        customer_id: f"{customer.first_name} {customer.last_name}"
+        for customer_id, customer in entity_loader(db, Customer).get_many(reviewers).items()
+    }
+
+    return {
+        "window_hours": hours,
+        "queue": {
+            "pending": depth[0],
+            "blocking_checkout": depth[1],
+            "claimed": depth[2],
+            "expired_claims": depth[3],
+            "oldest_pending_minutes": round(_minutes(depth[4], now), 1) if depth[4] else None
+        },
+        "time_to_verify_minutes": _summary(all_verify_times),
+        "blocking_time_to_verify_minutes": _summary(blocking_verify_times),
+        "reviewers": sorted([
+            {
+                "reviewer_id": reviewer_id,
+                "name": names.get(reviewer_id, "Unknown"),
+                "verified": stats["verified"],
+                "approved": stats["approved"],
+                "rejected": stats["rejected"],
+                "per_hour": round(stats["verified"] / hours, 2),
+                "time_to_verify_minutes": _summary(stats["verify"]),
+                "handling_minutes": _summary(stats["handle"])
+            }
+            for reviewer_id, stats in reviewers.items()
+        ], key=lambda r: -r["verified"])
+    }
@@ -0,0 +1,279 @@
+# app/services/sales_rollups.py
+import argparse
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from typing import Any, Dict, Iterator, List, Optional
+from sqlalchemy import Date, func
+from sqlalchemy.orm import Session
+from app.models.models import (
+    Order, OrderItem, Product, Category,
+    DailySalesRollup, DailyProductSalesRollup, DailyCategorySalesRollup
+)
+from app.utils.export import iter_query
+from app.utils.upsert import upsert
+
+CANCELLED = "cancelled"
+
+
+def counts_in_sales(status: Optional[str]) -> bool:
+    """Whether an order with this status belongs in the sales rollups"""
+    return status != CANCELLED
+
+
+# -------------------------------
+# INCREMENTAL UPDATES
+# -------------------------------
+
+def add_order_to_rollups(db: Session, order: Order) -> None:
+    """Add an order to the rollups of its day (call in the order's transaction)"""
+    _apply_order(db, order, 1)
+
+
+def remove_order_from_rollups(db: Session, order: Order) -> None:
+    """Take an order back out of the rollups, e.g. when it is cancelled"""
+    _apply_order(db, order, -1)
+
+
+def _apply_order(db: Session, order: Order, sign: int) -> None:
+    db.flush()
+    items = db.query(OrderItem.product_id, Product.category_id, OrderItem.quantity, OrderItem.subtotal)\
+        .join(Product, Product.product_id == OrderItem.product_id)\
+        .filter(OrderItem.order_id == order.order_id)\
+        .all()
+
+    sales_date = order.order_date.date()
+    by_product: Dict[int, list] = {}
+    by_category: Dict[int, list] = {}
+    for product_id, category_id, quantity, subtotal in items:
+        for totals, key in ((by_product, product_id), (by_category, category_id)):
+            entry = totals.setdefault(key, [0, Decimal(0)])
+            entry[0] += quantity
+            entry[1] += subtotal
+
+    # Increments are atomic upserts, so concurrent orders of the same day never lose updates
+    upsert(db, DailySalesRollup, [{
+        "sales_date": sales_date,
+        "order_count": sign,
+        "items_sold": sign * sum(quantity for _, _, quantity, _ in items),
+        "gross_sales": sign * order.final_amount
+    }], ["sales_date"], ["order_count", "items_sold", "gross_sales"], increment=True)
+    upsert(db, DailyProductSalesRollup, [
+        {"sales_date": sales_date, "product_id": product_id, "quantity": sign * quantity, "revenue": sign * revenue}
+        for product_id, (quantity, revenue) in by_product.items()
+    ], ["sales_date", "product_id"], ["quantity", "revenue"], increment=True)
+    upsert(db, DailyCategorySalesRollup, [
+        {"sales_date": sales_date, "category_id": category_id, "quantity": sign * quantity, "revenue": sign * revenue}
+        for category_id, (quantity, revenue) in by_category.items()
+    ], ["sales_date", "category_id"], ["quantity", "revenue"], increment=True)
+
+
+# -------------------------------
+# BACKFILL
+# -------------------------------
+
+def rebuild_sales_rollups(db: Session, start_date: Optional[date] = None, end_date: Optional[date] = None) -> int:
+    """
+    Recompute the rollups of every day in [start_date, end_date] from the
+    orders (whole history when a bound is missing). Returns the number of
+    days with sales. Orders written for those days while it runs can make
+    it fail; rebuild past days, or run it when the shop is quiet.
+    """
+    if start_date is None or end_date is None:
+        first, last = db.query(func.min(Order.order_date), func.max(Order.order_date)).one()
+        if first is None:
+            return 0
+        start_date = start_date or first.date()
+        end_date = end_date or last.date()
+
+    for model in (DailySalesRollup, DailyProductSalesRollup, DailyCategorySalesRollup):
+        db.query(model).filter(model.sales_date >= start_date, model.sales_date <= end_date)\
+            .delete(synchronize_session=False)
+
+    sales_date = func.date(Order.order_date, type_=Date).label('sales_date')
+    in_range = (
+        Order.order_date >= datetime.combine(start_date, time.min),
+        Order.order_date < datetime.combine(end_date + timedelta(days=1), time.min),
+        Order.status != CANCELLED
+    )
+
+    daily = db.query(
+        sales_date,
+        func.count(Order.order_id).label('order_count'),
+        func.sum(Order.final_amount).label('gross_sales')
+    ).filter(*in_range).group_by(sales_date).all()
+
+    items = db.query(
+        sales_date,
+        OrderItem.product_id,
+        Product.category_id,
+        func.sum(OrderItem.quantity).label('quantity'),
+        func.sum(OrderItem.subtotal).label('revenue')
+    ).join(Order, Order.order_id == OrderItem.order_id)\
+     .join(Product, Product.product_id == OrderItem.product_id)\
+     .filter(*in_range)\
+     .group_by(sales_date, OrderItem.product_id, Product.category_id)\
+     .all()
+
+    items_sold: Dict[date, int] = {}
+    by_category: Dict[tuple, list] = {}
+    for row in items:
+        items_sold[row.sales_date] = items_sold.get(row.sales_date, 0) + row.quantity
+        entry = by_category.setdefault((row.sales_date, row.category_id), [0, Decimal(0)])
+        entry[0] += row.quantity
+        entry[1] += row.revenue
+
+    db.bulk_insert_mappings(DailySalesRollup, [
+        {
+            "sales_date": row.sales_date,
+            "order_count": row.order_count,
+            "items_sold": items_sold.get(row.sales_date, 0),
+            "gross_sales": row.gross_sales or 0
+        }
+        for row in daily
+    ])
+    db.bulk_insert_mappings(DailyProductSalesRollup, [
+        {"sales_date": row.sales_date, "product_id": row.product_id, "quantity": row.quantity, "revenue": row.revenue}
+        for row in items
+    ])
+    db.bulk_insert_mappings(DailyCategorySalesRollup, [
+        {"sales_date": day, "category_id": category_id, "quantity": quantity, "revenue": revenue}
+        for (day, category_id), (quantity, revenue) in by_category.items()
+    ])
+    db.commit()
+    return len(daily)
+
+
+def ensure_sales_rollups(db: Session) -> int:
+    """Build the rollups from the whole order history if they are empty"""
+    if db.query(DailySalesRollup.sales_date).first() is not None:
+        return 0
+    return rebuild_sales_rollups(db)
+
+
+# -------------------------------
+# REPORT QUERIES
+# -------------------------------
+
+def _between(model, start_date: Optional[date], end_date: Optional[date]):
+    conditions = []
+    if start_date:
+        conditions.append(model.sales_date >= start_date)
+    if end_date:
+        conditions.append(model.sales_date <= end_date)
+    return conditions
+
+
+def sales_totals(db: Session, start_date: Optional[date], end_date: Optional[date]) -> Dict[str, Any]:
+    row = db.query(
+        func.coalesce(func.sum(DailySalesRollup.order_count), 0).label('order_count'),
+        func.coalesce(func.sum(DailySalesRollup.gross_sales), 0).label('gross_sales')
+    ).filter(*_between(DailySalesRollup, start_date, end_date)).one()
+    return {"total_orders": int(row.order_count), "total_sales": float(row.gross_sales)}
+
+
+def top_products(db: Session, start_date: Optional[date], end_date: Optional[date], limit: int = 10) -> List[Dict[str, Any]]:
+    rows = db.query(
+        Product.name,
+        func.sum(DailyProductSalesRollup.quantity).label('total_quantity'),
+        func.sum(DailyProductSalesRollup.revenue).label('total_revenue')
+    ).join(Product, Product.product_id == DailyProductSalesRollup.product_id)\
+     .filter(*_between(DailyProductSalesRollup, start_date, end_date))\
+     .group_by(Product.product_id, Product.name)\
+     .having(func.sum(DailyProductSalesRollup.quantity) > 0)\
+     .order_by(func.sum(DailyProductSalesRollup.revenue).desc())\
+     .limit(limit)\
+     .all()
+    return [
+        {
+            "product_name": row.name,
+            "total_quantity": int(row.total_quantity),
+            "total_revenue": float(row.total_revenue)
+        }
+        for row in rows
+    ]
+
+
+def sales_by_date(db: Session, start_date: Optional[date], end_date: Optional[date]) -> List[Dict[str, Any]]:
+    rows = db.query(DailySalesRollup)\
+        .filter(*_between(DailySalesRollup, start_date, end_date), DailySalesRollup.order_count > 0)\
+        .order_by(DailySalesRollup.sales_date)\
+        .all()
+    return [
+        {
+            "date": row.sales_date.isoformat(),
+            "order_count": row.order_count,
+            "daily_sales": float(row.gross_sales or 0)
+        }
+        for row in rows
+    ]
+
+
+def sales_by_category(db: Session, start_date: Optional[date], end_date: Optional[date]) -> List[Dict[str, Any]]:
+    rows = db.query(
+        Category.category_id,
+        Category.name,
+        func.sum(DailyCategorySalesRollup.quantity).label('total_quantity'),
+        func.sum(DailyCategorySalesRollup.revenue).label('total_revenue')
+    ).join(Category, Category.category_id == DailyCategorySalesRollup.category_id)\
+     .filter(*_between(DailyCategorySalesRollup, start_date, end_date))\
+     .group_by(Category.category_id, Category.name)\
+     .having(func.sum(DailyCategorySalesRollup.quantity) > 0)\
+     .order_by(func.sum(DailyCategorySalesRollup.revenue).desc())\
+     .all()
+    return [
+        {
+            "category_id": row.category_id,
+            "category_name": row.name,
+            "total_quantity": int(row.total_quantity),
+            "total_revenue": float(row.total_revenue)
+        }
+        for row in rows
+    ]
+
+
+PRODUCT_SALES_FIELDS = ["date", "product_id", "product_name", "category_name", "quantity", "revenue"]
+
+
+def product_sales_rows(db: Session, start_date: Optional[date], end_date: Optional[date]) -> Iterator[Dict[str, Any]]:
+    """
+    Quantity and revenue per product per day, oldest first, streamed with a
+    server-side cursor
+    """
+    query = db.query(
+        DailyProductSalesRollup.sales_date,
+        DailyProductSalesRollup.product_id,
+        Product.name,
+        Category.name.label('category_name'),
+        DailyProductSalesRollup.quantity,
+        DailyProductSalesRollup.revenue
+    ).join(Product, Product.product_id == DailyProductSalesRollup.product_id)\
+     .outerjoin(Category, Category.category_id == Product.category_id)\
+     .filter(*_between(DailyProductSalesRollup, start_date, end_date), DailyProductSalesRollup.quantity > 0)\
+     .order_by(DailyProductSalesRollup.sales_date, DailyProductSalesRollup.product_id)
+
+    for row in iter_query(query):
+        yield {
+            "date": row.sales_date,
+            "product_id": row.product_id,
+            "product_name": row.name,
+            "category_name": row.category_name,
+            "quantity": row.quantity,
+            "revenue": row.revenue
+        }
+
+
+if __name__ == "__main__":
+    # Backfill: python -m app.services.sales_rollups [--start YYYY-MM-DD] [--end YYYY-MM-DD]
+    from app.database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Rebuild the daily sales rollups from the orders")
+    parser.add_argument("--start", type=date.fromisoformat, help="first day to rebuild (default: first order)")
+    parser.add_argument("--end", type=date.fromisoformat, help="last day to rebuild (default: last order)")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        days = rebuild_sales_rollups(db, args.start, args.end)
+        print(f"✅ Rebuilt sales rollups ({days} days with sales)")
+    finally:
+        db.close()
@@ -0,0 +1,202 @@
+# app/services/stock_allocator.py
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Dict, List, Optional
+from fastapi import HTTPException
+from sqlalchemy import case, func, update
+from sqlalchemy.orm import Session
+from app.models.models import PharmacyInventory, StockReservation, ReservationStatus
+
+
+@dataclass
+class BatchAllocation:
+    inventory_id: int
+    product_id: int
+    batch_number: str
+    expiry_date: date
+    quantity: int
+
+
+def lock_sellable_batches(db: Session, product_ids: List[int]) -> Dict[int, List[PharmacyInventory]]:
+    """
+    Lock the sellable batches of the given products, grouped by product_id in
+    first-expiry-first-out order.
+
+    Expired, unavailable and empty batches are skipped. Rows are locked in
+    (product_id, expiry_date, inventory_id) order, the same order for every
+    checkout, so concurrent checkouts wait on each other instead of
+    deadlocking.
+    """
+    if not product_ids:
+        return {}
+
+    batches = db.query(PharmacyInventory).filter(
+        PharmacyInventory.product_id.in_(product_ids),
+        PharmacyInventory.is_available == True,
+        PharmacyInventory.quantity_in_stock > 0,
+        PharmacyInventory.expiry_date >= date.today()
+    ).order_by(
+        PharmacyInventory.product_id,
+        PharmacyInventory.expiry_date,
+        PharmacyInventory.inventory_id
+    ).with_for_update().populate_existing().all()
+
+    grouped: Dict[int, List[PharmacyInventory]] = {}
+    for batch in batches:
+        grouped.setdefault(batch.product_id, []).append(batch)
+    return grouped
+
+
+def held_quantities(
+    db: Session,
+    inventory_ids: List[int],
+    exclude_customer_id: Optional[int] = None
+) -> Dict[int, int]:
+    """
+    Sum the active, unexpired reservation holds per batch (inventory_id -> quantity),
+    optionally ignoring the holds of one customer
+    """
+    if not inventory_ids:
+        return {}
+
+    query = db.query(
+        StockReservation.inventory_id,
+        func.sum(StockReservation.quantity)
+    ).filter(
+        StockReservation.inventory_id.in_(inventory_ids),
+        StockReservation.status == ReservationStatus.active,
+        StockReservation.expires_at > datetime.now()
+    )
+    if exclude_customer_id is not None:
+        query = query.filter(StockReservation.customer_id != exclude_customer_id)
+
+    return {inventory_id: int(quantity) for inventory_id, quantity in query.group_by(StockReservation.inventory_id)}
+
+
+def allocate_fefo(
+    db: Session,
+    demands: Dict[int, int],
+    product_names: Optional[Dict[int, str]] = None,
+    customer_id: Optional[int] = None
+) -> Dict[int, List[BatchAllocation]]:
+    """
+    Split the requested quantity of each product across its batches,
+    earliest expiry first.
+
+    `demands` maps product_id -> quantity. All batches of the products are
+    locked in one pass, so a concurrent checkout of the same products waits
+    for this transaction and then sees the stock it left.
+
+    Quantities held by other customers' active reservations are not
+    allocatable; the holds of `customer_id` itself are.
+    """
+    product_names = product_names or {}
+    batches_by_product = lock_sellable_batches(db, list(demands.keys()))
+    held = _held_for(db, batches_by_product, customer_id)
+
+    allocations: Dict[int, List[BatchAllocation]] = {}
+    for product_id, quantity in demands.items():
+        batches = batches_by_product.get(product_id, [])
+        name = product_names.get(product_id, f"product {product_id}")
+
+        available = _total(batches, held)
+        if available == 0:
+            raise HTTPException(status_code=400, detail=f"Product {name} is out of stock")
+        if available < quantity:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Only {available} items available for {name}, but {quantity} requested"
+            )
+
+        remaining = quantity
+        allocations[product_id] = []
+        for batch in batches:
+            if remaining == 0:
+                break
+            take = min(batch.quantity_in_stock - held.get(batch.inventory_id, 0), remaining)
+            if take <= 0:
+                continue
+            allocations[product_id].append(BatchAllocation(
+                inventory_id=batch.inventory_id,
+                product_id=product_id,
+                batch_number=batch.batch_number,
+                expiry_date=batch.expiry_date,
+                quantity=take
+            ))
+            remaining -= take
+
+    return allocations
+
+
+def decrement_stock(db: Session, allocations: Dict[int, int]) -> Dict[int, int]:
+    """
+    Decrement stock for several batches with one conditional UPDATE.
+
+    `allocations` maps inventory_id -> quantity to take. A batch is only
+    decremented while it still holds at least that quantity; if any batch
+    was drained by a concurrent checkout the whole order is rejected.
+    Returns inventory_id -> remaining quantity.
+    """
+    if not allocations:
+        return {}
+
+    delta = case(allocations, value=PharmacyInventory.inventory_id)
+    result = db.execute(
+        update(PharmacyInventory)
+        .where(
+            PharmacyInventory.inventory_id.in_(list(allocations.keys())),
+            PharmacyInventory.quantity_in_stock >= delta
+        )
+        .values(
+            quantity_in_stock=PharmacyInventory.quantity_in_stock - delta,
+            is_available=PharmacyInventory.quantity_in_stock - delta > 0
+        )
+        .returning(PharmacyInventory.inventory_id, PharmacyInventory.quantity_in_stock)
+        .execution_options(synchronize_session=False)
+    )
+    remaining = {row.inventory_id: row.quantity_in_stock for row in result}
+
+    if len(remaining) != len(allocations):
+        raise HTTPException(
+            status_code=409,
+            detail="Stock changed while placing the order. Please review your cart and try again."
+        )
+
+    return remaining
+
+
+def restore_stock(db: Session, allocations: Dict[int, int]) -> None:
+    """
+    Put quantities back into their batches (inventory_id -> quantity) with
+    one UPDATE, making the batches available again unless they have expired
+    """
+    if not allocations:
+        return
+
+    delta = case(allocations, value=PharmacyInventory.inventory_id)
+    db.execute(
+        update(PharmacyInventory)
+        .where(PharmacyInventory.inventory_id.in_(list(allocations.keys())))
+        .values(
+            quantity_in_stock=PharmacyInventory.quantity_in_stock + delta,
+            is_available=case(
+                (PharmacyInventory.expiry_date >= date.today(), True),
+                else_=PharmacyInventory.is_available
+            )
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+
+def _held_for(
+    db: Session,
+    batches_by_product: Dict[int, List[PharmacyInventory]],
+    customer_id: Optional[int]
+) -> Dict[int, int]:
+    inventory_ids = [batch.inventory_id for batches in batches_by_product.values() for batch in batches]
+    return held_quantities(db, inventory_ids, exclude_customer_id=customer_id)
+
+
+def _total(batches: Optional[List[PharmacyInventory]], held: Optional[Dict[int, int]] = None) -> int:
+    held = held or {}
+    return sum(max(batch.quantity_in_stock - held.get(batch.inventory_id, 0), 0) for batch in batches or [])
@@ -0,0 +1,129 @@
+# app/services/stock_projection.py
+import threading
+from datetime import date
+from typing import Iterable, Optional
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from app.database import SessionLocal
+from app.models.models import PharmacyInventory, Product, ProductStockProjection
+from app.utils.upsert import upsert
+from config import STOCK_PROJECTION_REFRESH_SECONDS
+
+
+def sellable_stock_subquery(db: Session):
+    """
+    Per-product totals over available, unexpired batches with stock:
+    (product_id, quantity, nearest_expiry, low_stock_threshold, batch_count)
+    """
+    return db.query(
+        PharmacyInventory.product_id.label('product_id'),
+        func.sum(PharmacyInventory.quantity_in_stock).label('quantity'),
+        func.min(PharmacyInventory.expiry_date).label('nearest_expiry'),
+        func.max(PharmacyInventory.low_stock_threshold).label('low_stock_threshold'),
+        func.count(PharmacyInventory.inventory_id).label('batch_count')
+    ).filter(
+        PharmacyInventory.is_available == True,
+        PharmacyInventory.quantity_in_stock > 0,
+        PharmacyInventory.expiry_date >= date.today()
+    ).group_by(PharmacyInventory.product_id).subquery()
+
+
+def refresh_stock_projection(db: Session, product_ids: Iterable[int]) -> None:
+    """
+    Recompute the projection rows of the given products from their batches.
+
+    Call it in the same transaction as the inventory write, after the
+    batches have been changed. Existing rows are locked in product order
+    first, so concurrent refreshes of a product apply one after the other
+    and the last one sees every committed change.
+    """
+    product_ids = sorted(set(product_ids))
+    if not product_ids:
+        return
+
+    db.flush()
+    db.query(ProductStockProjection.product_id)\
+      .filter(ProductStockProjection.product_id.in_(product_ids))\
+      .order_by(ProductStockProjection.product_id)\
+      .with_for_update()\
+      .all()
+
+    stock = sellable_stock_subquery(db)
+    rows = db.query(stock).filter(stock.c.product_id.in_(product_ids)).all()
+    upsert(
+        db, ProductStockProjection, _projection_values(product_ids, rows), ["product_id"],
+        ["quantity", "nearest_expiry", "low_stock", "batch_count", "refreshed_at"]
+    )
+
+
+def rebuild_stock_projection(db: Session, chunk_size: int = 500) -> int:
+    """
+    Recompute the projection of every product, one committed chunk at a
+    time. Returns the number of products refreshed.
+    """
+    product_ids = [product_id for (product_id,) in db.query(Product.product_id).order_by(Product.product_id).all()]
+    for start in range(0, len(product_ids), chunk_size):
+        refresh_stock_projection(db, product_ids[start:start + chunk_size])
+        db.commit()
+    return len(product_ids)
+
+
+def _projection_values(product_ids, rows):
+    totals = {row.product_id: row for row in rows}
+    values = []
+    for product_id in product_ids:
+        row = totals.get(product_id)
+        quantity = int(row.quantity) if row else 0
+        values.append({
+            "product_id": product_id,
+            "quantity": quantity,
+            "nearest_expiry": row.nearest_expiry if row else None,
+            "low_stock": bool(row) and quantity <= (row.low_stock_threshold or 0),
+            "batch_count": int(row.batch_count) if row else 0,
+            "refreshed_at": func.now()
+        })
+    return values
+
+
+class StockProjectionRefresher:
+    """
+    Background thread that periodically rebuilds the whole projection, so
+    batches that expire without any write drop out of it
+    """
+
+    def __init__(self, interval_seconds: int = STOCK_PROJECTION_REFRESH_SECONDS):
+        self.interval_seconds = interval_seconds
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="stock-projection-refresher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def refresh_once(self) -> int:
+        db = SessionLocal()
+        try:
+            return rebuild_stock_projection(db)
+        except Exception as e:
+            db.rollback()
+            print(f"❌ ERROR rebuilding stock projection: {str(e)}")
+            return 0
+        finally:
+            db.close()
+
+    def _run(self):
+        # Rebuild on startup too, for databases that predate the projection
+        self.refresh_once()
+        while not self._stop.wait(self.interval_seconds):
+            self.refresh_once()
+
+
+stock_projection_refresher = StockProjectionRefresher()
@@ -0,0 +1,187 @@
+# app/services/stock_reservations.py
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from fastapi import HTTPException
+from sqlalchemy import case, func, select, update
+from sqlalchemy.orm import Session
+from app.database import SessionLocal
+from app.models.models import ProductStockProjection, StockReservation, ReservationStatus
+from app.services.checkout_service import load_cart_lines
+from app.services.stock_allocator import allocate_fefo
+from config import RESERVATION_TTL_MINUTES, RESERVATION_SWEEP_INTERVAL_SECONDS
+
+
+def available_to_promise_subquery(exclude_customer_id: Optional[int] = None):
+    """
+    Subquery of stock available to promise per product (product_id, quantity):
+    sellable stock from the stock projection minus active holds. It needs no
+    session, so sync and async queries can both join it.
+
+    Holds of `exclude_customer_id` are not subtracted, so a customer can
+    always see and buy what they reserved themselves.
+    """
+    stock = select(
+        ProductStockProjection.product_id.label('product_id'),
+        ProductStockProjection.quantity.label('quantity')
+    ).where(ProductStockProjection.quantity > 0).subquery()
+
+    holds = select(
+        StockReservation.product_id.label('product_id'),
+        func.sum(StockReservation.quantity).label('quantity')
+    ).where(
+        StockReservation.status == ReservationStatus.active,
+        StockReservation.expires_at > datetime.now()
+    )
+    if exclude_customer_id is not None:
+        holds = holds.where(StockReservation.customer_id != exclude_customer_id)
+    holds = holds.group_by(StockReservation.product_id).subquery()
+
+    available = stock.c.quantity - func.coalesce(holds.c.quantity, 0)
+    return select(
+        stock.c.product_id.label('product_id'),
+        case((available > 0, available), else_=0).label('quantity')
+    ).outerjoin(holds, holds.c.product_id == stock.c.product_id).subquery()
+
+
+def available_to_promise(
+    db: Session,
+    product_ids: List[int],
+    exclude_customer_id: Optional[int] = None
+) -> Dict[int, int]:
+    """
+    Stock available to promise for the given products (product_id -> quantity)
+    """
+    if not product_ids:
+        return {}
+
+    atp = available_to_promise_subquery(exclude_customer_id)
+    rows = db.query(atp.c.product_id, atp.c.quantity).filter(atp.c.product_id.in_(product_ids)).all()
+
+    available = {product_id: 0 for product_id in product_ids}
+    available.update({product_id: int(quantity) for product_id, quantity in rows})
+    return available
+
+
+def release_customer_holds(
+    db: Session,
+    customer_id: int,
+    status: ReservationStatus = ReservationStatus.released,
+    order_id: Optional[int] = None
+) -> int:
+    """
+    Close every active hold of a customer, either releasing it or marking it
+    consumed by an order. Returns the number of holds closed.
+    """
+    result = db.execute(
+        update(StockReservation)
+        .where(
+            StockReservation.customer_id == customer_id,
+            StockReservation.status == ReservationStatus.active
+        )
+        .values(status=status, order_id=order_id, released_at=datetime.now())
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount
+
+
+def reserve_cart(db: Session, customer_id: int) -> List[StockReservation]:
+    """
+    Place holds on the batches needed for the customer's current cart.
+
+    Any previous holds of the customer are released first. Batches are
+    allocated FEFO under row locks, so two customers can never hold the
+    same units.
+    """
+    cart_lines = load_cart_lines(db, customer_id)
+    if not cart_lines:
+        raise HTTPException(status_code=400, detail="Cart is empty")
+
+    demands: Dict[int, int] = {}
+    names: Dict[int, str] = {}
+    for cart_item, product in cart_lines:
+        if product is None:
+            raise HTTPException(status_code=400, detail=f"Product not found for cart item {cart_item.cart_item_id}")
+        demands[product.product_id] = demands.get(product.product_id, 0) + cart_item.quantity
+        names[product.product_id] = product.name
+
+    release_customer_holds(db, customer_id)
+    allocations = allocate_fefo(db, demands, names, customer_id=customer_id)
+
+    expires_at = datetime.now() + timedelta(minutes=RESERVATION_TTL_MINUTES)
+    holds = [
+        StockReservation(
+            inventory_id=allocation.inventory_id,
+            product_id=allocation.product_id,
+            customer_id=customer_id,
+            quantity=allocation.quantity,
+            status=ReservationStatus.active,
+            expires_at=expires_at
+        )
+        for product_allocations in allocations.values()
+        for allocation in product_allocations
+    ]
+    db.add_all(holds)
+    db.flush()
+    return holds
+
+
+def expire_stale_holds(db: Session) -> int:
+    """
+    Mark active holds whose expiry has passed as expired. Returns the number
+    of holds released.
+    """
+    now = datetime.now()
+    result = db.execute(
+        update(StockReservation)
+        .where(
+            StockReservation.status == ReservationStatus.active,
+            StockReservation.expires_at <= now
+        )
+        .values(status=ReservationStatus.expired, released_at=now)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount
+
+
+class ReservationSweeper:
+    """
+    Background thread that periodically releases expired holds
+    """
+
+    def __init__(self, interval_seconds: int = RESERVATION_SWEEP_INTERVAL_SECONDS):
+        self.interval_seconds = interval_seconds
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="reservation-sweeper", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=self.interval_seconds)
+
+    def sweep_once(self) -> int:
+        db = SessionLocal()
+        try:
+            released = expire_stale_holds(db)
+            db.commit()
+            return released
+        except Exception as e:
+            db.rollback()
+            print(f"❌ ERROR sweeping stock reservations: {str(e)}")
+            return 0
+        finally:
+            db.close()
+
+    def _run(self):
+        while not self._stop.wait(self.interval_seconds):
+            self.sweep_once()
+
+
+reservation_sweeper = ReservationSweeper()
@@ -0,0 +1,123 @@
+# app/services/suggestion_index.py
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy.orm import Session
+from app.models.models import Product
+from config import SUGGESTION_INDEX_MAX_AGE_SECONDS
+
+# Lower rank wins: full product name, then a later word of the name, then SKU, then manufacturer
+RANK_NAME = 0
+RANK_NAME_WORD = 1
+RANK_SKU = 2
+RANK_MANUFACTURER = 3
+
+
+def _normalize(value: Optional[str]) -> str:
+    return " ".join((value or "").lower().split())
+
+
+def _word_suffixes(value: str) -> List[str]:
+    """'ibuprofen forte 400' -> ['forte 400', '400']"""
+    words = value.split(" ")
+    return [" ".join(words[i:]) for i in range(1, len(words))]
+
+
+class SuggestionIndex:
+    """
+    In-process autocomplete index over active products.
+
+    Keys (product name, each later word of the name, SKU and manufacturer)
+    are kept in one sorted array, so a prefix lookup is a binary search plus
+    a short scan and never touches the database. The index is built on
+    startup, patched by the admin product endpoints and rebuilt once it is
+    older than SUGGESTION_INDEX_MAX_AGE_SECONDS (to pick up changes made by
+    other worker processes).
+    """
+
+    def __init__(self, max_age_seconds: int = SUGGESTION_INDEX_MAX_AGE_SECONDS):
+        self.max_age_seconds = max_age_seconds
+        self._entries: List[Tuple[str, int, int]] = []  # (key, rank, product_id)
+        self._products: Dict[int, dict] = {}
+        self._built_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def is_fresh(self) -> bool:
+        return self._built_at is not None and time.monotonic() - self._built_at < self.max_age_seconds
+
+    def build(self, db: Session) -> None:
+        products = db.query(
+            Product.product_id, Product.name, Product.sku, Product.manufacturer,
+            Product.image_url, Product.price
+        ).filter(Product.is_active == True).all()
+
+        entries = []
+        payloads = {}
+        for product in products:
+            payloads[product.product_id] = self._payload(product)
+            entries.extend(self._keys(product))
+        entries.sort()
+
+        with self._lock:
+            self._entries = entries
+            self._products = payloads
+            self._built_at = time.monotonic()
+
+    def upsert(self, product: Product) -> None:
+        """Add or refresh one product; inactive products are removed"""
+        with self._lock:
+            # Copy on write so concurrent lookups keep a consistent view
+            entries = [entry for entry in self._entries if entry[2] != product.product_id]
+            products = dict(self._products)
+            products.pop(product.product_id, None)
+            if product.is_active:
+                products[product.product_id] = self._payload(product)
+                entries.extend(self._keys(product))
+                entries.sort()
+            self._entries = entries
+            self._products = products
+
+    def lookup(self, q: str, limit: int) -> List[dict]:
+        prefix = _normalize(q)
+        if not prefix:
+            return []
+
+        best: Dict[int, int] = {}
+        with self._lock:
+            entries = self._entries
+            products = self._products
+        position = bisect_left(entries, (prefix,))
+        while position < len(entries) and entries[position][0].startswith(prefix):
+            _, rank, product_id = entries[position]
+            if rank < best.get(product_id, RANK_MANUFACTURER + 1):
+                best[product_id] = rank
+            position += 1
+
+        ranked = sorted(best.items(), key=lambda item: (item[1], products[item[0]]["name"].lower(), item[0]))
+        return [products[product_id] for product_id, _ in ranked[:limit]]
+
+    @staticmethod
+    def _payload(product) -> dict:
+        return {
+            "product_id": product.product_id,
+            "name": product.name,
+            "image_url": product.image_url,
+            "price": float(product.price)
+        }
+
+    @staticmethod
+    def _keys(product) -> List[Tuple[str, int, int]]:
+        name = _normalize(product.name)
+        keys = [(name, RANK_NAME, product.product_id)]
+        keys.extend((suffix, RANK_NAME_WORD, product.product_id) for suffix in _word_suffixes(name))
+        if product.sku:
+            keys.append((_normalize(product.sku), RANK_SKU, product.product_id))
+        manufacturer = _normalize(product.manufacturer)
+        if manufacturer:
+            keys.append((manufacturer, RANK_MANUFACTURER, product.product_id))
+            keys.extend((suffix, RANK_MANUFACTURER, product.product_id) for suffix in _word_suffixes(manufacturer))
+        return keys
+
+
+suggestion_index = SuggestionIndex()
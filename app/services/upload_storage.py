@@ -0,0 +1,103 @@
+# app/services/upload_storage.py
+import hashlib
+import os
+import uuid
+from dataclasses import dataclass
+from typing import BinaryIO, Optional
+from fastapi import HTTPException, UploadFile
+from starlette.concurrency import run_in_threadpool
+from config import UPLOAD_MAX_BYTES, UPLOAD_CHUNK_BYTES
+
+# Uploads are copied to disk a chunk at a time. Every blocking call (write,
+# fsync, rename) runs on the threadpool so the event loop keeps serving other
+# requests, and memory stays at one chunk per upload whatever the file size.
+# The file is written under a temporary name and only renamed into place once
+# it is complete and on disk, so readers never see a partial file.
+
+
+@dataclass
+class StoredUpload:
+    path: str
+    size: int
+    sha256: str
+
+
+def _open_temp(path: str) -> BinaryIO:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    return open(path, "wb")
+
+
+def _write_chunk(f: BinaryIO, hasher, chunk: bytes) -> None:
+    hasher.update(chunk)
+    f.write(chunk)
+
+
+def _commit(f: BinaryIO, temp_path: str, path: str) -> None:
+    f.flush()
+    os.fsync(f.fileno())
+    f.close()
+    os.replace(temp_path, path)
+
+    # Persist the rename itself (not supported on Windows)
+    if hasattr(os, "O_DIRECTORY"):
+        dir_fd = os.open(os.path.dirname(path) or ".", os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+
+def _discard(f: Optional[BinaryIO], temp_path: str) -> None:
+    if f is not None and not f.closed:
+        f.close()
+    if os.path.exists(temp_path):
+        os.remove(temp_path)
+
+
+def _too_large(max_bytes: int) -> HTTPException:
+    return HTTPException(
+        status_code=413,
+        detail=f"File too large. Maximum size is {max_bytes // (1024 * 1024)} MB."
+    )
+
+
+async def save_upload(
+    upload: UploadFile,
+    path: str,
+    max_bytes: int = UPLOAD_MAX_BYTES,
+    chunk_size: int = UPLOAD_CHUNK_BYTES
+) -> StoredUpload:
+    """
+    Stream `upload` to `path`, hashing it on the way. Raises 413 as soon as
+    it grows past `max_bytes` and 400 if it is empty; nothing is left on
+    disk in either case.
+    """
+    if max_bytes and upload.size is not None and upload.size > max_bytes:
+        raise _too_large(max_bytes)
+
+    temp_path = os.path.join(os.path.dirname(path), f".{uuid.uuid4().hex}.part")
+    hasher = hashlib.sha256()
+    size = 0
+    f = None
+    try:
+        f = await run_in_threadpool(_open_temp, temp_path)
+        while True:
+            chunk = await upload.read(chunk_size)
+            if not chunk:
+                break
+            size += len(chunk)
+            if max_bytes and size > max_bytes:
+                raise _too_large(max_bytes)
+            await run_in_threadpool(_write_chunk, f, hasher, chunk)
+
+        if size == 0:
+            raise HTTPException(status_code=400, detail="Uploaded file is empty")
+
+        await run_in_threadpool(_commit, f, temp_path, path)
+    except BaseException:
+        # Inline rather than on the threadpool: this also runs on cancellation
+        _discard(f, temp_path)
+        raise
+
+    return StoredUpload(path=path, size=size, sha256=hasher.hexdigest())
+
@@ -0,0 +1,96 @@
+# app/utils/export.py
+import csv
+import io
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from enum import Enum
+from typing import Any, Callable, Dict, Iterable, Iterator, List
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Query, Session
+from app.database import SessionLocal
+
+EXPORT_FORMATS = ("json", "csv", "ndjson")
+EXPORT_FORMAT_PATTERN = "^(json|csv|ndjson)$"
+
+# Rows fetched per round trip and rows written per response chunk
+FETCH_BATCH_SIZE = 1000
+CHUNK_ROWS = 500
+
+
+def iter_query(query: Query, batch_size: int = FETCH_BATCH_SIZE) -> Iterator[Any]:
+    """
+    Iterate over a query with a server-side cursor, holding at most
+    `batch_size` rows in memory
+    """
+    return iter(query.yield_per(batch_size))
+
+
+def stream_export(
+    rows_for: Callable[[Session], Iterable[Dict[str, Any]]],
+    fields: List[str],
+    export_format: str,
+    filename: str
+) -> StreamingResponse:
+    """
+    Stream the rows `rows_for(db)` yields as CSV or NDJSON (one JSON object
+    per line), so memory use does not grow with the number of rows.
+
+    The rows are read while the response is sent, after the route has
+    returned, so they come from a session of their own rather than the
+    request's get_db session, which may already be closed by then.
+    """
+    rows = _session_rows(rows_for)
+    if export_format == "csv":
+        content, media_type, extension = _csv_chunks(rows, fields), "text/csv", "csv"
+    else:
+        content, media_type, extension = _ndjson_chunks(rows, fields), "application/x-ndjson", "ndjson"
+
+    return StreamingResponse(
+        content,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{extension}"'}
+    )
+
+
+def _session_rows(rows_for: Callable[[Session], Iterable[Dict[str, Any]]]) -> Iterator[Dict[str, Any]]:
+    db = SessionLocal()
+    try:
+        yield from rows_for(db)
+    finally:
+        db.close()
+
+
+def _plain(value: Any) -> Any:
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+
+def _csv_chunks(rows: Iterable[Dict[str, Any]], fields: List[str]) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(fields)
+
+    for count, row in enumerate(rows, start=1):
+        writer.writerow([_plain(row.get(field)) for field in fields])
+        if count % CHUNK_ROWS == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+    yield buffer.getvalue()
+
+
+def _ndjson_chunks(rows: Iterable[Dict[str, Any]], fields: List[str]) -> Iterator[str]:
+    lines = []
+    for row in rows:
+        lines.append(json.dumps({field: _plain(row.get(field)) for field in fields}))
+        if len(lines) == CHUNK_ROWS:
+            yield "\n".join(lines) + "\n"
+            lines = []
+    if lines:
+        yield "\n".join(lines) + "\n"
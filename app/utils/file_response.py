@@ -0,0 +1,129 @@
+# app/utils/file_response.py
+import os
+import re
+from email.utils import formatdate
+from typing import Optional, Tuple
+import anyio
+from fastapi import Request
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+# Stored files never change once written (content-addressed or uniquely
+# named), so clients may cache them for a year. "private" keeps shared
+# caches from storing prescription images.
+IMMUTABLE_CACHE_CONTROL = "private, max-age=31536000, immutable"
+CHUNK_SIZE = 64 * 1024
+ZERO_COPY_SEND = "http.response.zerocopysend"
+
+_RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Inclusive (start, end) of a single-range "bytes=" header, or None to
+    send the whole file (no header, or a form we do not serve partially,
+    such as multiple ranges). Raises RangeNotSatisfiable.
+    """
+    if not header:
+        return None
+    match = _RANGE_PATTERN.match(header.strip())
+    if not match or match.group(1) == match.group(2) == "":
+        return None
+
+    first, last = match.groups()
+    if first == "":
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0 or size == 0:
+            raise RangeNotSatisfiable()
+        return max(size - length, 0), size - 1
+
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise RangeNotSatisfiable()
+    return start, end
+
+
+class FileRangeResponse(Response):
+    """
+    Sends `count` bytes of a file from `offset`. Uses the ASGI zero-copy
+    send extension (sendfile) when the server offers it, and otherwise reads
+    the file in chunks off the event loop.
+    """
+
+    def __init__(self, path: str, offset: int, count: int, status_code: int, headers: dict, media_type: str):
+        super().__init__(status_code=status_code, headers=headers, media_type=media_type)
+        self.headers["content-length"] = str(count)
+        self.path = path
+        self.offset = offset
+        self.count = count
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if scope.get("method") == "HEAD" or self.count == 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        if ZERO_COPY_SEND in scope.get("extensions", {}):
+            with await anyio.to_thread.run_sync(open, self.path, "rb") as f:
+                await send({"type": ZERO_COPY_SEND, "file": f, "offset": self.offset, "count": self.count})
+            return
+
+        async with await anyio.open_file(self.path, "rb") as f:
+            await f.seek(self.offset)
+            remaining = self.count
+            while remaining > 0:
+                chunk = await f.read(min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": True})
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+
+def file_response(
+    request: Request,
+    path: str,
+    media_type: str,
+    etag: Optional[str] = None,
+    cache_control: str = IMMUTABLE_CACHE_CONTROL
+) -> Response:
+    """
+    Serve a file with Range, If-Range and If-None-Match support. Raises
+    FileNotFoundError if it does not exist.
+    """
+    stat = os.stat(path)
+    size = stat.st_size
+    etag = etag or f'"{int(stat.st_mtime)}-{size}"'
+    headers = {
+        "accept-ranges": "bytes",
+        "etag": etag,
+        "cache-control": cache_control,
+        "last-modified": formatdate(stat.st_mtime, usegmt=True)
+    }
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and (if_none_match.strip() == "*" or etag in [tag.strip() for tag in if_none_match.split(",")]):
+        return Response(status_code=304, headers=headers)
+
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if if_range and if_range.strip() != etag:
+        range_header = None  # the client's partial copy is stale; send it all
+
+    try:
+        byte_range = parse_range(range_header, size)
+    except RangeNotSatisfiable:
+        return Response(status_code=416, headers={**headers, "content-range": f"bytes */{size}"})
+
+    if byte_range is None:
+        return FileRangeResponse(path, 0, size, 200, headers, media_type)
+
+    start, end = byte_range
+    headers["content-range"] = f"bytes {start}-{end}/{size}"
+    return FileRangeResponse(path, start, end - start + 1, 206, headers, media_type)
@@ -0,0 +1,87 @@
+# app/utils/image_derivatives.py
+import os
+import uuid
+from typing import Dict, List, Optional
+
+# Pillow renders thumbnails and previews; PyMuPDF rasterises the first page
+# of PDFs. Both are optional: without them no derivatives are produced and
+# only originals can be served.
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # pragma: no cover - optional dependency
+    Image = None
+    ImageOps = None
+
+try:
+    import fitz
+except ImportError:  # pragma: no cover - optional dependency
+    fitz = None
+
+PDF_MEDIA_TYPE = "application/pdf"
+DERIVATIVE_MEDIA_TYPE = "image/jpeg"
+JPEG_QUALITY = {"thumbnail": 70, "preview": 82}
+
+_SIGNATURES = (
+    (b"%PDF", PDF_MEDIA_TYPE),
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+)
+
+
+def sniff_media_type(path: str) -> Optional[str]:
+    """Media type of a stored upload from its leading bytes"""
+    with open(path, "rb") as f:
+        head = f.read(8)
+    for signature, media_type in _SIGNATURES:
+        if head.startswith(signature):
+            return media_type
+    return None
+
+
+def can_render(media_type: Optional[str]) -> bool:
+    if Image is None or media_type is None:
+        return False
+    return media_type != PDF_MEDIA_TYPE or fitz is not None
+
+
+def derivative_path(source_path: str, kind: str) -> str:
+    """Derivatives live next to the original: <original>.<kind>.jpg"""
+    return f"{source_path}.{kind}.jpg"
+
+
+def _open_image(source_path: str, media_type: str, max_px: int):
+    if media_type == PDF_MEDIA_TYPE:
+        with fitz.open(source_path) as document:
+            page = document[0]
+            zoom = max_px / max(page.rect.width, page.rect.height)
+            pixmap = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), alpha=False)
+            return Image.frombytes("RGB", (pixmap.width, pixmap.height), pixmap.samples)
+
+    image = Image.open(source_path)
+    # Let JPEG decode at a reduced scale when that is still large enough
+    image.draft("RGB", (max_px, max_px))
+    # Phone scans are often stored sideways with an EXIF orientation tag
+    return ImageOps.exif_transpose(image).convert("RGB")
+
+
+def render_derivatives(source_path: str, sizes: Dict[str, int]) -> List[str]:
+    """
+    Write a JPEG no larger than `sizes[kind]` pixels per side for each kind
+    (first page only for PDFs); returns the kinds written. Runs in a worker
+    process, so it only takes and returns plain values.
+    """
+    media_type = sniff_media_type(source_path)
+    if not can_render(media_type) or not sizes:
+        return []
+
+    image = _open_image(source_path, media_type, max(sizes.values()))
+    written = []
+    for kind, max_px in sorted(sizes.items(), key=lambda item: -item[1]):
+        derived = image.copy()
+        derived.thumbnail((max_px, max_px))
+        path = derivative_path(source_path, kind)
+        temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        derived.save(temp_path, "JPEG", quality=JPEG_QUALITY.get(kind, 80), optimize=True, progressive=True)
+        os.replace(temp_path, path)
+        written.append(kind)
+    return written
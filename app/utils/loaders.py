@@ -0,0 +1,100 @@
+# app/utils/loaders.py
+from typing import Any, Dict, Iterable, Optional, Set
+from sqlalchemy import inspect
+from sqlalchemy.orm import Session
+
+# Ids per IN (...) list; a page is at most 100 rows, so this is one query in practice
+IN_BATCH_SIZE = 500
+
+
+def load_by_ids(db: Session, model, ids: Iterable[Any]) -> Dict[Any, Any]:
+    """
+    Fetch the `model` rows with the given primary keys using IN queries and
+    return them keyed by primary key. Use it to resolve the related rows of
+    a whole page at once instead of running one query per row.
+    """
+    mapper = inspect(model)
+    pk_column = mapper.primary_key[0]
+    pk_attribute = mapper.get_property_by_column(pk_column).key
+
+    wanted = list({value for value in ids if value is not None})
+    found: Dict[Any, Any] = {}
+    for start in range(0, len(wanted), IN_BATCH_SIZE):
+        batch = wanted[start:start + IN_BATCH_SIZE]
+        for row in db.query(model).filter(pk_column.in_(batch)).all():
+            found[getattr(row, pk_attribute)] = row
+    return found
+
+
+# Key in Session.info holding the session's loaders (model -> EntityLoader)
+LOADERS_KEY = "entity_loaders"
+
+
+class EntityLoader:
+    """
+    Request-scoped loader for one model, in the DataLoader style.
+
+    Ids passed to `load` are queued and fetched together, in one IN query,
+    by the next `get`/`get_many`; every row (and every miss) is then
+    memoised for the rest of the request. Rows already in hand can be
+    added with `prime`.
+    """
+
+    def __init__(self, db: Session, model):
+        self._db = db
+        self.model = model
+        mapper = inspect(model)
+        self._pk_attribute = mapper.get_property_by_column(mapper.primary_key[0]).key
+        self._cache: Dict[Any, Any] = {}
+        self._queue: Set[Any] = set()
+
+    def load(self, *ids: Any) -> None:
+        """Queue ids to be fetched with the next get"""
+        self._queue.update(i for i in ids if i is not None and i not in self._cache)
+
+    def prime(self, *rows: Any) -> None:
+        for row in rows:
+            if row is not None:
+                self._cache[getattr(row, self._pk_attribute)] = row
+
+    def get(self, id: Any) -> Optional[Any]:
+        if id is None:
+            return None
+        if id not in self._cache:
+            self._queue.add(id)
+            self._dispatch()
+        return self._cache.get(id)
+
+    def get_many(self, ids: Iterable[Any]) -> Dict[Any, Any]:
+        """Rows for the ids that exist, keyed by id"""
+        ids = list(ids)
+        self.load(*ids)
+        self._dispatch()
+        return {i: self._cache[i] for i in ids if self._cache.get(i) is not None}
+
+    def clear(self, *ids: Any) -> None:
+        """Forget ids (or everything), e.g. after creating or deleting rows"""
+        if not ids:
+            self._cache.clear()
+        for i in ids:
+            self._cache.pop(i, None)
+
+    def _dispatch(self) -> None:
+        if not self._queue:
+            return
+        ids, self._queue = self._queue, set()
+        found = load_by_ids(self._db, self.model, ids)
+        for i in ids:
+            self._cache[i] = found.get(i)
+
+
+def entity_loader(db: Session, model) -> EntityLoader:
+    """
+    The loader for `model` on this session. It lives in db.info, so each
+    request's session (get_db) has its own and it goes away with it. For an
+    AsyncSession pass db.sync_session inside run_sync.
+    """
+    loaders = db.info.setdefault(LOADERS_KEY, {})
+    if model not in loaders:
+        loaders[model] = EntityLoader(db, model)
+    return loaders[model]
@@ -0,0 +1,162 @@
+# app/utils/pagination.py
+import base64
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, List, Optional
+from fastapi import HTTPException, Response
+from sqlalchemy import DateTime, and_, false, func, literal, or_
+from sqlalchemy.orm import Query
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+# SQLite stores timestamps as text, '...HH:MM:SS' from CURRENT_TIMESTAMP but
+# '...HH:MM:SS.ffffff' when written from Python, and the two never compare
+# equal. Keyset pages there order and compare them normalised to this format.
+SQLITE_TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%f"
+
+
+def encode_cursor(payload: dict) -> str:
+    raw = json.dumps(payload, separators=(",", ":"), default=str).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> dict:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(payload, dict):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return payload
+
+
+def _parse_value(column, value: Any) -> Any:
+    """Turn a JSON cursor value back into the Python type of its column"""
+    if value is None:
+        return None
+    python_type = column.type.python_type
+    try:
+        if python_type is datetime:
+            return datetime.fromisoformat(value)
+        if python_type is date:
+            return date.fromisoformat(value)
+        if python_type is Decimal:
+            return Decimal(value)
+        return python_type(value)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def keyset_paginate(
+    query: Query,
+    response: Response,
+    key_column,
+    sort_column=None,
+    descending: bool = False,
+    cursor: Optional[str] = None,
+    skip: int = 0,
+    limit: int = 100
+) -> List[Any]:
+    """
+    Page through `query` ordered by (sort_column, key_column).
+
+    Instead of OFFSET, each page continues after the last row of the
+    previous one, so deep pages cost the same as the first when an index
+    covers (filters..., sort_column, key_column). The cursor for the next
+    page is returned in the X-Next-Cursor response header; it is absent on
+    the last page. `skip` is still honoured when no cursor is given.
+
+    The key column must be unique. NULLs in the sort column count as larger
+    than any value (PostgreSQL's default order), so they come last in
+    ascending pages and first in descending ones.
+    """
+    columns = [sort_column, key_column] if sort_column is not None else [key_column]
+    sqlite = query.session.get_bind().dialect.name == "sqlite"
+    keys = [_comparable(column, column, sqlite) for column in columns]
+    nullable = [column.nullable for column in columns]
+    query = query.order_by(*[_ordered(key, descending, can_be_null) for key, can_be_null in zip(keys, nullable)])
+
+    if cursor:
+        payload = decode_cursor(cursor)
+        values = payload.get("k")
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        values = [
+            None if value is None else _comparable(column, literal(_parse_value(column, value), column.type), sqlite)
+            for column, value in zip(columns, values)
+        ]
+        query = query.filter(_after(keys, values, nullable, descending))
+    elif skip:
+        query = query.offset(skip)
+
+    rows = query.limit(limit + 1).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(
+            {"k": [getattr(last, column.key) for column in columns]}
+        )
+    return rows
+
+
+def offset_paginate(
+    query: Query,
+    response: Response,
+    cursor: Optional[str] = None,
+    skip: int = 0,
+    limit: int = 100
+) -> List[Any]:
+    """
+    Cursor pagination for queries whose order is not a column, such as
+    relevance-ranked search. The cursor wraps an offset, so clients use the
+    same X-Next-Cursor protocol as for keyset pages.
+    """
+    if cursor:
+        offset = decode_cursor(cursor).get("o")
+        if not isinstance(offset, int) or offset < 0:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    else:
+        offset = skip
+
+    rows = query.offset(offset).limit(limit + 1).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor({"o": offset + limit})
+    return rows
+
+
+def _comparable(column, expression, sqlite: bool):
+    """`expression` (the column or a bound value) in the form keyset pages compare"""
+    if sqlite and isinstance(column.type, DateTime):
+        return func.strftime(SQLITE_TIMESTAMP_FORMAT, expression)
+    return expression
+
+
+def _ordered(key, descending: bool, nullable: bool):
+    if not nullable:
+        return key.desc() if descending else key.asc()
+    return key.desc().nulls_first() if descending else key.asc().nulls_last()
+
+
+def _equal(key, value):
+    return key.is_(None) if value is None else key == value
+
+
+def _beyond(key, value, descending: bool, nullable: bool):
+    """key sorts after value, with NULL larger than any value"""
+    if descending:
+        return key.isnot(None) if value is None else key < value
+    if value is None:
+        return false()
+    return or_(key > value, key.is_(None)) if nullable else key > value
+
+
+def _after(keys, values, nullable, descending: bool):
+    """(k1, k2) > (v1, v2) (or < when descending), spelled out for every dialect"""
+    conditions = []
+    for position, (key, value) in enumerate(zip(keys, values)):
+        equal_prefix = [_equal(keys[i], values[i]) for i in range(position)]
+        conditions.append(and_(*equal_prefix, _beyond(key, value, descending, nullable[position])))
+    return or_(*conditions)
@@ -0,0 +1,119 @@
+# app/utils/pool_metrics.py
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Dict
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from config import DB_SLOW_CHECKOUT_MS
+
+# Upper bounds (milliseconds) of the checkout wait histogram buckets
+CHECKOUT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+RECENT_SLOW_CHECKOUTS = 20
+
+
+class PoolMetrics:
+    """Checkout wait histogram and slow-checkout log for one connection pool"""
+
+    def __init__(self, slow_checkout_ms: int = DB_SLOW_CHECKOUT_MS):
+        self.slow_checkout_ms = slow_checkout_ms
+        self._lock = threading.Lock()
+        self._buckets = [0] * (len(CHECKOUT_BUCKETS_MS) + 1)  # last one is +Inf
+        self._count = 0
+        self._total_ms = 0.0
+        self._max_ms = 0.0
+        self._timeouts = 0
+        self._slow = 0
+        self._recent_slow = deque(maxlen=RECENT_SLOW_CHECKOUTS)
+
+    def observe(self, wait_ms: float) -> None:
+        index = len(CHECKOUT_BUCKETS_MS)
+        for i, bound in enumerate(CHECKOUT_BUCKETS_MS):
+            if wait_ms <= bound:
+                index = i
+                break
+
+        with self._lock:
+            self._buckets[index] += 1
+            self._count += 1
+            self._total_ms += wait_ms
+            self._max_ms = max(self._max_ms, wait_ms)
+            slow = self.slow_checkout_ms and wait_ms >= self.slow_checkout_ms
+            if slow:
+                self._slow += 1
+                self._recent_slow.append({"at": datetime.now().isoformat(), "wait_ms": round(wait_ms, 2)})
+
+        if slow:
+            print(f"⚠️ WARNING: Slow DB connection checkout ({wait_ms:.0f} ms, threshold {self.slow_checkout_ms} ms)")
+
+    def observe_timeout(self, wait_ms: float) -> None:
+        with self._lock:
+            self._timeouts += 1
+        print(f"❌ ERROR: DB connection checkout timed out after {wait_ms:.0f} ms")
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            cumulative, histogram = 0, []
+            for bound, count in zip(list(CHECKOUT_BUCKETS_MS) + ["+Inf"], self._buckets):
+                cumulative += count
+                histogram.append({"le_ms": bound, "count": cumulative})
+            return {
+                "count": self._count,
+                "sum_ms": round(self._total_ms, 2),
+                "avg_ms": round(self._total_ms / self._count, 3) if self._count else 0,
+                "max_ms": round(self._max_ms, 2),
+                "timeouts": self._timeouts,
+                "slow_checkouts": self._slow,
+                "slow_checkout_threshold_ms": self.slow_checkout_ms,
+                "recent_slow_checkouts": list(self._recent_slow),
+                "histogram": histogram
+            }
+
+
+pool_metrics = PoolMetrics()
+async_pool_metrics = PoolMetrics()
+
+
+class InstrumentedQueuePool(QueuePool):
+    """
+    QueuePool that times every checkout, including the wait for a free
+    connection and the connect of a new one, into `metrics`
+    """
+    metrics = pool_metrics
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            self.metrics.observe_timeout((time.perf_counter() - started) * 1000)
+            raise
+        self.metrics.observe((time.perf_counter() - started) * 1000)
+        return connection
+
+
+class InstrumentedAsyncQueuePool(InstrumentedQueuePool, AsyncAdaptedQueuePool):
+    """The same for the async engine, tracked separately"""
+    metrics = async_pool_metrics
+
+
+def pool_status(engine) -> Dict[str, Any]:
+    """Gauges of the engine's pool plus the checkout wait metrics"""
+    pool = engine.pool
+    status: Dict[str, Any] = {"pool_class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        max_overflow = pool._max_overflow
+        status.update({
+            "size": pool.size(),
+            "max_overflow": max_overflow,
+            "timeout_seconds": pool.timeout(),
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow_in_use": max(pool.overflow(), 0),
+            # Upper bound on connections this process opens; times the number of
+            # worker processes, it must stay below Postgres max_connections
+            "max_connections_per_process": pool.size() + max(max_overflow, 0),
+        })
+    status["checkout_wait"] = getattr(pool, "metrics", pool_metrics).snapshot()
+    return status
@@ -0,0 +1,66 @@
+# app/utils/principal_cache.py
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+from config import PRINCIPAL_CACHE_TTL_SECONDS, PRINCIPAL_CACHE_MAX_SIZE
+
+# Columns of Customer that are safe to keep in memory for authenticated requests
+PRINCIPAL_FIELDS = (
+    "customer_id", "first_name", "last_name", "email", "phone_number", "role",
+    "date_of_birth", "gender", "created_at", "updated_at"
+)
+
+
+class PrincipalCache:
+    """
+    In-process LRU cache of authenticated customers keyed by user_id.
+
+    Entries expire after `ttl_seconds`; the least recently used entry is
+    evicted once `max_size` is reached.
+    """
+
+    def __init__(self, max_size: int = PRINCIPAL_CACHE_MAX_SIZE, ttl_seconds: int = PRINCIPAL_CACHE_TTL_SECONDS):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[int, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id: int) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            expires_at, snapshot = entry
+            if expires_at <= time.monotonic():
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return snapshot
+
+    def set(self, user_id: int, snapshot: Dict[str, Any]) -> None:
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[user_id] = (time.monotonic() + self.ttl_seconds, snapshot)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: int) -> None:
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+def snapshot_customer(customer) -> Dict[str, Any]:
+    """
+    Copy the cacheable columns of a Customer row (never the password hash)
+    """
+    return {field: getattr(customer, field) for field in PRINCIPAL_FIELDS}
+
+
+principal_cache = PrincipalCache()
@@ -0,0 +1,33 @@
+# app/utils/upsert.py
+from typing import Dict, List, Sequence
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+
+def upsert(
+    db: Session,
+    model,
+    values: List[Dict],
+    key_columns: Sequence[str],
+    update_columns: Sequence[str],
+    increment: bool = False
+) -> None:
+    """
+    INSERT ... ON CONFLICT (key_columns) DO UPDATE for PostgreSQL and SQLite.
+
+    Conflicting rows get `update_columns` overwritten with the new values,
+    or increased by them when `increment` is set.
+    """
+    if not values:
+        return
+    insert = postgresql.insert if db.get_bind().dialect.name == "postgresql" else sqlite.insert
+    statement = insert(model).values(values)
+    table = model.__table__
+    statement = statement.on_conflict_do_update(
+        index_elements=[table.c[column] for column in key_columns],
+        set_={
+            column: table.c[column] + statement.excluded[column] if increment else statement.excluded[column]
+            for column in update_columns
+        }
+    )
+    db.execute(statement)
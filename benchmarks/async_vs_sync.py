@@ -0,0 +1,122 @@
+# benchmarks/async_vs_sync.py
+"""
+Requests/s and tail latency of an async route against the same route on
+the sync threadpool path.
+
+    python -m benchmarks.async_vs_sync [--concurrency 8,32,128] [--seconds 10] [--lines 10]
+
+GET /cart/ runs on the AsyncSession. This module adds a sync twin,
+GET /bench/sync/cart, that runs the same query on a sync Session in a def
+handler (so in Starlette's threadpool, like the routes before the port).
+Both are served by one uvicorn process and driven with the same
+concurrency in turn. Use BENCH_DATABASE_URL with PostgreSQL (asyncpg) for
+meaningful numbers: aiosqlite runs every connection on a thread of its own.
+"""
+import argparse
+import asyncio
+from typing import List
+import httpx
+from fastapi import APIRouter, Depends
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from benchmarks.common import (
+    SessionLocal, app, auth_headers, drive, latency_ms, print_table, seed_category, seed_customer, seed_products, serve
+)
+from app.database import get_db
+from app.middleware.auth import get_current_customer
+from app.models.models import CartItem, Customer, Product
+from app.schemas.cart import CartItemWithProduct
+from app.services.stock_reservations import available_to_promise_subquery
+
+APP_PATH = "benchmarks.async_vs_sync:app"
+
+sync_twin = APIRouter(prefix="/bench/sync", tags=["benchmark"])
+
+
+@sync_twin.get("/cart", response_model=List[CartItemWithProduct])
+def get_cart_items_sync(
+    current_user: Customer = Depends(get_current_customer),
+    db: Session = Depends(get_db)
+):
+    """GET /cart/ on the sync Session"""
+    stock = available_to_promise_subquery(exclude_customer_id=current_user.customer_id)
+    rows = db.execute(
+        select(
+            CartItem,
+            Product,
+            func.coalesce(stock.c.quantity, 0).label('stock_quantity')
+        ).join(Product, Product.product_id == CartItem.product_id)
+         .outerjoin(stock, stock.c.product_id == CartItem.product_id)
+         .where(CartItem.customer_id == current_user.customer_id)
+         .order_by(CartItem.cart_item_id)
+    ).all()
+
+    return [
+        CartItemWithProduct(
+            cart_item_id=item.cart_item_id,
+            customer_id=item.customer_id,
+            product_id=item.product_id,
+            quantity=item.quantity,
+            added_at=item.added_at,
+            updated_at=item.updated_at,
+            product_name=product.name,
+            product_price=float(product.price),
+            requires_prescription=product.requires_prescription,
+            image_url=product.image_url,
+            stock_quantity=int(stock_quantity)
+        )
+        for item, product, stock_quantity in rows
+    ]
+
+
+app.include_router(sync_twin)
+
+
+def seed_cart(lines: int) -> dict:
+    db = SessionLocal()
+    try:
+        customer = seed_customer(db)
+        products = seed_products(db, seed_category(db).category_id, lines)
+        db.add_all([
+            CartItem(customer_id=customer.customer_id, product_id=product.product_id, quantity=1)
+            for product in products
+        ])
+        db.commit()
+        return auth_headers(customer)
+    finally:
+        db.close()
+
+
+async def measure(base_url: str, headers: dict, path: str, concurrency: int, seconds: float):
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, headers=headers, limits=limits, timeout=60) as client:
+        # Warm up: principal cache, connection pools, lazily created engine
+        await drive(lambda: client.get(path), concurrency, 1)
+        return await drive(lambda: client.get(path), concurrency, seconds)
+
+
+def run(concurrencies, seconds, lines):
+    headers = seed_cart(lines)
+    rows = []
+    with serve(APP_PATH) as (base_url, _):
+        for concurrency in concurrencies:
+            for label, path in (("async", "/cart/"), ("sync", "/bench/sync/cart")):
+                results = asyncio.run(measure(base_url, headers, path, concurrency, seconds))
+                succeeded = [duration for status, duration in results if status == 200]
+                rows.append({
+                    "path": label,
+                    "concurrency": concurrency,
+                    "requests_per_s": round(len(succeeded) / seconds, 1),
+                    "failed": len(results) - len(succeeded),
+                    **latency_ms(succeeded)
+                })
+    print_table(f"GET cart with {lines} lines, {seconds}s per run", rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--concurrency", default="8,32,128", help="comma-separated client concurrency levels")
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--lines", type=int, default=10, help="cart lines")
+    args = parser.parse_args()
+    run([int(level) for level in args.concurrency.split(",")], args.seconds, args.lines)
@@ -0,0 +1,63 @@
+# benchmarks/checkout_latency.py
+"""
+Checkout cost against cart size: SQL statements and p50/p99 latency of
+POST /customer/orders/ for carts of increasing size.
+
+    python -m benchmarks.checkout_latency [--sizes 1,5,10,20,30] [--runs 30]
+
+On PostgreSQL the statement count stays flat as the cart grows: the order
+items and their batch rows are inserted in batches. SQLite cannot return
+generated keys in insert order, so there the ORM inserts those two tables a
+row at a time and the count grows by two per cart line.
+"""
+import argparse
+import time
+from statistics import median
+from benchmarks.common import (
+    SessionLocal, auth_headers, count_statements, latency_ms, print_table, seed_category, seed_customer, seed_products
+)
+from fastapi.testclient import TestClient
+from app.main import app
+from app.models.models import CartItem
+
+
+def run(sizes, runs):
+    db = SessionLocal()
+    category = seed_category(db)
+    products = seed_products(db, category.category_id, max(sizes), batches=(runs * len(sizes), runs * len(sizes)))
+
+    rows = []
+    with TestClient(app) as client:
+        for size in sizes:
+            durations, statements = [], []
+            for _ in range(runs):
+                customer = seed_customer(db)
+                db.add_all([
+                    CartItem(customer_id=customer.customer_id, product_id=product.product_id, quantity=1)
+                    for product in products[:size]
+                ])
+                db.commit()
+                headers = auth_headers(customer)
+                order = {"shipping_address_id": customer.addresses[0].address_id, "payment_method": "cod"}
+                # Load the principal first so only the checkout is measured
+                client.get("/cart/summary", headers=headers)
+
+                with count_statements() as executed:
+                    started = time.perf_counter()
+                    response = client.post("/customer/orders/", json=order, headers=headers)
+                    durations.append(time.perf_counter() - started)
+                if response.status_code != 201:
+                    raise RuntimeError(f"Checkout failed ({response.status_code}): {response.text}")
+                statements.append(len(executed))
+
+            rows.append({"cart_lines": size, "statements": int(median(statements)), **latency_ms(durations)})
+    db.close()
+    print_table(f"POST /customer/orders/ ({runs} checkouts per cart size)", rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", default="1,5,10,20,30", help="comma-separated cart sizes")
+    parser.add_argument("--runs", type=int, default=30, help="checkouts per cart size")
+    args = parser.parse_args()
+    run([int(size) for size in args.sizes.split(",")], args.runs)
@@ -0,0 +1,250 @@
+# benchmarks/common.py
+"""
+Shared setup for the benchmark scripts. Run them from the repository root:
+
+    python -m benchmarks.checkout_latency
+
+Each run seeds a throwaway SQLite database unless BENCH_DATABASE_URL is set.
+Point that at a scratch PostgreSQL database for numbers that mean something
+for production (tables are created in it and rows added).
+"""
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import date, timedelta
+from typing import Awaitable, Callable, Dict, Iterable, List, Sequence, Tuple
+
+# The app reads its settings when config is first imported, so scripts
+# import this module before anything from app. A server started with
+# serve() inherits the same settings through the environment.
+WORK_DIR = os.environ.setdefault("BENCH_WORK_DIR", tempfile.mkdtemp(prefix="e_pharmacy_bench_"))
+os.environ["DATABASE_URL"] = os.getenv("BENCH_DATABASE_URL") or f"sqlite:///{os.path.join(WORK_DIR, 'bench.db')}"
+os.environ["BLOB_STORE_DIR"] = os.path.join(WORK_DIR, "blobs")
+os.environ["REPORT_RESULTS_DIR"] = os.path.join(WORK_DIR, "report_results")
+os.environ["ANALYTICS_SNAPSHOT_DIR"] = os.path.join(WORK_DIR, "analytics_snapshots")
+
+import httpx
+from sqlalchemy import event
+from app.main import app  # creates the schema on import
+from app.database import SessionLocal, engine, get_async_engine
+from app.models.models import Category, Customer, CustomerAddress, PharmacyInventory, Product, UserRole
+from app.services.stock_projection import refresh_stock_projection
+from app.utils.security import create_access_token
+
+
+def unique(prefix: str) -> str:
+    return f"{prefix}-{uuid.uuid4().hex[:10]}"
+
+
+# -------------------------------
+# MEASUREMENT
+# -------------------------------
+
+def percentile(samples: Sequence[float], pct: float) -> float:
+    """Nearest-rank percentile"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(int(round(pct / 100 * len(ordered) + 0.5)) - 1, 0)
+    return ordered[min(rank, len(ordered) - 1)]
+
+
+def latency_ms(samples: Sequence[float]) -> dict:
+    """p50 / p99 / max of durations in seconds, in milliseconds"""
+    return {
+        "p50_ms": round(percentile(samples, 50) * 1000, 2),
+        "p99_ms": round(percentile(samples, 99) * 1000, 2),
+        "max_ms": round(max(samples, default=0) * 1000, 2)
+    }
+
+
+def print_table(title: str, rows: List[dict]) -> None:
+    print(f"\n{title}")
+    if not rows:
+        print("  (no rows)")
+        return
+    headers = list(rows[0].keys())
+    widths = [max(len(str(header)), *(len(str(row[header])) for row in rows)) for header in headers]
+    print("  " + "  ".join(str(header).rjust(width) for header, width in zip(headers, widths)))
+    for row in rows:
+        print("  " + "  ".join(str(row[header]).rjust(width) for header, width in zip(headers, widths)))
+
+
+@contextmanager
+def count_statements():
+    """Collect the SQL statements executed inside the block (sync and async engine)"""
+    engines = [engine, get_async_engine().sync_engine]
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    for target in engines:
+        event.listen(target, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        for target in engines:
+            event.remove(target, "before_cursor_execute", record)
+
+
+def peak_rss_mb(pid: int = None) -> float:
+    """Peak resident set size of a process (Linux /proc), in MB"""
+    with open(f"/proc/{pid or os.getpid()}/status") as f:
+        for line in f:
+            if line.startswith("VmHWM:"):
+                return round(int(line.split()[1]) / 1024, 1)
+    return 0.0
+
+
+# -------------------------------
+# SEED DATA
+# -------------------------------
+
+def seed_category(db) -> Category:
+    category = Category(name=unique("Bench category"), description="Benchmark data")
+    db.add(category)
+    db.commit()
+    return category
+
+
+def seed_customer(db, role: UserRole = UserRole.customer, password_hash: str = "not-used") -> Customer:
+    customer = Customer(
+        first_name="Bench",
+        last_name=role.value.title(),
+        email=f"{unique(role.value)}@example.com",
+        password_hash=password_hash,
+        phone_number="9999999999",
+        role=role
+    )
+    db.add(customer)
+    db.flush()
+    db.add(CustomerAddress(
+        customer_id=customer.customer_id,
+        address_line1="1 Bench Street",
+        city="Chennai",
+        state="Tamil Nadu",
+        zip_code="600001",
+        country="India",
+        is_default=True
+    ))
+    db.commit()
+    return customer
+
+
+def seed_products(db, category_id: int, count: int, batches: Iterable[int] = (1000,), names: List[str] = None) -> List[Product]:
+    """Active products with one in-date batch per entry of `batches`"""
+    batches = list(batches)
+    products = [
+        Product(
+            name=names[index] if names else unique("Bench product"),
+            description="Benchmark product",
+            sku=unique("SKU"),
+            category_id=category_id,
+            manufacturer="Bench Labs",
+            requires_prescription=False,
+            hsn_code=3004,
+            gst_rate=12,
+            price=10.0,
+            cost_price=5.0
+        )
+        for index in range(count)
+    ]
+    db.add_all(products)
+    db.flush()
+    db.add_all([
+        PharmacyInventory(
+            product_id=product.product_id,
+            batch_number=f"B{number}",
+            quantity_in_stock=quantity,
+            expiry_date=date.today() + timedelta(days=30 * number),
+            cost_price=5.0,
+            selling_price=10.0
+        )
+        for product in products
+        for number, quantity in enumerate(batches, start=1)
+    ])
+    db.flush()
+    refresh_stock_projection(db, [product.product_id for product in products])
+    db.commit()
+    return products
+
+
+def auth_headers(customer: Customer) -> dict:
+    token = create_access_token({"user_id": customer.customer_id, "role": customer.role.value})
+    return {"Authorization": f"Bearer {token}"}
+
+
+# -------------------------------
+# SERVER
+# -------------------------------
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@contextmanager
+def serve(app_path: str = "app.main:app", env: Dict[str, str] = None, timeout_seconds: float = 60):
+    """
+    Run the app under uvicorn in a child process and yield (base_url, pid).
+    Measuring a separate process keeps the load generator's own CPU and
+    memory out of the numbers. `env` overrides settings for that process.
+    """
+    port = _free_port()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", app_path, "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        stdout=subprocess.DEVNULL,
+        env={**os.environ, **(env or {})}
+    )
+    try:
+        deadline = time.monotonic() + timeout_seconds
+        while True:
+            if process.poll() is not None:
+                raise RuntimeError(f"uvicorn exited with {process.returncode}")
+            try:
+                socket.create_connection(("127.0.0.1", port), timeout=1).close()
+                break
+            except OSError:
+                if time.monotonic() > deadline:
+                    raise RuntimeError("uvicorn did not start in time")
+                time.sleep(0.2)
+        yield f"http://127.0.0.1:{port}", process.pid
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+async def drive(
+    send: Callable[[], Awaitable[httpx.Response]],
+    concurrency: int,
+    duration_seconds: float
+) -> List[Tuple[int, float]]:
+    """
+    Call `send` from `concurrency` concurrent workers for `duration_seconds`.
+    Returns (status_code, seconds) per request; status 0 is a transport error.
+    """
+    results = []
+    deadline = time.monotonic() + duration_seconds
+
+    async def worker():
+        while time.monotonic() < deadline:
+            started = time.perf_counter()
+            try:
+                status = (await send()).status_code
+            except httpx.HTTPError:
+                status = 0
+            results.append((status, time.perf_counter() - started))
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return results
@@ -0,0 +1,62 @@
+# benchmarks/deep_pagination.py
+"""
+Deep pages of the product listing: OFFSET (skip) against the keyset cursor.
+
+    python -m benchmarks.deep_pagination [--products 20000] [--runs 20]
+
+The same page (100 products of one category, at increasing depth) is
+fetched with skip= and with the cursor a client holds at that depth, using
+the query GET /products/ builds. OFFSET time grows with depth because the
+skipped rows are still read; the cursor page seeks into the
+(category_id, product_id) index and should cost the same at any depth.
+"""
+import argparse
+import time
+from statistics import median
+from fastapi import Response
+from benchmarks.common import SessionLocal, print_table, seed_category, seed_products
+from app.models.models import Product
+from app.utils.pagination import encode_cursor, keyset_paginate
+
+PAGE = 100
+
+
+def fetch_page(db, category_id: int, skip: int = 0, cursor: str = None) -> float:
+    """Time one page of the storefront listing query"""
+    started = time.perf_counter()
+    query = db.query(Product).filter(Product.is_active == True, Product.category_id == category_id)
+    rows = keyset_paginate(query, Response(), Product.product_id, cursor=cursor, skip=skip, limit=PAGE)
+    elapsed = time.perf_counter() - started
+    if len(rows) != PAGE:
+        raise RuntimeError(f"Expected {PAGE} rows, got {len(rows)}")
+    db.expunge_all()
+    return elapsed
+
+
+def run(products, runs):
+    db = SessionLocal()
+    category_id = seed_category(db).category_id
+    product_ids = sorted(product.product_id for product in seed_products(db, category_id, products))
+    db.expunge_all()
+
+    rows = []
+    for depth in sorted({0, products // 20, products // 4, products // 2, products - PAGE}):
+        # The cursor X-Next-Cursor carries: after the row just before this page
+        cursor = encode_cursor({"k": [product_ids[depth - 1]]}) if depth else None
+        offset_times = [fetch_page(db, category_id, skip=depth) for _ in range(runs)]
+        cursor_times = [fetch_page(db, category_id, cursor=cursor) for _ in range(runs)]
+        rows.append({
+            "depth": depth,
+            "offset_ms": round(median(offset_times) * 1000, 2),
+            "cursor_ms": round(median(cursor_times) * 1000, 2)
+        })
+    db.close()
+    print_table(f"Product page of {PAGE} by depth, median of {runs} ({products} products)", rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--products", type=int, default=20000)
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+    run(args.products, args.runs)
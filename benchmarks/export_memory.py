@@ -0,0 +1,79 @@
+# benchmarks/export_memory.py
+"""
+Peak memory of the inventory report: the JSON document against the
+streamed CSV and NDJSON exports, as the number of batches grows.
+
+    python -m benchmarks.export_memory [--rows 20000,80000]
+
+Every export runs against a freshly started server, so each process's peak
+RSS (VmHWM) covers that one request. The JSON report builds every batch in
+memory before sending anything, so its peak grows with the row count; the
+streamed formats should stay flat and start sending almost at once.
+"""
+import argparse
+import time
+import httpx
+from benchmarks.common import (
+    SessionLocal, auth_headers, peak_rss_mb, print_table, seed_category, seed_customer, seed_products, serve
+)
+from app.models.models import UserRole
+
+BATCHES_PER_PRODUCT = 10
+FORMATS = ("json", "csv", "ndjson")
+
+
+def seed_batches(db, category_id: int, rows: int) -> None:
+    seed_products(db, category_id, rows // BATCHES_PER_PRODUCT, batches=(100,) * BATCHES_PER_PRODUCT)
+    db.expunge_all()
+
+
+def export(base_url: str, pid: int, headers: dict, export_format: str) -> dict:
+    with httpx.Client(base_url=base_url, headers=headers, timeout=600) as client:
+        # One cheap authenticated request first, so the baseline includes
+        # everything the server loads lazily on its first request
+        client.get("/users/addresses")
+        baseline = peak_rss_mb(pid)
+
+        size, first_byte = 0, None
+        started = time.perf_counter()
+        with client.stream("GET", "/admin/reports/inventory", params={"format": export_format}) as response:
+            if response.status_code != 200:
+                raise RuntimeError(f"Export failed ({response.status_code}): {response.read()[:200]}")
+            for chunk in response.iter_bytes():
+                if first_byte is None:
+                    first_byte = time.perf_counter() - started
+                size += len(chunk)
+        total = time.perf_counter() - started
+
+    peak = peak_rss_mb(pid)
+    return {
+        "baseline_mb": baseline,
+        "peak_mb": peak,
+        "delta_mb": round(peak - baseline, 1),
+        "first_byte_ms": round((first_byte or total) * 1000, 1),
+        "total_s": round(total, 2),
+        "body_mb": round(size / 1024 / 1024, 1)
+    }
+
+
+def run(row_counts):
+    db = SessionLocal()
+    headers = auth_headers(seed_customer(db, UserRole.admin))
+    category_id = seed_category(db).category_id
+
+    rows, seeded = [], 0
+    for target in sorted(row_counts):
+        seed_batches(db, category_id, target - seeded)
+        seeded = target
+        for export_format in FORMATS:
+            with serve() as (base_url, pid):
+                rows.append({"batches": target, "format": export_format, **export(base_url, pid, headers, export_format)})
+    db.close()
+    print_table("GET /admin/reports/inventory, peak RSS of a fresh server per export", rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", default="20000,80000", help="comma-separated inventory batch counts")
+    args = parser.parse_args()
+    run([int(rows) for rows in args.rows.split(",")])
@@ -0,0 +1,80 @@
+# benchmarks/login_throughput.py
+"""
+Login throughput against the bcrypt cost factor, with the password hash
+pool under saturation.
+
+    python -m benchmarks.login_throughput [--costs 8,10,12] [--concurrency 32] [--seconds 10]
+
+For each cost a server runs with BCRYPT_ROUNDS set to it, and its users'
+hashes use the same cost, so no rehash happens during the run. Concurrent
+clients log in for the duration. Logins beyond the pool's queue limit get
+503. A separate client meanwhile reads GET /users/addresses, a threadpool
+route, to show that a login burst no longer starves other endpoints.
+"""
+import argparse
+import asyncio
+import httpx
+from passlib.context import CryptContext
+from benchmarks.common import (
+    SessionLocal, auth_headers, drive, latency_ms, print_table, seed_customer, serve
+)
+
+PASSWORD = "bench-password"
+USERS = 20
+
+
+def seed_users(cost: int):
+    context = CryptContext(schemes=["bcrypt"], bcrypt__default_rounds=cost)
+    password_hash = context.hash(PASSWORD)
+    db = SessionLocal()
+    try:
+        users = [seed_customer(db, password_hash=password_hash) for _ in range(USERS)]
+        return [user.email for user in users], auth_headers(users[0])
+    finally:
+        db.close()
+
+
+async def measure(base_url: str, emails, probe_headers, concurrency: int, seconds: float):
+    limits = httpx.Limits(max_connections=concurrency + 4)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        await client.get("/users/addresses", headers=probe_headers)
+        logins = iter(range(10 ** 9))
+
+        def login():
+            email = emails[next(logins) % len(emails)]
+            return client.post("/auth/login", json={"email": email, "password": PASSWORD})
+
+        def probe():
+            return client.get("/users/addresses", headers=probe_headers)
+
+        return await asyncio.gather(drive(login, concurrency, seconds), drive(probe, 1, seconds))
+
+
+def run(costs, concurrency, seconds):
+    rows = []
+    for cost in costs:
+        emails, probe_headers = seed_users(cost)
+        with serve(env={"BCRYPT_ROUNDS": str(cost)}) as (base_url, _):
+            logins, probes = asyncio.run(measure(base_url, emails, probe_headers, concurrency, seconds))
+
+        succeeded = [duration for status, duration in logins if status == 200]
+        login_latency = latency_ms(succeeded)
+        rows.append({
+            "cost": cost,
+            "logins_per_s": round(len(succeeded) / seconds, 1),
+            "rejected_503": sum(1 for status, _ in logins if status == 503),
+            "failed": sum(1 for status, _ in logins if status not in (200, 503)),
+            "login_p50_ms": login_latency["p50_ms"],
+            "login_p99_ms": login_latency["p99_ms"],
+            "other_route_p99_ms": latency_ms([duration for _, duration in probes])["p99_ms"]
+        })
+    print_table(f"POST /auth/login, {concurrency} concurrent clients for {seconds}s", rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--costs", default="8,10,12", help="comma-separated bcrypt cost factors")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--seconds", type=float, default=10)
+    args = parser.parse_args()
+    run([int(cost) for cost in args.costs.split(",")], args.concurrency, args.seconds)
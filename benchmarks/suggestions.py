@@ -0,0 +1,88 @@
+# benchmarks/suggestions.py
+"""
+Autocomplete lookups: the in-memory prefix index against the ILIKE query it
+replaced.
+
+    python -m benchmarks.suggestions [--products 5000] [--lookups 2000]
+
+Both paths answer the same typed prefixes (2 to 6 characters of product
+names). The report shows per-lookup latency and SQL statements per lookup.
+"""
+import argparse
+import random
+import time
+from benchmarks.common import (
+    SessionLocal, count_statements, percentile, print_table, seed_category, seed_products
+)
+from app.models.models import Product
+from app.services.suggestion_index import SuggestionIndex
+
+LIMIT = 5
+STEMS = [
+    "Paracetamol", "Ibuprofen", "Amoxicillin", "Cetirizine", "Metformin", "Atorvastatin", "Omeprazole",
+    "Azithromycin", "Pantoprazole", "Losartan", "Amlodipine", "Dolo", "Crocin", "Montelukast", "Levocetirizine"
+]
+FORMS = ["Tablet", "Capsule", "Syrup", "Suspension", "Gel", "Drops"]
+
+
+def product_names(count: int):
+    return [
+        f"{random.choice(STEMS)} {random.choice(FORMS)} {random.choice([50, 100, 250, 400, 500, 650])}mg {index}"
+        for index in range(count)
+    ]
+
+
+def ilike_lookup(db, q: str):
+    """The query autocomplete ran before the prefix index"""
+    return db.query(Product).filter(
+        Product.is_active == True,
+        Product.name.ilike(f"%{q}%")
+    ).limit(LIMIT).all()
+
+
+def timed(lookup, prefixes):
+    durations = []
+    with count_statements() as statements:
+        for q in prefixes:
+            started = time.perf_counter()
+            lookup(q)
+            durations.append(time.perf_counter() - started)
+    return {
+        "mean_us": round(sum(durations) / len(durations) * 1e6, 1),
+        "p50_us": round(percentile(durations, 50) * 1e6, 1),
+        "p99_us": round(percentile(durations, 99) * 1e6, 1),
+        "statements_per_lookup": round(len(statements) / len(prefixes), 2)
+    }
+
+
+def run(products, lookups):
+    random.seed(8)
+    db = SessionLocal()
+    category = seed_category(db)
+    names = product_names(products)
+    seed_products(db, category.category_id, products, names=names)
+
+    index = SuggestionIndex()
+    started = time.perf_counter()
+    index.build(db)
+    build_ms = round((time.perf_counter() - started) * 1000, 1)
+
+    prefixes = []
+    for _ in range(lookups):
+        name = random.choice(names)
+        prefixes.append(name[:random.randint(2, 6)])
+
+    rows = [
+        {"path": "prefix index", **timed(lambda q: index.lookup(q, LIMIT), prefixes)},
+        {"path": "ILIKE query", **timed(lambda q: ilike_lookup(db, q), prefixes)}
+    ]
+    db.close()
+    print_table(f"{lookups} suggestion lookups over {products} products (index built in {build_ms} ms)", rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--products", type=int, default=5000)
+    parser.add_argument("--lookups", type=int, default=2000)
+    args = parser.parse_args()
+    run(args.products, args.lookups)
@@ -0,0 +1,96 @@
+# benchmarks/upload_load.py
+"""
+Server memory and event-loop stalls under many parallel prescription
+uploads, by upload size.
+
+    python -m benchmarks.upload_load [--sizes-mb 1,4,8] [--concurrency 16] [--seconds 10]
+
+For each size a fresh server takes POST /customer/prescriptions/upload
+from `concurrency` clients for the duration. Every upload has distinct
+content, so none is deduplicated by the blob store, and is not a renderable
+image, so no preview work is queued. Meanwhile one client polls the async
+GET /cart/summary: its p99/max latency shows whether the loop stalls while
+uploads are written. Streaming keeps the server's peak RSS about the same
+whatever the upload size; what growth remains is Starlette spooling up to
+1 MB of each in-flight multipart body in memory.
+"""
+import argparse
+import asyncio
+import os
+import uuid
+import httpx
+from benchmarks.common import (
+    SessionLocal, auth_headers, drive, latency_ms, peak_rss_mb, print_table, seed_category, seed_customer,
+    seed_products, serve
+)
+
+
+def seed_uploader():
+    db = SessionLocal()
+    try:
+        customer = seed_customer(db)
+        product = seed_products(db, seed_category(db).category_id, 1)[0]
+        product.requires_prescription = True
+        db.commit()
+        return auth_headers(customer), product.product_id
+    finally:
+        db.close()
+
+
+async def measure(base_url: str, pid: int, headers: dict, product_id: int, size: int, concurrency: int, seconds: float):
+    payload = os.urandom(size)
+
+    def upload():
+        content = uuid.uuid4().bytes + payload[16:]
+        return client.post(
+            "/customer/prescriptions/upload",
+            files={"image": ("prescription.pdf", content, "application/pdf")},
+            data={"product_ids": str(product_id)}
+        )
+
+    def probe():
+        return client.get("/cart/summary")
+
+    limits = httpx.Limits(max_connections=concurrency + 2)
+    async with httpx.AsyncClient(base_url=base_url, headers=headers, limits=limits, timeout=120) as client:
+        # Warm up with one upload and one probe, then take the baseline
+        await upload()
+        await probe()
+        baseline = peak_rss_mb(pid)
+        uploads, probes = await asyncio.gather(drive(upload, concurrency, seconds), drive(probe, 1, seconds))
+    return baseline, uploads, probes
+
+
+def run(sizes_mb, concurrency, seconds):
+    headers, product_id = seed_uploader()
+    rows = []
+    for size_mb in sizes_mb:
+        with serve() as (base_url, pid):
+            baseline, uploads, probes = asyncio.run(
+                measure(base_url, pid, headers, product_id, int(size_mb * 1024 * 1024), concurrency, seconds)
+            )
+            peak = peak_rss_mb(pid)
+
+        succeeded = [duration for status, duration in uploads if status == 200]
+        probe_latency = latency_ms([duration for _, duration in probes])
+        rows.append({
+            "upload_mb": size_mb,
+            "uploads_per_s": round(len(succeeded) / seconds, 1),
+            "failed": len(uploads) - len(succeeded),
+            "upload_p99_ms": latency_ms(succeeded)["p99_ms"],
+            "baseline_mb": baseline,
+            "peak_mb": peak,
+            "delta_mb": round(peak - baseline, 1),
+            "probe_p99_ms": probe_latency["p99_ms"],
+            "probe_max_ms": probe_latency["max_ms"]
+        })
+    print_table(f"POST /customer/prescriptions/upload, {concurrency} concurrent clients for {seconds}s", rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes-mb", default="1,4,8", help="comma-separated upload sizes in MB (at most UPLOAD_MAX_BYTES)")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=10)
+    args = parser.parse_args()
+    run([float(size) for size in args.sizes_mb.split(",")], args.concurrency, args.seconds)
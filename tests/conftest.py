@@ -0,0 +1,168 @@
+# tests/conftest.py
+import os
+import tempfile
+import uuid
+from contextlib import contextmanager
+from datetime import date, timedelta
+
+# The app reads its settings when config is first imported, so point it at a
+# throwaway database and scratch directories before importing anything from
+# it. Set TEST_DATABASE_URL to run against PostgreSQL, which is where row
+# locks (FOR UPDATE / SKIP LOCKED) are actually exercised.
+_WORK_DIR = tempfile.mkdtemp(prefix="e_pharmacy_tests_")
+os.environ["DATABASE_URL"] = os.getenv("TEST_DATABASE_URL") or f"sqlite:///{os.path.join(_WORK_DIR, 'test.db')}"
+os.environ["BLOB_STORE_DIR"] = os.path.join(_WORK_DIR, "blobs")
+os.environ["REPORT_RESULTS_DIR"] = os.path.join(_WORK_DIR, "report_results")
+os.environ["ANALYTICS_SNAPSHOT_DIR"] = os.path.join(_WORK_DIR, "analytics_snapshots")
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+# Keep the reservation sweeper from running SQL in the middle of a test
+os.environ.setdefault("RESERVATION_SWEEP_INTERVAL_SECONDS", "3600")
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from app.main import app
+from app.database import SessionLocal, engine, get_async_engine
+from app.models.models import Category, Customer, CustomerAddress, PharmacyInventory, Product, UserRole
+from app.services.stock_projection import refresh_stock_projection
+from app.utils.security import create_access_token
+
+
+def unique(prefix: str) -> str:
+    return f"{prefix}-{uuid.uuid4().hex[:10]}"
+
+
+@pytest.fixture(scope="session")
+def client():
+    # Entered once, so startup/shutdown hooks run once and every request
+    # shares one event loop
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def count_statements():
+    """
+    Context manager collecting the SQL statements executed inside it, on
+    both the sync and the async engine:
+
+        with count_statements() as statements:
+            client.get(...)
+        assert len(statements) <= 3
+    """
+    engines = [engine, get_async_engine().sync_engine]
+
+    @contextmanager
+    def counting():
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        for target in engines:
+            event.listen(target, "before_cursor_execute", record)
+        try:
+            yield statements
+        finally:
+            for target in engines:
+                event.remove(target, "before_cursor_execute", record)
+    return counting
+
+
+@pytest.fixture
+def statement_budget(count_statements):
+    """
+    Context manager failing the test when the block runs more SQL
+    statements than `budget`:
+
+        with statement_budget(2):
+            client.get(...)
+    """
+    @contextmanager
+    def within(budget: int):
+        with count_statements() as statements:
+            yield statements
+        assert len(statements) <= budget, (
+            f"{len(statements)} statements over a budget of {budget}:\n" + "\n".join(statements)
+        )
+    return within
+
+
+def auth_headers(customer: Customer) -> dict:
+    token = create_access_token({"user_id": customer.customer_id, "role": customer.role.value})
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def make_customer(db):
+    """Create a customer (or admin) with a shipping address"""
+    def make(role: UserRole = UserRole.customer) -> Customer:
+        customer = Customer(
+            first_name="Test",
+            last_name=role.value.title(),
+            email=f"{unique(role.value)}@example.com",
+            password_hash="not-used",
+            phone_number="9999999999",
+            role=role
+        )
+        db.add(customer)
+        db.flush()
+        db.add(CustomerAddress(
+            customer_id=customer.customer_id,
+            address_line1="1 Test Street",
+            city="Chennai",
+            state="Tamil Nadu",
+            zip_code="600001",
+            country="India",
+            is_default=True
+        ))
+        db.commit()
+        return customer
+    return make
+
+
+@pytest.fixture
+def make_product(db):
+    """Create a product with one in-date batch per entry of `batches`"""
+    category = Category(name=unique("category"), description="Test category")
+    db.add(category)
+    db.commit()
+
+    def make(batches=(10,), price: float = 10.0, requires_prescription: bool = False) -> Product:
+        product = Product(
+            name=unique("Product"),
+            description="Test product",
+            sku=unique("SKU"),
+            category_id=category.category_id,
+            manufacturer="Test Labs",
+            requires_prescription=requires_prescription,
+            hsn_code=3004,
+            gst_rate=12,
+            price=price,
+            cost_price=price / 2
+        )
+        db.add(product)
+        db.flush()
+        for number, quantity in enumerate(batches, start=1):
+            db.add(PharmacyInventory(
+                product_id=product.product_id,
+                batch_number=f"B{number}",
+                quantity_in_stock=quantity,
+                expiry_date=date.today() + timedelta(days=30 * number),
+                cost_price=price / 2,
+                selling_price=price
+            ))
+        db.flush()
+        refresh_stock_projection(db, [product.product_id])
+        db.commit()
+        return product
+    return make
@@ -0,0 +1,92 @@
+# tests/test_admin_listings.py
+import pytest
+from app.models.models import Order, OrderItem, Prescription, PrescriptionItem, UserRole
+from tests.conftest import auth_headers, unique
+
+# Statements per request, whatever the page size or number of items
+ORDER_LIST_BUDGET = 2
+ORDER_ITEMS_BUDGET = 3
+PRESCRIPTION_LIST_BUDGET = 2
+PRESCRIPTION_ITEMS_BUDGET = 3
+
+PAGE_SIZES = (2, 12)
+ITEM_COUNTS = (1, 8)
+
+
+@pytest.fixture
+def admin_headers(client, make_customer):
+    headers = auth_headers(make_customer(UserRole.admin))
+    # Load the principal once, so only the listing itself is counted
+    assert client.get("/admin/orders/", params={"limit": 1}, headers=headers).status_code == 200
+    return headers
+
+
+def seed_order(db, customer, products=()) -> Order:
+    order = Order(
+        order_number=unique("ORD"),
+        customer_id=customer.customer_id,
+        total_amount=10 * len(products),
+        final_amount=10 * len(products),
+        payment_method="cod",
+        status="pending"
+    )
+    db.add(order)
+    db.flush()
+    db.add_all([
+        OrderItem(order_id=order.order_id, product_id=product.product_id, quantity=1, unit_price=10, subtotal=10)
+        for product in products
+    ])
+    db.commit()
+    return order
+
+
+def seed_prescription(db, customer, products=()) -> Prescription:
+    prescription = Prescription(customer_id=customer.customer_id, image_url="uploads/prescriptions/test.png", status="pending")
+    db.add(prescription)
+    db.flush()
+    db.add_all([
+        PrescriptionItem(prescription_id=prescription.prescription_id, product_id=product.product_id, quantity=1)
+        for product in products
+    ])
+    db.commit()
+    return prescription
+
+
+def test_order_list_within_budget(client, db, make_customer, statement_budget, admin_headers):
+    for _ in range(max(PAGE_SIZES)):
+        seed_order(db, make_customer())
+
+    for limit in PAGE_SIZES:
+        with statement_budget(ORDER_LIST_BUDGET):
+            response = client.get("/admin/orders/", params={"limit": limit}, headers=admin_headers)
+        assert response.status_code == 200
+        assert len(response.json()) == limit
+
+
+def test_order_items_within_budget(client, db, make_customer, make_product, statement_budget, admin_headers):
+    for count in ITEM_COUNTS:
+        order_id = seed_order(db, make_customer(), [make_product() for _ in range(count)]).order_id
+        with statement_budget(ORDER_ITEMS_BUDGET):
+            response = client.get(f"/admin/orders/{order_id}/items", headers=admin_headers)
+        assert response.status_code == 200
+        assert len(response.json()) == count
+
+
+def test_prescription_list_within_budget(client, db, make_customer, statement_budget, admin_headers):
+    for _ in range(max(PAGE_SIZES)):
+        seed_prescription(db, make_customer())
+
+    for limit in PAGE_SIZES:
+        with statement_budget(PRESCRIPTION_LIST_BUDGET):
+            response = client.get("/admin/prescriptions/", params={"limit": limit}, headers=admin_headers)
+        assert response.status_code == 200
+        assert len(response.json()) == limit
+
+
+def test_prescription_items_within_budget(client, db, make_customer, make_product, statement_budget, admin_headers):
+    for count in ITEM_COUNTS:
+        prescription_id = seed_prescription(db, make_customer(), [make_product() for _ in range(count)]).prescription_id
+        with statement_budget(PRESCRIPTION_ITEMS_BUDGET):
+            response = client.get(f"/admin/prescriptions/{prescription_id}/items", headers=admin_headers)
+        assert response.status_code == 200
+        assert len(response.json()) == count
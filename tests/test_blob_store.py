@@ -0,0 +1,84 @@
+# tests/test_blob_store.py
+import hashlib
+import os
+import time
+import pytest
+from app.models.models import Prescription
+from app.services.blob_store import LocalBlobStore, blob_url, collect_garbage
+
+GRACE_SECONDS = 60
+
+
+def store_blob(store: LocalBlobStore, content: bytes) -> str:
+    """Write a blob directly and age it past the GC grace period"""
+    key = hashlib.sha256(content).hexdigest()
+    path = store.path(key)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(content)
+    old = time.time() - 10 * GRACE_SECONDS
+    os.utime(path, (old, old))
+    return key
+
+
+def stage(store: LocalBlobStore, content: bytes) -> str:
+    os.makedirs(store.tmp_dir, exist_ok=True)
+    path = os.path.join(store.tmp_dir, hashlib.md5(content).hexdigest())
+    with open(path, "wb") as f:
+        f.write(content)
+    return path
+
+
+class RacingStore(LocalBlobStore):
+    """Runs `during_scan` for each blob after the collector has listed it"""
+
+    def __init__(self, root, during_scan):
+        super().__init__(root)
+        self.during_scan = during_scan
+
+    def iter_blobs(self):
+        for blob in super().iter_blobs():
+            self.during_scan(blob.key)
+            yield blob
+
+
+@pytest.fixture
+def root(tmp_path):
+    return str(tmp_path / "blobs")
+
+
+def test_unreferenced_blob_is_collected(db, root):
+    store = LocalBlobStore(root)
+    key = store_blob(store, b"orphan")
+
+    result = collect_garbage(db, store, grace_seconds=GRACE_SECONDS)
+
+    assert result["deleted_blobs"] == 1
+    assert not store.exists(key)
+
+
+def test_upload_linked_during_scan_is_kept(db, root):
+    content = b"re-uploaded scan"
+    store = RacingStore(root, lambda key: store._link(stage(store, content), key))
+    key = store_blob(store, content)
+
+    result = collect_garbage(db, store, grace_seconds=GRACE_SECONDS)
+
+    assert result["deleted_blobs"] == 0
+    assert store.exists(key)
+
+
+def test_reference_committed_during_scan_is_kept(db, root, make_customer):
+    customer = make_customer()
+
+    def reference(key):
+        db.add(Prescription(customer_id=customer.customer_id, image_url=blob_url(key), status="pending"))
+        db.commit()
+
+    store = RacingStore(root, reference)
+    key = store_blob(store, b"scan referenced late")
+
+    result = collect_garbage(db, store, grace_seconds=GRACE_SECONDS)
+
+    assert result["deleted_blobs"] == 0
+    assert store.exists(key)
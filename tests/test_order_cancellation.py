@@ -0,0 +1,58 @@
+# tests/test_order_cancellation.py
+import threading
+from sqlalchemy import func
+from app.models.models import CartItem, DailyProductSalesRollup, PharmacyInventory
+from tests.conftest import auth_headers
+
+STOCK = (5,)
+ORDERED = 3
+CANCELLERS = 6
+
+
+def test_concurrent_cancels_restore_stock_once(client, db, make_customer, make_product):
+    product = make_product(batches=STOCK)
+    customer = make_customer()
+    db.add(CartItem(customer_id=customer.customer_id, product_id=product.product_id, quantity=ORDERED))
+    db.commit()
+    headers = auth_headers(customer)
+
+    placed = client.post(
+        "/customer/orders/",
+        json={"shipping_address_id": customer.addresses[0].address_id, "payment_method": "cod"},
+        headers=headers
+    )
+    assert placed.status_code == 201, placed.text
+    order_id = placed.json()["order_id"]
+
+    start = threading.Barrier(CANCELLERS)
+    statuses = []
+    errors = []
+
+    def cancel():
+        try:
+            start.wait()
+            response = client.post(f"/customer/orders/{order_id}/cancel", params={"reason": "changed my mind"}, headers=headers)
+            statuses.append(response.status_code)
+        except Exception as e:  # surfaced by the assertion below
+            errors.append(e)
+
+    threads = [threading.Thread(target=cancel) for _ in range(CANCELLERS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=60)
+
+    assert not errors
+    assert statuses.count(200) == 1, statuses
+    assert all(status in (200, 400, 409) for status in statuses), statuses
+
+    db.expire_all()
+    on_hand = db.query(func.sum(PharmacyInventory.quantity_in_stock)).filter(
+        PharmacyInventory.product_id == product.product_id
+    ).scalar()
+    assert on_hand == sum(STOCK)
+
+    sold = db.query(func.coalesce(func.sum(DailyProductSalesRollup.quantity), 0)).filter(
+        DailyProductSalesRollup.product_id == product.product_id
+    ).scalar()
+    assert sold == 0
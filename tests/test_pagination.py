@@ -0,0 +1,89 @@
+# tests/test_pagination.py
+import pytest
+from fastapi import Response
+from sqlalchemy import text
+from app.models.models import Order, UserRole
+from app.utils.pagination import NEXT_CURSOR_HEADER, keyset_paginate
+from tests.conftest import auth_headers, unique
+
+ORDERS = 5
+PAGE_SIZE = 2
+SHARED_TIMESTAMP = "'2024-01-01 10:00:00'"
+
+
+def seed_orders(db, customer, undated: int = 0) -> list:
+    """
+    Orders sharing one timestamp, written as text the way the database's
+    CURRENT_TIMESTAMP stores it, plus `undated` orders without a date
+    """
+    orders = [
+        Order(order_number=unique("ORD"), customer_id=customer.customer_id, total_amount=10, final_amount=10, payment_method="cod")
+        for _ in range(ORDERS + undated)
+    ]
+    db.add_all(orders)
+    db.commit()
+    order_ids = [order.order_id for order in orders]
+
+    table = Order.__table__
+    db.execute(table.update().where(table.c.order_id.in_(order_ids[:ORDERS])).values(order_date=text(SHARED_TIMESTAMP)))
+    db.execute(table.update().where(table.c.order_id.in_(order_ids[ORDERS:])).values(order_date=None))
+    db.commit()
+    return order_ids
+
+
+def page_through(client, path: str, params: dict, headers: dict) -> list:
+    seen, cursor = [], None
+    for _ in range(ORDERS + 1):
+        page_params = {**params, "limit": PAGE_SIZE, **({"cursor": cursor} if cursor else {})}
+        response = client.get(path, params=page_params, headers=headers)
+        assert response.status_code == 200, response.text
+        seen.extend(order["order_id"] for order in response.json())
+        cursor = response.headers.get(NEXT_CURSOR_HEADER)
+        if not cursor:
+            return seen
+    pytest.fail(f"Cursor pagination did not finish, pages returned {seen}")
+
+
+def test_customer_order_pages_sharing_a_timestamp(client, db, make_customer):
+    customer = make_customer()
+    order_ids = seed_orders(db, customer)
+
+    seen = page_through(client, "/customer/orders/", {}, auth_headers(customer))
+
+    assert seen == sorted(order_ids, reverse=True)
+
+
+def test_admin_order_pages_sharing_a_timestamp(client, db, make_customer):
+    customer = make_customer()
+    order_ids = seed_orders(db, customer)
+
+    seen = page_through(
+        client, "/admin/orders/", {"customer_id": customer.customer_id}, auth_headers(make_customer(UserRole.admin))
+    )
+
+    assert seen == sorted(order_ids, reverse=True)
+
+
+@pytest.mark.parametrize("descending", [True, False])
+def test_null_sort_values_are_paged_once(db, make_customer, descending):
+    customer = make_customer()
+    order_ids = seed_orders(db, customer, undated=2)
+    dated, undated = order_ids[:ORDERS], order_ids[ORDERS:]
+
+    seen, cursor = [], None
+    for _ in range(len(order_ids)):
+        response = Response()
+        query = db.query(Order).filter(Order.customer_id == customer.customer_id)
+        page = keyset_paginate(
+            query, response, Order.order_id, Order.order_date, descending=descending, cursor=cursor, limit=PAGE_SIZE
+        )
+        seen.extend(order.order_id for order in page)
+        cursor = response.headers.get(NEXT_CURSOR_HEADER)
+        if not cursor:
+            break
+
+    # NULL sorts above every date: first when descending, last when ascending
+    if descending:
+        assert seen == sorted(undated, reverse=True) + sorted(dated, reverse=True)
+    else:
+        assert seen == sorted(dated) + sorted(undated)
@@ -0,0 +1,92 @@
+# tests/test_query_counts.py
+import pytest
+from app.models.models import CartItem
+from app.services.catalog_cache import catalog_cache
+from tests.conftest import auth_headers
+
+# Statements per request. The counts must not grow with the number of rows,
+# so each endpoint is measured with a small and a larger result.
+CART_BUDGET = 1
+PRODUCT_DETAIL_BUDGET = 2
+PRODUCT_LIST_BUDGET = 1
+
+
+@pytest.fixture(autouse=True)
+def empty_catalog_cache():
+    # A cached catalog response runs no SQL at all
+    catalog_cache.backend.clear()
+    yield
+    catalog_cache.backend.clear()
+
+
+def _cart_statements(client, db, count_statements, make_customer, make_product, lines):
+    customer = make_customer()
+    for _ in range(lines):
+        product = make_product(batches=(5, 5))
+        db.add(CartItem(customer_id=customer.customer_id, product_id=product.product_id, quantity=1))
+    db.commit()
+    headers = auth_headers(customer)
+    # Load the principal once, so only the cart itself is counted
+    assert client.get("/cart/summary", headers=headers).status_code == 200
+
+    counts = {}
+    for path in ("/cart/", "/cart/summary"):
+        with count_statements() as statements:
+            response = client.get(path, headers=headers)
+        assert response.status_code == 200
+        counts[path] = len(statements)
+    return counts
+
+
+def test_cart_statements_do_not_grow_with_cart_size(client, db, count_statements, make_customer, make_product):
+    small = _cart_statements(client, db, count_statements, make_customer, make_product, lines=1)
+    large = _cart_statements(client, db, count_statements, make_customer, make_product, lines=12)
+
+    assert small == large
+    assert all(count <= CART_BUDGET for count in large.values()), large
+
+
+def test_product_detail_statements_do_not_grow_with_batches(client, count_statements, make_product):
+    counts = []
+    for batches in ((5,), (5, 5, 5, 5, 5, 5)):
+        product = make_product(batches=batches)
+        with count_statements() as statements:
+            response = client.get(f"/products/{product.product_id}")
+        assert response.status_code == 200
+        assert response.json()["stock_quantity"] == sum(batches)
+        counts.append(len(statements))
+
+    assert counts[0] == counts[1]
+    assert counts[1] <= PRODUCT_DETAIL_BUDGET, counts
+
+
+def test_product_list_statements_do_not_grow_with_page_size(client, count_statements, make_product):
+    products = [make_product() for _ in range(12)]
+    category_id = products[0].category_id
+
+    counts = []
+    for limit in (2, 12):
+        with count_statements() as statements:
+            response = client.get("/products/", params={"category_id": category_id, "limit": limit})
+        assert response.status_code == 200
+        assert len(response.json()) == limit
+        counts.append(len(statements))
+
+    assert counts[0] == counts[1]
+    assert counts[1] <= PRODUCT_LIST_BUDGET, counts
+
+
+def test_product_batch_statements_do_not_grow_with_ids(client, count_statements, make_product):
+    products = [make_product(batches=(5, 5)) for _ in range(12)]
+
+    counts = []
+    for wanted in (products[:2], products):
+        ids = ",".join(str(product.product_id) for product in wanted)
+        with count_statements() as statements:
+            response = client.get("/products/batch", params={"ids": ids})
+        assert response.status_code == 200
+        assert len(response.json()) == len(wanted)
+        counts.append(len(statements))
+
+    assert counts[0] == counts[1]
+    assert counts[1] <= PRODUCT_DETAIL_BUDGET, counts
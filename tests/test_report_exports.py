@@ -0,0 +1,56 @@
+# tests/test_report_exports.py
+import csv
+import io
+import json
+from app.database import SessionLocal
+from app.models.models import UserRole
+from app.utils import export
+from tests.conftest import auth_headers
+
+
+def tracked_sessions(monkeypatch):
+    """Make the exports' sessions record whether they were closed"""
+    sessions = []
+
+    def session_local():
+        session = SessionLocal()
+        session.closed = False
+        close = session.close
+
+        def tracked_close():
+            session.closed = True
+            close()
+
+        session.close = tracked_close
+        sessions.append(session)
+        return session
+
+    monkeypatch.setattr(export, "SessionLocal", session_local)
+    return sessions
+
+
+def test_inventory_csv_export_streams_from_its_own_session(client, make_customer, make_product, monkeypatch):
+    sessions = tracked_sessions(monkeypatch)
+    product = make_product(batches=(4, 6))
+
+    response = client.get(
+        "/admin/reports/inventory", params={"format": "csv"}, headers=auth_headers(make_customer(UserRole.admin))
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    rows = [row for row in csv.DictReader(io.StringIO(response.text)) if row["product_id"] == str(product.product_id)]
+    assert sorted(int(row["quantity_in_stock"]) for row in rows) == [4, 6]
+    assert len(sessions) == 1 and sessions[0].closed
+
+
+def test_prescription_ndjson_export_closes_its_session(client, make_customer, monkeypatch):
+    sessions = tracked_sessions(monkeypatch)
+
+    response = client.get(
+        "/admin/reports/prescriptions", params={"format": "ndjson"}, headers=auth_headers(make_customer(UserRole.admin))
+    )
+
+    assert response.status_code == 200
+    assert all("prescription_id" in json.loads(line) for line in response.text.splitlines())
+    assert len(sessions) == 1 and sessions[0].closed
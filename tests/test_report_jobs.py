@@ -0,0 +1,25 @@
+# tests/test_report_jobs.py
+import pytest
+from app.models.models import UserRole
+from app.services.report_jobs import normalize_params
+from tests.conftest import auth_headers
+
+
+@pytest.mark.parametrize("value, expected", [
+    (True, True), (False, False), ("true", True), ("FALSE", False), ("1", True), ("0", False), (1, True), (0, False)
+])
+def test_inventory_flags_parse_strictly(value, expected):
+    params = normalize_params("inventory", {"low_stock_only": value, "expiring_soon": value})
+    assert params["low_stock_only"] is expected
+    assert params["expiring_soon"] is expected
+
+
+def test_invalid_inventory_flag_is_a_bad_request(client, make_customer):
+    admin = make_customer(UserRole.admin)
+    response = client.post(
+        "/admin/reports/jobs",
+        json={"report_type": "inventory", "filters": {"low_stock_only": "no"}},
+        headers=auth_headers(admin)
+    )
+    assert response.status_code == 400
+    assert "low_stock_only" in response.json()["detail"]
@@ -0,0 +1,66 @@
+# tests/test_review_queue.py
+from datetime import datetime
+from app.models.models import Prescription, UserRole
+from tests.conftest import auth_headers
+
+
+def pending_prescription(db, customer) -> Prescription:
+    # Blocking and uploaded long ago, so it is first in the queue
+    prescription = Prescription(
+        customer_id=customer.customer_id,
+        image_url="uploads/prescriptions/test.png",
+        status="pending",
+        blocks_checkout=True,
+        uploaded_at=datetime(2000, 1, 1)
+    )
+    db.add(prescription)
+    db.commit()
+    return prescription
+
+
+def claim(client, admin) -> int:
+    response = client.post("/admin/prescriptions/queue/claim", headers=auth_headers(admin))
+    assert response.status_code == 200, response.text
+    return response.json()[0]["prescription_id"]
+
+
+def verify(client, admin, prescription_id: int):
+    response = client.put(
+        f"/admin/prescriptions/{prescription_id}/verify",
+        json={"status": "approved", "verification_notes": "ok"},
+        headers=auth_headers(admin)
+    )
+    assert response.status_code == 200, response.text
+
+
+def reviewer_metrics(client, admin, reviewer) -> dict:
+    response = client.get("/admin/prescriptions/queue/metrics", headers=auth_headers(admin))
+    assert response.status_code == 200, response.text
+    return next(r for r in response.json()["reviewers"] if r["reviewer_id"] == reviewer.customer_id)
+
+
+def test_handling_time_counts_the_verifiers_own_claim(client, db, make_customer):
+    admin = make_customer(UserRole.admin)
+    prescription = pending_prescription(db, make_customer())
+
+    assert claim(client, admin) == prescription.prescription_id
+    verify(client, admin, prescription.prescription_id)
+
+    assert reviewer_metrics(client, admin, admin)["handling_minutes"]["median"] is not None
+
+
+def test_released_claim_is_not_counted_for_another_verifier(client, db, make_customer):
+    claimant, verifier = make_customer(UserRole.admin), make_customer(UserRole.admin)
+    prescription = pending_prescription(db, make_customer())
+
+    assert claim(client, claimant) == prescription.prescription_id
+    released = client.delete(f"/admin/prescriptions/{prescription.prescription_id}/claim", headers=auth_headers(claimant))
+    assert released.status_code == 200, released.text
+    db.refresh(prescription)
+    assert prescription.claimed_by is None and prescription.claimed_at is None
+
+    verify(client, verifier, prescription.prescription_id)
+
+    metrics = reviewer_metrics(client, verifier, verifier)
+    assert metrics["verified"] == 1
+    assert metrics["handling_minutes"]["median"] is None
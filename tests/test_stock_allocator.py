@@ -0,0 +1,44 @@
+# tests/test_stock_allocator.py
+import threading
+import time
+import pytest
+from app.database import SessionLocal, engine
+from app.services.stock_allocator import allocate_fefo
+
+# Row locks only exist on PostgreSQL; SQLite serialises whole transactions
+pytestmark = pytest.mark.skipif(engine.dialect.name != "postgresql", reason="needs TEST_DATABASE_URL (PostgreSQL)")
+
+HOLD_SECONDS = 0.5
+
+
+def test_concurrent_allocations_of_one_sku_do_not_deadlock(make_product):
+    # Two batches of one unit: each checkout needs both, so if each
+    # transaction locked one batch first they would wait on each other
+    product = make_product(batches=(1, 1))
+    start = threading.Barrier(2)
+    allocated = []
+    errors = []
+
+    def checkout():
+        db = SessionLocal()
+        try:
+            start.wait()
+            allocations = allocate_fefo(db, {product.product_id: 2})
+            allocated.append(sum(allocation.quantity for allocation in allocations[product.product_id]))
+            # Keep the locks a while so the other session has to wait on them
+            time.sleep(HOLD_SECONDS)
+            db.rollback()
+        except Exception as e:  # surfaced by the assertion below
+            db.rollback()
+            errors.append(e)
+        finally:
+            db.close()
+
+    threads = [threading.Thread(target=checkout) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=30)
+
+    assert not errors
+    assert allocated == [2, 2]
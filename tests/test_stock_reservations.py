@@ -0,0 +1,80 @@
+# tests/test_stock_reservations.py
+import threading
+from datetime import datetime
+from sqlalchemy import func
+from app.models.models import CartItem, OrderItem, OrderItemBatch, PharmacyInventory, ReservationStatus, StockReservation
+from app.services.stock_reservations import available_to_promise
+from tests.conftest import auth_headers
+
+STOCK = (4, 3)          # two batches of one scarce SKU
+CUSTOMERS = 16
+UNITS_PER_CART = 2      # demand is well over the stock on hand
+
+
+def test_concurrent_checkouts_never_oversell(client, db, make_customer, make_product):
+    product = make_product(batches=STOCK)
+    customers = [make_customer() for _ in range(CUSTOMERS)]
+    for customer in customers:
+        db.add(CartItem(customer_id=customer.customer_id, product_id=product.product_id, quantity=UNITS_PER_CART))
+    db.commit()
+
+    addresses = {customer.customer_id: customer.addresses[0].address_id for customer in customers}
+    start = threading.Barrier(CUSTOMERS)
+    statuses = []
+    errors = []
+
+    def checkout(customer, reserve_first):
+        headers = auth_headers(customer)
+        try:
+            start.wait()
+            if reserve_first:
+                reserved = client.post("/customer/orders/checkout/reserve", headers=headers)
+                statuses.append(("reserve", reserved.status_code))
+                if reserved.status_code != 200:
+                    return
+            placed = client.post(
+                "/customer/orders/",
+                json={"shipping_address_id": addresses[customer.customer_id], "payment_method": "cod"},
+                headers=headers
+            )
+            statuses.append(("order", placed.status_code))
+        except Exception as e:  # surfaced by the assertion below
+            errors.append(e)
+
+    # Half reserve before checking out, half go straight to checkout
+    threads = [
+        threading.Thread(target=checkout, args=(customer, index % 2 == 0))
+        for index, customer in enumerate(customers)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=120)
+
+    assert not errors
+    assert all(status < 500 for _, status in statuses), statuses
+
+    db.expire_all()
+    sold = db.query(func.coalesce(func.sum(OrderItemBatch.quantity), 0)).join(OrderItem).filter(
+        OrderItem.product_id == product.product_id
+    ).scalar()
+    batches = db.query(PharmacyInventory).filter(PharmacyInventory.product_id == product.product_id).all()
+    on_hand = sum(batch.quantity_in_stock for batch in batches)
+
+    assert sold <= sum(STOCK)
+    assert sold + on_hand == sum(STOCK)
+    assert all(batch.quantity_in_stock >= 0 for batch in batches)
+    assert sold == UNITS_PER_CART * sum(1 for step, status in statuses if step == "order" and status == 201)
+    assert sold > 0
+
+    # Holds left by customers whose checkout failed never promise more than
+    # is on hand. That relies on the batch row locks, which SQLite ignores
+    if db.bind.dialect.name != "postgresql":
+        return
+    held = db.query(func.coalesce(func.sum(StockReservation.quantity), 0)).filter(
+        StockReservation.product_id == product.product_id,
+        StockReservation.status == ReservationStatus.active,
+        StockReservation.expires_at > datetime.now()
+    ).scalar()
+    assert held <= on_hand
+    assert available_to_promise(db, [product.product_id])[product.product_id] == on_hand - held